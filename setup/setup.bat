@@ -30,7 +30,6 @@ if not exist ".env" (
         echo LAST_ACTIVITY_THRESHOLD_DAYS=10
         echo QBIT_RUN_TIME=02:00
         echo SONARR_RUN_TIME=03:00
-        echo SLEEP_INTERVAL=60
     ) > .env
 ) else (
     echo .env file already exists. Skipping creation.
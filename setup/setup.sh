@@ -29,7 +29,6 @@ AGE_THRESHOLD_DAYS=16
 LAST_ACTIVITY_THRESHOLD_DAYS=10
 QBIT_RUN_TIME=02:00
 SONARR_RUN_TIME=02:00
-SLEEP_INTERVAL=60
 EOF
 else
     echo ".env file already exists. Skipping creation."
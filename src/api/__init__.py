@@ -1,4 +1,17 @@
-from .qbit_api import QbitAPI
-from .sonarr_api import SonarrAPI
-from .radarr_api import RadarrAPI
-__all__ = ['QbitAPI', 'SonarrAPI', 'RadarrAPI']
\ No newline at end of file
+# api/__init__.py
+# The API clients are imported on first access, so using one client doesn't load the others.
+import importlib
+
+_EXPORTS = {
+    'QbitAPI': '.qbit_api',
+    'SonarrAPI': '.sonarr_api',
+    'RadarrAPI': '.radarr_api',
+}
+
+__all__ = ['QbitAPI', 'SonarrAPI', 'RadarrAPI']
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,10 +1,18 @@
 import os
+import re
+import time
 import requests
 import logging
+from requests.adapters import HTTPAdapter
+from src.utils.metrics import REQUEST_LATENCY, REQUESTS
+from src.utils.tracing import span
 from urllib.parse import urlparse, urlunparse
 
 logger = logging.getLogger(__name__)
 
+# Collapses ids in paths so metrics are labelled per endpoint, e.g. series/{id}.
+ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
 DEFAULT_PORTS = {
     "qbit": 8080,
     "sonarr": 8989,
@@ -22,7 +30,8 @@ class BaseAPI:
         env_base_url: str = None,
         env_api_key: str = None,
         api_version: str = "v3",
-        default_service: str = None
+        default_service: str = None,
+        pool_size: int = None
     ):
         """
         Initialize the BaseAPI class using provided arguments or environment variables.
@@ -32,8 +41,13 @@ class BaseAPI:
         :param env_base_url: Environment variable name for the base URL.
         :param env_api_key: Environment variable name for the API key.
         :param api_version: The API version to use in URL building.
+        :param pool_size: Maximum number of pooled connections to the instance; defaults to HTTP_POOL_SIZE or 10.
         """
         self.session = requests.Session()
+        # Every client talks to a single host, so one pool sized for the shared worker pool is enough.
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size or int(os.environ.get("HTTP_POOL_SIZE", 10)))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
         self.API_KEY = api_key or (os.environ.get(env_api_key) if env_api_key else None)
         self.BASE_URL = base_url or (os.environ.get(env_base_url) if env_base_url else None)
         self.api_version = api_version
@@ -81,6 +95,40 @@ class BaseAPI:
     #     """
     #     return f"{self.BASE_URL}/api/{self.api_version}/{endpoint}?apikey={self.API_KEY}"
 
+    def _request(self, method: str, path: str, **kwargs) -> requests.Response:
+        """
+        Send a request to an API endpoint and record its latency and status in the metrics.
+
+        :param method: HTTP method, e.g. "GET".
+        :param path: API endpoint path.
+        :param kwargs: Passed on to requests (params, json, data, ...).
+        :return: A Response object.
+        """
+        url = self._build_url(path)
+        endpoint = ID_SEGMENT.sub("/{id}", "/" + path)[1:]
+        start = time.perf_counter()
+        status = "error"
+        try:
+            with span("http", method, endpoint):
+                response = self.session.request(method, url, **kwargs)
+            status = str(response.status_code)
+            return response
+        finally:
+            labels = {"service": self.default_service, "method": method, "endpoint": endpoint}
+            REQUEST_LATENCY.observe(time.perf_counter() - start, **labels)
+            REQUESTS.inc(status=status, **labels)
+
+    @staticmethod
+    def _json(response: requests.Response):
+        """
+        Decode a response body as JSON, timed as its own stage when tracing is on.
+
+        :param response: A successful Response.
+        :return: The decoded body.
+        """
+        with span("decode json"):
+            return response.json()
+
     def _get(self, path: str, params: dict = None) -> requests.Response:
         """
         Helper method for GET requests.
@@ -89,9 +137,8 @@ class BaseAPI:
         :param params: Additional query parameters.
         :return: A Response object from the GET request.
         """
-        url = self._build_url(path)
-        response = self.session.get(url, params=params)
-        logger.debug(f"GET {url} with params {params} returned {response.status_code}")
+        response = self._request("GET", path, params=params)
+        logger.debug(f"GET {path} with params {params} returned {response.status_code}")
         return response
 
     def _post(self, path: str, data: dict) -> requests.Response:
@@ -102,7 +149,6 @@ class BaseAPI:
         :param data: Dictionary payload to send as JSON.
         :return: A Response object from the POST request.
         """
-        url = self._build_url(path)
-        response = self.session.post(url, json=data)
-        logger.debug(f"POST {url} with payload {data} returned {response.status_code}")
-        return response
\ No newline at end of file
+        response = self._request("POST", path, json=data)
+        logger.debug(f"POST {path} with payload {data} returned {response.status_code}")
+        return response
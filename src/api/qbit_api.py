@@ -1,6 +1,7 @@
 # src/api/qbittorrent_api.py
 
 import os
+from typing import Iterable, Optional
 
 from src.api.base_api import BaseAPI
 from src.utils import setup_logger
@@ -8,6 +9,9 @@ from dotenv import load_dotenv
 
 logger = setup_logger(__name__, service_name="qBit", color="cyan")
 
+# Hashes per filtered `torrents/info` request, to keep the query string short.
+HASHES_PER_REQUEST = 100
+
 class QbitAPI(BaseAPI):
     """
     A class to interact with the qBittorrent WebUI API.
@@ -32,6 +36,9 @@ class QbitAPI(BaseAPI):
         )
         if not self.base_url or not self.username or not self.password:
             raise ValueError("Missing qbit base URL, username, or password")
+        # Incremental sync state for get_free_space.
+        self._sync_rid = 0
+        self._free_space = None
 
     def login(self) -> bool:
         """
@@ -45,7 +52,7 @@ class QbitAPI(BaseAPI):
             "username": self.username,
             "password": self.password
         }
-        response = self.session.post(login_url, data=data)
+        response = self._request("POST", "auth/login", data=data)
         if response.text.strip() == "Ok.":
             logger.info("Login successful!")
             return True
@@ -53,37 +60,81 @@ class QbitAPI(BaseAPI):
             logger.info("Login failed: %s", response.text)
             return False
 
-    def list_torrents(self) -> list:
+    def list_torrents(self, hashes: Iterable[str] = None) -> list:
         """
         Retrieve the list of torrents from qBittorrent.
 
-        :return: A list of torrent dictionaries; an empty list if the request fails.
+        :param hashes: Only retrieve these torrents; by default all torrents are retrieved.
+        :return: A list of torrent dictionaries; an empty list if a request fails.
+        """
+        if hashes is None:
+            batches = [None]
+        else:
+            hashes = list(hashes)
+            batches = ["|".join(hashes[start:start + HASHES_PER_REQUEST])
+                       for start in range(0, len(hashes), HASHES_PER_REQUEST)]
+        torrents = []
+        for batch in batches:
+            response = self._get("torrents/info", params={"hashes": batch} if batch else None)
+            if not response.ok:
+                logger.info("Error retrieving torrents: %s", response.text)
+                return []
+            torrents.extend(self._json(response))
+        return torrents
+
+    def get_trackers(self, torrent_hash: str) -> Optional[list]:
+        """
+        Retrieve the trackers of a torrent, including the DHT/PeX/LSD pseudo-trackers.
+
+        :param torrent_hash: Unique hash of the torrent.
+        :return: A list of tracker dictionaries, or None if the request fails.
+        """
+        response = self._get("torrents/trackers", params={"hash": torrent_hash})
+        if not response.ok:
+            logger.debug("Error retrieving trackers of %s: %s", torrent_hash, response.text)
+            return None
+        return self._json(response)
+
+    def get_free_space(self) -> Optional[int]:
+        """
+        Retrieve the free space of qBittorrent's download disk from the incremental sync data.
+        After the first call only changes are transferred, so polling it is cheap.
+
+        :return: Free space in bytes, or None if it is not known.
         """
-        torrents_url = self._build_url("torrents/info")
-        response = self.session.get(torrents_url)
+        response = self._get("sync/maindata", params={"rid": self._sync_rid})
+        if response.status_code == 403 and self.login():
+            response = self._get("sync/maindata", params={"rid": self._sync_rid})
         if not response.ok:
-            logger.info("Error retrieving torrents: %s", response.text)
-            return []
-        return response.json()
+            logger.info("Error retrieving sync data: %s", response.text)
+            return self._free_space
+        data = self._json(response)
+        self._sync_rid = data.get("rid", 0)
+        # Incremental updates only include server_state fields that changed.
+        free_space = (data.get("server_state") or {}).get("free_space_on_disk")
+        if free_space is not None:
+            self._free_space = free_space
+        return self._free_space
 
-    def delete_torrent(self, torrent_name: str, torrent_hash: str, delete_files: bool = True) -> None:
+    def delete_torrent(self, torrent_name: str, torrent_hash: str, delete_files: bool = True) -> bool:
         """
         Delete a torrent using its hash.
 
         :param torrent_name: Name of the torrent (for logging purposes).
         :param torrent_hash: Unique hash of the torrent to delete.
         :param delete_files: If True, also delete the downloaded data.
+        :return: True if qBittorrent accepted the deletion.
         """
         data = {
             "hashes": torrent_hash,
             "deleteFiles": "true" if delete_files else "false"
         }
-        delete_url = self._build_url("torrents/delete")
-        response = self.session.post(delete_url, data=data)
+        response = self._request("POST", "torrents/delete", data=data)
         if response.ok:
             logger.info("\033[92mSuccessfully deleted torrent %s\033[0m", torrent_name)
         else:
             logger.info("\033[91mFailed to delete torrent %s: %s\033[0m", torrent_name, response.text)
+        return response.ok
 
 
 # Example usage for testing:
@@ -1,5 +1,7 @@
 from src.api.base_api import BaseAPI
 from src.utils import logger
+from src.utils.metrics import RESCAN_COMMANDS
+from src.utils.tracing import span
 
 class RadarrAPI(BaseAPI):
     """
@@ -18,6 +20,18 @@ class RadarrAPI(BaseAPI):
             default_service="radarr"
         )
 
+    def get_all_movies(self) -> list:
+        """
+        Retrieve all movies from Radarr.
+
+        :return: A list of movie dictionaries; an empty list if the request fails.
+        """
+        response = self._get("movie")
+        if response.ok:
+            return self._json(response)
+        logger.error("Error fetching movies: %s", response.text)
+        return []
+
     def get_large_movies(self, min_size_gb: float = 2.0) -> list:
         """
         Fetch movies and return those with a sizeOnDisk greater than the specified GB.
@@ -28,17 +42,33 @@ class RadarrAPI(BaseAPI):
         min_size_bytes = min_size_gb * (1024 ** 3)  # 2GB in bytes
         response = self._get("movie")
         if response.ok:
-            movies = response.json()
-            large_movies = [
-                movie for movie in movies
-                if movie.get("sizeOnDisk", 0) > min_size_bytes
-            ]
+            movies = self._json(response)
+            with span("filter"):
+                large_movies = [
+                    movie for movie in movies
+                    if movie.get("sizeOnDisk", 0) > min_size_bytes
+                ]
             logger.info("Found %d movies larger than %.2f GB", len(large_movies), min_size_gb)
             return large_movies
         else:
             logger.error("Error fetching movies: %s", response.text)
             raise Exception(f"Error fetching movies: {response.text}")
 
+    def rescan_movie_command(self, movie_id: int) -> bool:
+        """
+        Issue a command to rescan the files of a movie on disk.
+
+        :param movie_id: The unique ID of the movie.
+        :return: True if the command is successfully submitted, otherwise False.
+        """
+        response = self._post("command", {"name": "RescanMovie", "movieId": movie_id})
+        RESCAN_COMMANDS.inc(service="radarr", result="success" if response.ok else "error")
+        if response.ok:
+            logger.info("Rescan command submitted for movie %d.", movie_id)
+            return True
+        logger.error("Failed to submit rescan command for movie %d: %s", movie_id, response.text)
+        return False
+
 
 if __name__ == "__main__":
     from src.api import RadarrAPI
@@ -1,5 +1,6 @@
 from src.api.base_api import BaseAPI
 from src.utils import setup_logger
+from src.utils.metrics import RENAME_COMMANDS, RESCAN_COMMANDS
 
 logger = setup_logger(__name__, service_name="sonarr", color="light_blue")
 
@@ -29,7 +30,7 @@ class SonarrAPI(BaseAPI):
         """
         response = self._get("series")
         if response.ok:
-            return response.json()
+            return self._json(response)
         else:
             logger.error(f"Error retrieving series: {response.text}")
             return []
@@ -44,7 +45,7 @@ class SonarrAPI(BaseAPI):
         path = f"series/{series_id}"
         response = self._get(path, params={"includeSeasonImages": "false"})
         if response.ok:
-            return response.json()
+            return self._json(response)
         else:
             logger.error(f"Error retrieving series {series_id}: {response.text}")
             return {}
@@ -73,6 +74,7 @@ class SonarrAPI(BaseAPI):
             "files": files,
         }
         response = self._post("command", payload)
+        RENAME_COMMANDS.inc(result="success" if response.ok else "error")
         if response.ok:
             logger.info(f"Rename command submitted for series {series_id}.")
             return True
@@ -80,6 +82,21 @@ class SonarrAPI(BaseAPI):
             logger.error(f"Failed to submit rename command for series {series_id}: {response.text}")
             return False
 
+    def rescan_series_command(self, series_id: int) -> bool:
+        """
+        Issue a command to rescan the files of a series on disk.
+
+        :param series_id: The unique ID of the series.
+        :return: True if the command is successfully submitted, otherwise False.
+        """
+        response = self._post("command", {"name": "RescanSeries", "seriesId": series_id})
+        RESCAN_COMMANDS.inc(service="sonarr", result="success" if response.ok else "error")
+        if response.ok:
+            logger.info(f"Rescan command submitted for series {series_id}.")
+            return True
+        logger.error(f"Failed to submit rescan command for series {series_id}: {response.text}")
+        return False
+
 
 if __name__ == "__main__":
     from src.api import SonarrAPI
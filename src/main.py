@@ -1,14 +1,16 @@
 import os
 import argparse
-import schedule
-import time
+import logging
+import signal
 
-from utils.logger import setup_logger
-from services import QbitService, SonarrService, RadarrService
+from src.utils.logger import setup_logger
+from src.services.runtime import enabled_services, get_runtime
+from src.services.scheduler import default_scheduler
+from src.utils import memory, tracing
 from dotenv import load_dotenv
 
-load_dotenv(override=True)
-logger = setup_logger(__name__, service_name="main")
+# Configured in main(); services and their API clients are only imported once they are enabled.
+logger = logging.getLogger(__name__)
 
 def parse_args():
     """
@@ -16,11 +18,16 @@ def parse_args():
     Supported arguments:
         --non-interactive   Run in non-interactive mode (auto-delete).
         --schedule          Run on a daily schedule and never exit.
+        --trace             Log a per-stage timing summary after every run.
+        --profile MODE      Profile the next run with cprofile or sample (implies --trace).
     :return: Namespace with parsed arguments.
     """
     parser = argparse.ArgumentParser(description="Multi-Service Cleanup Script")
     parser.add_argument("--non-interactive", action="store_true", help="Run in non-interactive mode (auto-delete).")
     parser.add_argument("--schedule", action="store_true", help="Run on a daily schedule and never exit.")
+    parser.add_argument("--trace", action="store_true", help="Log a per-stage timing summary after every run.")
+    parser.add_argument("--profile", choices=tracing.PROFILE_MODES,
+                        help="Profile the next run and write the result to REFINEARR_PROFILE_DIR.")
     return parser.parse_args()
 
 
@@ -29,14 +36,7 @@ def check_services():
     Check which services are enabled based on environment variables.
     :return: List of services to run.
     """
-    services = []
-    if os.getenv("QBIT_BASE_URL") and os.getenv("QBIT_USERNAME") and os.getenv("QBIT_PASSWORD"):
-        services.append("qbit")
-    if os.getenv("SONARR_BASE_URL") and os.getenv("SONARR_API_KEY"):
-        services.append("sonarr")
-    if os.getenv("RADARR_BASE_URL") and os.getenv("RADARR_API_KEY"):
-        services.append("radarr")
-    return services
+    return enabled_services()
 
 def schedule_services(services: list):
     """
@@ -45,19 +45,43 @@ def schedule_services(services: list):
     """
     logger.info(f"Services to schedule: {services}")
 
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        from src.utils.metrics import start_metrics_server
+        start_metrics_server(int(metrics_port))
+
+    runtime = get_runtime()
     if "qbit" in services:
-        qbit_service = QbitService()
-        qbit_service.qbit_scheduled_cleanup()
+        runtime.service("qbit").qbit_scheduled_cleanup()
 
     if "sonarr" in services:
-        sonarr_service = SonarrService()
-        sonarr_service.sonarr_scheduled_cleanup()
+        runtime.service("sonarr").sonarr_scheduled_cleanup()
 
-    sleep_interval = int(os.getenv("SLEEP_INTERVAL", 60))
+    install_signal_handlers()
     logger.info("Entering scheduling loop. Press Ctrl+C to exit.")
-    while True:
-        schedule.run_pending()
-        time.sleep(sleep_interval)
+    default_scheduler.run_forever()
+    # Recycling lets running jobs finish first; a shutdown signal doesn't wait for them.
+    recycle = memory.recycle_requested.is_set()
+    runtime.shutdown(wait=recycle)
+    if recycle:
+        memory.recycle_process()
+
+def install_signal_handlers():
+    """
+    Wake the scheduler immediately on shutdown signals (SIGINT/SIGTERM) and run every job now on SIGUSR1.
+    """
+    def handle_shutdown(signum, frame):
+        logger.info("Received %s, stopping scheduler.", signal.Signals(signum).name)
+        default_scheduler.stop()
+
+    def handle_trigger(signum, frame):
+        logger.info("Received %s, triggering all scheduled jobs.", signal.Signals(signum).name)
+        default_scheduler.trigger()
+
+    signal.signal(signal.SIGINT, handle_shutdown)
+    signal.signal(signal.SIGTERM, handle_shutdown)
+    if hasattr(signal, "SIGUSR1"):
+        signal.signal(signal.SIGUSR1, handle_trigger)
 
 def run_services(services: list, non_interactive: bool):
     """
@@ -65,26 +89,34 @@ def run_services(services: list, non_interactive: bool):
     """
     logger.info(f"Services to run: {services}")
 
+    runtime = get_runtime()
     if "qbit" in services:
         logger.info("Running qBit cleanup...")
-        qbit_service = QbitService()
+        qbit_service = runtime.service("qbit")
 
         logger.info("qBit cleanup will run once in interactive mode." if non_interactive else "qBit cleanup will run in non-interactive mode.")
-        qbit_service.start(interactive=not non_interactive)
+        tracing.traced_run("QbitService", qbit_service.start, interactive=not non_interactive)
     elif "radarr" in services:
         logger.info("Running Radarr cleanup...")
-        radarr_service = RadarrService()
-        radarr_service.start()
+        radarr_service = runtime.service("radarr")
+        tracing.traced_run("RadarrService", radarr_service.start)
 
     if "sonarr" in services:
         logger.info("Running Sonarr cleanup...")
-        sonarr_service = SonarrService()
-        sonarr_service.start()
+        sonarr_service = runtime.service("sonarr")
+        tracing.traced_run("SonarrService", sonarr_service.start)
+    runtime.shutdown()
 
 
 def main():
+    load_dotenv(override=True)
+    setup_logger(__name__, service_name="main")
     args = parse_args()
     logger.info(f"Starting with arguments: {args}")
+    # The environment may have changed since import, through the .env file.
+    tracing.enable_from_env()
+    if args.trace or args.profile:
+        tracing.enable(profile_mode=args.profile)
 
     services = check_services()
     if not services:
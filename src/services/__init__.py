@@ -1,7 +1,18 @@
 # services/__init__.py
+# The service classes are imported on first access, so importing one service (or the runtime)
+# doesn't load the others and their API clients.
+import importlib
 
-from .qbit import QbitService
-from .sonarr import SonarrService
-from .radarr import RadarrService
+_EXPORTS = {
+    'QbitService': '.qbit',
+    'SonarrService': '.sonarr',
+    'RadarrService': '.radarr',
+}
 
 __all__ = ['QbitService', 'SonarrService', 'RadarrService']
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
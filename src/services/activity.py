@@ -0,0 +1,233 @@
+# src/services/activity.py
+import json
+import logging
+import math
+import os
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+DEFAULT_RETENTION_DAYS = 7
+DEFAULT_BUCKET_MINUTES = 360
+FORMAT_VERSION = 1
+
+UINT32_MAX = 2 ** 32 - 1
+UINT16_MAX = 2 ** 16 - 1
+
+
+class ActivityHistory:
+    """
+    Rolling upload and peer history per torrent, kept in flat typed arrays.
+
+    Time is split into buckets of `bucket_minutes`, shared by all torrents. Each torrent owns a
+    slot: a row of `capacity` buckets in `uploads` (KiB uploaded during the bucket, uint32) and
+    `peers` (most peers connected during the bucket, uint16). The rows form one ring buffer whose
+    current position is `head`; the start time of each bucket is kept once in `timestamps`.
+    50k torrents with a week of 6-hour buckets take about 9 MB.
+    """
+
+    def __init__(self, retention_days: float = DEFAULT_RETENTION_DAYS, bucket_minutes: float = DEFAULT_BUCKET_MINUTES):
+        """
+        :param retention_days: How far back the history reaches.
+        :param bucket_minutes: Length of one bucket; samples within it are added up.
+        """
+        self.bucket_seconds = bucket_minutes * 60
+        # One extra bucket for the current, partial one.
+        self.capacity = math.ceil(retention_days * SECONDS_PER_DAY / self.bucket_seconds) + 1
+        self.timestamps = array("d", bytes(8 * self.capacity))
+        self.head = -1
+        self.slots: Dict[str, int] = {}
+        self.free: List[int] = []
+        self.uploads = array("I")
+        self.peers = array("H")
+        self.last_uploaded = array("Q")
+        self.first_seen = array("d")
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["ActivityHistory"]:
+        """
+        Create a history from QBIT_HISTORY_DAYS and QBIT_HISTORY_BUCKET_MINUTES, restored from
+        QBIT_HISTORY_PATH if that is set. The retention is at least QBIT_IDLE_DAYS.
+
+        :return: The history, or None if QBIT_IDLE_DAYS is not set.
+        """
+        idle_days = os.getenv("QBIT_IDLE_DAYS")
+        if not idle_days:
+            return None
+        retention = max(float(os.getenv("QBIT_HISTORY_DAYS", DEFAULT_RETENTION_DAYS)), float(idle_days))
+        history = cls(retention, float(os.getenv("QBIT_HISTORY_BUCKET_MINUTES", DEFAULT_BUCKET_MINUTES)))
+        path = os.getenv("QBIT_HISTORY_PATH")
+        if path and os.path.exists(path):
+            history.load(path)
+        return history
+
+    def __len__(self) -> int:
+        return len(self.slots)
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Size of the sample arrays in bytes.
+        """
+        return sum(values.itemsize * len(values) for values in (
+            self.timestamps, self.uploads, self.peers, self.last_uploaded, self.first_seen))
+
+    def _allocate(self, torrent_hash: str, uploaded: int, now: float) -> None:
+        if self.free:
+            slot = self.free.pop()
+            start = slot * self.capacity
+            self.uploads[start:start + self.capacity] = array("I", bytes(4 * self.capacity))
+            self.peers[start:start + self.capacity] = array("H", bytes(2 * self.capacity))
+            self.last_uploaded[slot] = uploaded
+            self.first_seen[slot] = now
+        else:
+            slot = len(self.first_seen)
+            self.uploads.frombytes(bytes(4 * self.capacity))
+            self.peers.frombytes(bytes(2 * self.capacity))
+            self.last_uploaded.append(uploaded)
+            self.first_seen.append(now)
+        self.slots[torrent_hash] = slot
+
+    def _advance(self, now: float) -> None:
+        bucket_start = now - now % self.bucket_seconds
+        if self.head >= 0 and bucket_start <= self.timestamps[self.head]:
+            return
+        self.head = (self.head + 1) % self.capacity
+        self.timestamps[self.head] = bucket_start
+        # Clear the reused column of every slot.
+        rows = len(self.first_seen)
+        self.uploads[self.head::self.capacity] = array("I", bytes(4 * rows))
+        self.peers[self.head::self.capacity] = array("H", bytes(2 * rows))
+
+    def record(self, torrents: Iterable[dict], now: float) -> None:
+        """
+        Add one sample of a torrent list and forget torrents that are gone.
+
+        :param torrents: The full `torrents/info` list.
+        :param now: Time of the sample.
+        """
+        with self._lock:
+            self._advance(now)
+            present = set()
+            for torrent in torrents:
+                torrent_hash = torrent.get("hash")
+                uploaded = max(int(torrent.get("uploaded", 0)), 0)
+                present.add(torrent_hash)
+                slot = self.slots.get(torrent_hash)
+                if slot is None:
+                    # The first sample has no delta; it only sets the baseline.
+                    self._allocate(torrent_hash, uploaded, now)
+                    continue
+                index = slot * self.capacity + self.head
+                # Whole KiB since the last sample; the remainder carries over. A counter that went
+                # backwards (e.g. re-added torrent) starts a new baseline.
+                delta = max(uploaded // 1024 - self.last_uploaded[slot] // 1024, 0)
+                self.uploads[index] = min(self.uploads[index] + delta, UINT32_MAX)
+                peers = min(int(torrent.get("num_leechs", 0)) + int(torrent.get("num_seeds", 0)), UINT16_MAX)
+                if peers > self.peers[index]:
+                    self.peers[index] = peers
+                self.last_uploaded[slot] = uploaded
+            for torrent_hash in [torrent_hash for torrent_hash in self.slots if torrent_hash not in present]:
+                self.free.append(self.slots.pop(torrent_hash))
+
+    def _window(self, torrent_hash: str, days: float, now: float):
+        # The slot's row offset and the positions of buckets overlapping the window, or None if
+        # the torrent has not been watched for the whole window.
+        slot = self.slots.get(torrent_hash)
+        since = now - days * SECONDS_PER_DAY
+        if slot is None or self.first_seen[slot] > since:
+            return None
+        positions = [position for position in range(self.capacity)
+                     if self.timestamps[position] and self.timestamps[position] + self.bucket_seconds > since]
+        return slot * self.capacity, positions
+
+    def uploaded(self, torrent_hash: str, days: float, now: float) -> Optional[int]:
+        """
+        Bytes uploaded over the last `days`. Buckets that only partly overlap the window count
+        in full, so the result errs on the side of activity.
+
+        :return: The bytes uploaded, or None if the torrent was not watched for the whole window.
+        """
+        with self._lock:
+            window = self._window(torrent_hash, days, now)
+            if window is None:
+                return None
+            start, positions = window
+            return sum(self.uploads[start + position] for position in positions) * 1024
+
+    def upload_rate(self, torrent_hash: str, days: float, now: float) -> Optional[float]:
+        """
+        Average upload rate over the last `days`.
+
+        :return: Bytes per second, or None if the torrent was not watched for the whole window.
+        """
+        uploaded = self.uploaded(torrent_hash, days, now)
+        return None if uploaded is None else uploaded / (days * SECONDS_PER_DAY)
+
+    def max_peers(self, torrent_hash: str, days: float, now: float) -> Optional[int]:
+        """
+        Most peers connected at once over the last `days`.
+
+        :return: The peer count, or None if the torrent was not watched for the whole window.
+        """
+        with self._lock:
+            window = self._window(torrent_hash, days, now)
+            if window is None:
+                return None
+            start, positions = window
+            return max((self.peers[start + position] for position in positions), default=0)
+
+    def save(self, path: str) -> None:
+        """
+        Write the history to a file: one JSON header line followed by the raw arrays.
+        """
+        with self._lock:
+            hashes = [None] * len(self.first_seen)
+            for torrent_hash, slot in self.slots.items():
+                hashes[slot] = torrent_hash
+            header = {
+                "version": FORMAT_VERSION,
+                "bucket_seconds": self.bucket_seconds,
+                "capacity": self.capacity,
+                "head": self.head,
+                "hashes": hashes,
+            }
+            temporary = f"{path}.tmp"
+            with open(temporary, "wb") as file:
+                file.write(json.dumps(header).encode() + b"\n")
+                for values in (self.timestamps, self.uploads, self.peers, self.last_uploaded, self.first_seen):
+                    values.tofile(file)
+            os.replace(temporary, path)
+
+    def load(self, path: str) -> bool:
+        """
+        Replace the history with one saved by `save`. A file written with other bucket settings
+        or by another version is ignored.
+
+        :return: True if the file was loaded.
+        """
+        try:
+            with open(path, "rb") as file:
+                header = json.loads(file.readline())
+                if (header.get("version") != FORMAT_VERSION or header["bucket_seconds"] != self.bucket_seconds
+                        or header["capacity"] != self.capacity):
+                    logger.warning("Ignoring activity history %s written with other settings.", path)
+                    return False
+                rows = len(header["hashes"])
+                arrays = [array("d"), array("I"), array("H"), array("Q"), array("d")]
+                for values, count in zip(arrays, (self.capacity, rows * self.capacity, rows * self.capacity, rows, rows)):
+                    values.fromfile(file, count)
+        except (OSError, ValueError, KeyError, EOFError) as e:
+            logger.warning("Cannot load activity history %s: %s", path, e)
+            return False
+        with self._lock:
+            self.timestamps, self.uploads, self.peers, self.last_uploaded, self.first_seen = arrays
+            self.head = header["head"]
+            self.slots = {torrent_hash: slot for slot, torrent_hash in enumerate(header["hashes"]) if torrent_hash}
+            self.free = [slot for slot, torrent_hash in enumerate(header["hashes"]) if not torrent_hash]
+        logger.info("Loaded activity history of %d torrent(s) from %s.", len(self.slots), path)
+        return True
@@ -1,24 +1,73 @@
 # base_service.py
 from abc import ABC, abstractmethod
 import logging
-import schedule
+import os
 import threading
 import time
-from typing import Callable, Any, List
-from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, replace
+from typing import Callable, Any, Dict, List, Optional
+from concurrent.futures import Future, wait as wait_futures
+
+from src.services.runtime import RuntimeContext, get_runtime
+from src.utils.memory import check_rss_ceiling, release_memory
+from src.utils.metrics import record_job
+from src.utils.tracing import traced_run
+from src.services.scheduler import ScheduledJob, default_scheduler, DEFAULT_DEADLINE_SECONDS, DEFAULT_MISFIRE_POLICY
 
 logger = logging.getLogger(__name__)
 
+OVERLAP_COALESCE = "coalesce"
+OVERLAP_SKIP = "skip"
+OVERLAP_QUEUE = "queue"
+OVERLAP_POLICIES = (OVERLAP_COALESCE, OVERLAP_SKIP, OVERLAP_QUEUE)
+
+
+@dataclass
+class JobState:
+    """
+    Execution state of one of a service's jobs.
+    """
+    name: str
+    running: bool = False
+    pending: int = 0
+    runs: int = 0
+    skipped: int = 0
+    last_started: Optional[float] = None
+    last_duration: Optional[float] = None
+    last_result: Optional[str] = None
+    last_error: Optional[str] = None
+
 
 class BaseService(ABC):
     """
     Abstract base class for service classes interacting with APIs.
     Forces subclasses to implement the register_schedule method.
     """
-    def __init__(self, max_workers: int = 5):
+    # Environment prefix for per-service settings, e.g. "QBIT" for QBIT_OVERLAP_POLICY.
+    env_prefix: str = None
+
+    def __init__(self, context: RuntimeContext = None, overlap_policy: str = None):
+        """
+        :param context: The runtime context to borrow the worker pool and API clients from;
+            defaults to the process-wide one.
+        :param overlap_policy: What to do when a job fires while its previous run is still going:
+            coalesce (run once more afterwards), skip, or queue (run every trigger in turn).
+            Defaults to <PREFIX>_OVERLAP_POLICY, then OVERLAP_POLICY, then coalesce.
+        :raises ValueError: If the overlap policy is unknown.
+        """
         self.schedule_job = None
-        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.scheduler = default_scheduler
+        self.context = context or get_runtime()
+        self.executor = self.context.executor
         self.active_futures: List[Future] = []
+        self.overlap_policy = (overlap_policy
+                               or (self.env_prefix and os.getenv(f"{self.env_prefix}_OVERLAP_POLICY"))
+                               or os.getenv("OVERLAP_POLICY", OVERLAP_COALESCE)).lower()
+        if self.overlap_policy not in OVERLAP_POLICIES:
+            raise ValueError(f"Unknown overlap policy '{self.overlap_policy}'. Use one of {OVERLAP_POLICIES}.")
+        self.job_states: Dict[str, JobState] = {}
+        self._state_lock = threading.Lock()
+        self._closed = False
 
 
     @abstractmethod
@@ -29,38 +78,124 @@ class BaseService(ABC):
         """
         pass
 
-    def run_threaded(self, job_func: Callable[..., Any], *args: Any, **kwargs: Any) -> None:
+    def run_threaded(self, job_func: Callable[..., Any], *args: Any, **kwargs: Any) -> Optional[Future]:
         """
         Submits the job function to a thread pool for concurrent execution.
         Wraps the function to catch exceptions and log appropriately.
 
+        Runs of the same job never overlap: if the job is still running, the trigger is coalesced,
+        skipped or queued according to `overlap_policy`.
+
         :param job_func: A callable that represents the job to run.
         :param args: Positional arguments to pass to the job function.
         :param kwargs: Keyword arguments to pass to the job function.
+        :return: The Future of the submitted run, or None if the trigger was deferred or dropped.
         """
-
+        job_name = job_func.__name__
+        with self._state_lock:
+            state = self.job_states.setdefault(job_name, JobState(job_name))
+            if state.running:
+                if self.overlap_policy == OVERLAP_SKIP:
+                    state.skipped += 1
+                    logger.warning("Job '%s' of %s is still running; skipping this run.",
+                                   job_name, self.__class__.__name__)
+                elif self.overlap_policy == OVERLAP_QUEUE:
+                    state.pending += 1
+                    logger.info("Job '%s' of %s is still running; queued (%d pending).",
+                                job_name, self.__class__.__name__, state.pending)
+                else:
+                    state.pending = 1
+                    logger.info("Job '%s' of %s is still running; it will run once more when it finishes.",
+                                job_name, self.__class__.__name__)
+                return None
+            state.running = True
+        return self._submit(state, job_func, args, kwargs)
+
+    def _submit(self, state: JobState, job_func: Callable[..., Any], args: tuple, kwargs: dict) -> Optional[Future]:
         def wrapper() -> None:
             start_time = time.time()
             job_name = job_func.__name__
             thread_name = f"{job_name}-thread-{int(start_time)}"
             logger.info("Starting job '%s' on thread '%s'", job_name, thread_name)
+            with self._state_lock:
+                state.last_started = start_time
+            result, error = "success", None
             try:
-                job_func(*args, **kwargs)
+                traced_run(self.__class__.__name__, job_func, *args, **kwargs)
                 elapsed = time.time() - start_time
                 logger.info("Finished job '%s' on thread '%s' in %.2f seconds", job_name, thread_name, elapsed)
             except Exception as e:
+                result, error = "error", str(e)
                 logger.exception("Exception occurred in job '%s' on thread '%s': %s", job_name, thread_name, e)
+            finally:
+                elapsed = time.time() - start_time
+                # Auxiliary jobs (e.g. free-space checks) are recorded apart from the service's main job.
+                service = self.__class__.__name__ if job_name == "run_job" else f"{self.__class__.__name__}.{job_name}"
+                record_job(service, elapsed, result)
+                with self._state_lock:
+                    state.runs += 1
+                    state.last_duration = elapsed
+                    state.last_result = result
+                    state.last_error = error
+                    rerun = state.pending > 0
+                    if rerun:
+                        state.pending -= 1
+                    else:
+                        state.running = False
+                # Hand this cycle's payloads back before the process idles until the next one.
+                release_memory()
+                if check_rss_ceiling():
+                    self.scheduler.stop()
+                if rerun:
+                    self._submit(state, job_func, args, kwargs)
+
+        with self._state_lock:
+            try:
+                if self._closed:
+                    raise RuntimeError("service is shut down")
+                future: Future = self.executor.submit(wrapper)
+            except RuntimeError:
+                # The service or the shared pool was shut down; there is nothing left to run the job on.
+                state.running = False
+                state.pending = 0
+                return None
+            self.active_futures.append(future)
+        future.add_done_callback(self._prune_future)
+        return future
+
+    def _prune_future(self, future: Future) -> None:
+        with self._state_lock:
+            if future in self.active_futures:
+                self.active_futures.remove(future)
+
+    def get_job_state(self, job_name: str = "run_job") -> Optional[JobState]:
+        """
+        Return a snapshot of a job's execution state (running, last duration, last result, ...).
 
-        future: Future = self.executor.submit(wrapper)
-        self.active_futures.append(future)
-
-    def register_schedule(self, run_time: str = None, interval_minutes: int = None) -> None:
+        :param job_name: The job function's name; the scheduled job is `run_job`.
+        :return: A copy of the JobState, or None if the job never ran.
+        """
+        with self._state_lock:
+            state = self.job_states.get(job_name)
+            return replace(state) if state else None
+
+    def register_schedule(
+        self,
+        run_time: str = None,
+        interval_minutes: int = None,
+        jitter_seconds: float = 0,
+        deadline_seconds: float = DEFAULT_DEADLINE_SECONDS,
+        misfire_policy: str = DEFAULT_MISFIRE_POLICY,
+    ) -> None:
         """
         Registers the service's job on a schedule, using either a fixed daily time or a periodic interval.
         Either `run_time` or `interval_minutes` must be provided (not both).
 
         :param run_time: Time string in HH:MM (24-hour) format for daily scheduling.
         :param interval_minutes: Interval in minutes between runs.
+        :param jitter_seconds: Maximum random delay added to each start, to spread services apart.
+        :param deadline_seconds: How late a run may start before the misfire policy applies.
+        :param misfire_policy: What to do with runs missed after a long pause: skip, run_once or catch_up.
         :raises ValueError: If both parameters are provided.
         """
         if run_time and interval_minutes:
@@ -68,22 +203,26 @@ class BaseService(ABC):
 
         if interval_minutes:
             logger.info("Registering %s to run every %d minutes.", self.__class__.__name__, interval_minutes)
-            job = schedule.every(interval_minutes).minutes.do(self.run_threaded, self.run_job)
-            self.schedule_job = job
         elif run_time:
             logger.info("Registering %s to run daily at %s.", self.__class__.__name__, run_time)
-            job = schedule.every().day.at(run_time).do(self.run_threaded, self.run_job)
-            self.schedule_job = job
         else:
             # Optionally provide a default schedule if none is provided.
-            default_run_time = "02:00"
+            run_time = "02:00"
             logger.info("No scheduling configuration provided. Defaulting %s to daily at %s.",
-                        self.__class__.__name__, default_run_time)
-            job = schedule.every().day.at(default_run_time).do(self.run_threaded, self.run_job)
-            self.schedule_job = job
-
-        if self.schedule_job and hasattr(self.schedule_job, 'next_run'):
-            logger.info("Next scheduled run for %s at: %s", self.__class__.__name__, self.schedule_job.next_run)
+                        self.__class__.__name__, run_time)
+
+        job = ScheduledJob(
+            self.__class__.__name__,
+            self.run_threaded,
+            self.run_job,
+            interval_minutes=interval_minutes,
+            run_time=run_time,
+            jitter_seconds=jitter_seconds,
+            deadline_seconds=deadline_seconds,
+            misfire_policy=misfire_policy,
+        )
+        self.schedule_job = self.scheduler.add_job(job)
+        logger.info("Next scheduled run for %s at: %s", self.__class__.__name__, self.schedule_job.next_run)
 
     def unregister_schedule(self) -> None:
         """
@@ -91,18 +230,23 @@ class BaseService(ABC):
         Useful for dynamically stopping a service.
         """
         if self.schedule_job:
-            schedule.cancel_job(self.schedule_job)
+            self.scheduler.cancel_job(self.schedule_job)
             logger.info("Unregistered scheduled job for %s.", self.__class__.__name__)
             self.schedule_job = None
 
     def shutdown(self, wait: bool = True) -> None:
         """
-        Gracefully shutdown the executor and cancel any pending scheduled jobs.
+        Gracefully stop the service and cancel any pending scheduled jobs.
+        The shared worker pool is left running for the other services.
 
         :param wait: Whether to wait for currently running jobs to finish.
         """
         logger.info("Shutting down service %s.", self.__class__.__name__)
         if self.schedule_job:
-            schedule.cancel_job(self.schedule_job)
+            self.scheduler.cancel_job(self.schedule_job)
             self.schedule_job = None
-        self.executor.shutdown(wait=wait)
\ No newline at end of file
+        with self._state_lock:
+            self._closed = True
+            futures = list(self.active_futures)
+        if wait:
+            wait_futures(futures)
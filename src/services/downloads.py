@@ -0,0 +1,90 @@
+# src/services/downloads.py
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from src.utils.metrics import CACHE_LOOKUPS
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 1000
+
+
+class DownloadIndex:
+    """
+    Maps torrent hashes to the Sonarr series or Radarr movies they were downloaded for, from the
+    `downloadId` of history records and queue items.
+
+    The first refresh reads the whole history; later ones only read `history/since` the newest
+    record seen, plus the queue, which only holds active downloads.
+    """
+
+    def __init__(self, api, id_field: str):
+        """
+        :param api: The SonarrAPI or RadarrAPI to read from.
+        :param id_field: The record field naming the item, "seriesId" or "movieId".
+        """
+        self.api = api
+        self.id_field = id_field
+        self.ids: Dict[str, int] = {}
+        self.since: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def _get(self, path: str, params: dict = None):
+        response = self.api._get(path, params=params)
+        if not response.ok:
+            logger.error(f"Failed to read {path} for the download index: {response.text}")
+            return None
+        return self.api._json(response)
+
+    def _pages(self, path: str, params: dict = None) -> Optional[List[dict]]:
+        records, page = [], 1
+        while True:
+            data = self._get(path, {**(params or {}), "page": page, "pageSize": PAGE_SIZE})
+            if data is None:
+                return None
+            records.extend(data.get("records", []))
+            if page * PAGE_SIZE >= data.get("totalRecords", 0):
+                return records
+            page += 1
+
+    def _add(self, records: Iterable[dict]) -> int:
+        added = 0
+        for record in records:
+            download_id, item_id = record.get("downloadId"), record.get(self.id_field)
+            if download_id and item_id:
+                added += self.ids.get(download_id.lower()) != item_id
+                self.ids[download_id.lower()] = item_id
+        return added
+
+    def refresh(self) -> int:
+        """
+        Read the history records since the last refresh (all of them the first time) and the queue.
+
+        :return: The number of hashes added or changed.
+        """
+        with self._lock:
+            if self.since is None:
+                history = self._pages("history", {"sortKey": "date", "sortDirection": "descending"})
+            else:
+                history = self._get("history/since", {"date": self.since})
+            queue = self._pages("queue")
+            added = self._add(history or []) + self._add(queue or [])
+            dates = [record["date"] for record in history or [] if record.get("date")]
+            if dates:
+                self.since = max([self.since or ""] + dates)
+            return added
+
+    def lookup(self, hashes: Iterable[str]) -> List[int]:
+        """
+        Return the ids of the series or movies the torrents belong to, and forget the torrents.
+
+        :param hashes: Hashes of deleted torrents.
+        :return: Sorted unique ids; torrents the index doesn't know are skipped.
+        """
+        with self._lock:
+            found = [self.ids.pop(torrent_hash.lower(), None) for torrent_hash in hashes]
+        known = [item_id for item_id in found if item_id is not None]
+        CACHE_LOOKUPS.inc(len(known), cache=f"downloads_{self.id_field}", result="hit")
+        CACHE_LOOKUPS.inc(len(found) - len(known), cache=f"downloads_{self.id_field}", result="miss")
+        return sorted(set(known))
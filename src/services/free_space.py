@@ -0,0 +1,95 @@
+# src/services/free_space.py
+import logging
+import os
+from functools import partial
+from typing import Callable, List, Optional
+
+from src.utils.metrics import FREE_SPACE
+
+logger = logging.getLogger(__name__)
+
+GIB = 1024 ** 3
+
+SPACE_LOW = "low"
+SPACE_NORMAL = "normal"
+SPACE_HIGH = "high"
+
+DEFAULT_CHECK_MINUTES = 5
+DEFAULT_COOLDOWN_MINUTES = 30
+DEFAULT_STRETCH = 4
+
+
+def statvfs_free_space(paths: List[str]) -> Optional[int]:
+    """
+    Return the smallest free space (available to unprivileged users) among the given paths.
+
+    :return: Free space in bytes, or None if none of the paths could be checked.
+    """
+    free = []
+    for path in paths:
+        try:
+            stats = os.statvfs(path)
+        except OSError as e:
+            logger.warning("Cannot check free space of %s: %s", path, e)
+            continue
+        free.append(stats.f_bavail * stats.f_frsize)
+    return min(free) if free else None
+
+
+class FreeSpaceMonitor:
+    """
+    Classifies the free space of the download disk against a low and an optional high watermark.
+    """
+
+    def __init__(self, read_free_space: Callable[[], Optional[int]], low_bytes: int, high_bytes: int = None):
+        """
+        :param read_free_space: Returns the current free space in bytes, or None if unknown.
+        :param low_bytes: Below this, cleanup should run right away.
+        :param high_bytes: Above this, cleanup can run less often; None disables stretching.
+        :raises ValueError: If the high watermark is not above the low one.
+        """
+        if high_bytes is not None and high_bytes <= low_bytes:
+            raise ValueError("The high free-space watermark must be above the low one.")
+        self.read_free_space = read_free_space
+        self.low_bytes = low_bytes
+        self.high_bytes = high_bytes
+
+    @classmethod
+    def from_env(cls, api=None) -> Optional["FreeSpaceMonitor"]:
+        """
+        Create a monitor from QBIT_FREE_SPACE_LOW_GB and QBIT_FREE_SPACE_HIGH_GB.
+
+        Free space is read with os.statvfs from QBIT_DOWNLOAD_PATHS (separated by commas) if set,
+        otherwise from qBittorrent's sync data through `api`.
+
+        :param api: The QbitAPI to fall back to.
+        :return: The monitor, or None if no low watermark is configured.
+        """
+        low = os.getenv("QBIT_FREE_SPACE_LOW_GB")
+        if not low:
+            return None
+        high = os.getenv("QBIT_FREE_SPACE_HIGH_GB")
+        paths = [path.strip() for path in os.getenv("QBIT_DOWNLOAD_PATHS", "").split(",") if path.strip()]
+        if paths:
+            read_free_space = partial(statvfs_free_space, paths)
+        elif api is not None:
+            read_free_space = api.get_free_space
+        else:
+            raise ValueError("QBIT_FREE_SPACE_LOW_GB needs QBIT_DOWNLOAD_PATHS or a qBittorrent connection.")
+        return cls(read_free_space, int(float(low) * GIB), int(float(high) * GIB) if high else None)
+
+    def check(self) -> Optional[str]:
+        """
+        Read the free space and classify it.
+
+        :return: "low", "normal" or "high", or None if the free space is unknown.
+        """
+        free = self.read_free_space()
+        if free is None:
+            return None
+        FREE_SPACE.set(free)
+        if free < self.low_bytes:
+            return SPACE_LOW
+        if self.high_bytes is not None and free > self.high_bytes:
+            return SPACE_HIGH
+        return SPACE_NORMAL
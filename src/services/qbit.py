@@ -5,14 +5,36 @@ import time
 from typing import Dict, Any
 from dotenv import load_dotenv
 
-from src.api import QbitAPI
+from src.services.activity import ActivityHistory
 from src.services.base_service import BaseService
-from src.utils import print_torrent_details
-from src.utils.logger import setup_logger
+from src.services.downloads import DownloadIndex
+from src.services.rules import PROTECTED_CATEGORIES, SECONDS_PER_DAY, is_protected, torrent_ages
+from src.services.runtime import RuntimeContext, enabled_services
+from src.services.free_space import (
+    FreeSpaceMonitor, SPACE_HIGH, SPACE_LOW, DEFAULT_CHECK_MINUTES, DEFAULT_COOLDOWN_MINUTES, DEFAULT_STRETCH,
+)
+from src.services.scheduler import ScheduledJob, MISFIRE_SKIP, schedule_options
+from src.services.trackers import TrackerIndex, TRACKER_UNREGISTERED, TRACKER_DEAD
+from src.storage import SnapshotRecorder, SnapshotStore
+from src.utils import print_torrent_details, log_torrent_table, readable_size
+from src.utils.logger import drain_logging, setup_logger
+from src.utils.metrics import TORRENTS_EVALUATED, TORRENTS_DELETED
+from src.utils.tracing import span
 
-SECONDS_PER_DAY = 86400
 AGE_THRESHOLD_DAYS = int(os.environ.get("QBIT_TORRENT_AGE_THRESHOLD_DAYS", 16))
 LAST_ACTIVITY_THRESHOLD_DAYS = int(os.environ.get("QBIT_TORRENT_LAST_ACTIVITY_THRESHOLD_DAYS", 7))
+DELETE_UNREGISTERED = os.environ.get("QBIT_DELETE_UNREGISTERED", "false").lower() in ("1", "true", "yes")
+DELETE_DEAD_TRACKERS = os.environ.get("QBIT_DELETE_DEAD_TRACKERS", "false").lower() in ("1", "true", "yes")
+RESCAN_AFTER_DELETE = os.environ.get("QBIT_RESCAN_AFTER_DELETE", "true").lower() in ("1", "true", "yes")
+# name -> (record field, rescan command method) of the services told about deleted downloads.
+RESCAN_TARGETS = {
+    "sonarr": ("seriesId", "rescan_series_command"),
+    "radarr": ("movieId", "rescan_movie_command"),
+}
+# With a recorded history, a torrent counts as inactive once its average upload over the last
+# QBIT_IDLE_DAYS stays at or below QBIT_IDLE_MAX_UPLOAD_KIBPS, whatever its last_activity says.
+IDLE_DAYS = float(os.environ.get("QBIT_IDLE_DAYS") or 0)
+IDLE_MAX_UPLOAD_KIBPS = float(os.environ.get("QBIT_IDLE_MAX_UPLOAD_KIBPS", 0))
 
 logger = setup_logger(__name__, service_name="qBit", color="cyan")
 
@@ -20,38 +42,64 @@ class QbitService(BaseService):
     """
     A service class that encapsulates the qBittorrent cleanup logic.
     """
+    env_prefix = "QBIT"
 
-    def __init__(self) -> None:
+    def __init__(self, context: RuntimeContext = None) -> None:
         """
-        Initialize the QbitService with a QbitAPI instance and sleep interval.
+        Initialize the QbitService with the shared QbitAPI instance.
+
+        :param context: The runtime context to borrow the worker pool and API client from.
         """
-        super().__init__()
-        self.api = QbitAPI()
+        super().__init__(context=context)
+        self.api = self.context.client("qbit")
+        self.snapshot = SnapshotStore.from_env()
+        # Tracker health is only fetched when a deletion criterion needs it.
+        self.trackers = TrackerIndex(self.api) if DELETE_UNREGISTERED or DELETE_DEAD_TRACKERS else None
+        self.free_space = FreeSpaceMonitor.from_env(self.api)
+        self.history = ActivityHistory.from_env()
+        self.recorder = SnapshotRecorder.from_env()
+        self.download_indexes: Dict[str, DownloadIndex] = {}
+        self.free_space_job = None
+        self._base_interval_minutes = None
+        self._last_space_trigger = None
 
 
     @staticmethod
-    def is_ready_for_delete(torrent: Dict[str, Any], current_time: float) -> bool:
+    def is_ready_for_delete(torrent: Dict[str, Any], current_time: float, tracker_status: str = None,
+                            history: ActivityHistory = None) -> bool:
         """
         Check if a torrent is ready for deletion based on its added time, last activity, popularity,
-        and category.
+        category and, if enabled, its tracker health.
 
         :param torrent: Dictionary representing torrent data.
         :param current_time: The current time (as a Unix timestamp).
+        :param tracker_status: The torrent's tracker health from the TrackerIndex, if known.
+        :param history: Recorded activity; once it covers QBIT_IDLE_DAYS for the torrent, its upload
+            rate decides whether the torrent is inactive instead of `last_activity`.
         :return: True if the torrent meets the criteria for deletion.
         """
-        added_age = current_time - torrent.get("added_on", 0)
-        last_activity_age = current_time - torrent.get("last_activity", 0)
-        is_audiobook = torrent.get("category") == "audiobooks"
-        is_ebook = torrent.get("category") == "ebooks"
-        return (added_age > AGE_THRESHOLD_DAYS * SECONDS_PER_DAY and
-                last_activity_age > LAST_ACTIVITY_THRESHOLD_DAYS * SECONDS_PER_DAY and not is_audiobook and not is_ebook)
+        if is_protected(torrent):
+            return False
+        age_days, idle_days = torrent_ages(torrent, current_time)
+        upload_rate = history.upload_rate(torrent.get("hash"), IDLE_DAYS, current_time) if history and IDLE_DAYS else None
+        if upload_rate is not None:
+            inactive = upload_rate <= IDLE_MAX_UPLOAD_KIBPS * 1024
+        else:
+            inactive = idle_days > LAST_ACTIVITY_THRESHOLD_DAYS
+        if DELETE_UNREGISTERED and tracker_status == TRACKER_UNREGISTERED:
+            return True
+        # A tracker can be down for a while, so dead trackers only count for inactive torrents.
+        if DELETE_DEAD_TRACKERS and tracker_status == TRACKER_DEAD and inactive:
+            return True
+        return age_days > AGE_THRESHOLD_DAYS and inactive
 
 
     def start(self, interactive: bool = True) -> None:
         """
         Execute the qBittorrent cleanup process once.
         This method logs in, retrieves the torrent list, filters torrents based on criteria,
-        and then deletes the eligible torrents.
+        and then deletes the eligible torrents. With a recent snapshot, only the torrents it lists
+        as old enough are retrieved first, and the snapshot is reconciled after the deletions.
 
         :param interactive: If True, prompts the user; otherwise auto-deletes.
         """
@@ -59,69 +107,223 @@ class QbitService(BaseService):
             logger.info("qBit login failed.")
             return
 
-        torrents = self.api.list_torrents()
-        if not torrents:
-            logger.info("No qBit torrents found.")
-            return
-
         current_time = time.time()
-        filtered_torrents = [torrent for torrent in torrents if self.is_ready_for_delete(torrent, current_time)]
+        warm = self.can_start_warm(current_time)
+        if warm:
+            with span("snapshot"):
+                candidates = self.snapshot.torrents_older_than(AGE_THRESHOLD_DAYS, PROTECTED_CATEGORIES, current_time)
+            # Current state of only the torrents old enough to delete; the full list is reconciled afterwards.
+            torrents = self.api.list_torrents(hashes=[row["hash"] for row in candidates]) if candidates else []
+            logger.info(f"[qBit] Checking {len(torrents)} torrent(s) past the age threshold from the snapshot.")
+        else:
+            torrents = self.api.list_torrents()
+            if not torrents:
+                logger.info("No qBit torrents found.")
+                return
+            if self.snapshot:
+                with span("snapshot upsert"):
+                    self.snapshot.upsert_torrents(torrents)
+
+        if self.recorder:
+            with span("record"):
+                self.recorder.record(torrents, current_time)
+        if self.history is not None:
+            with span("history"):
+                self.history.record(torrents, current_time)
+        if self.trackers:
+            self.trackers.refresh([torrent for torrent in torrents if not is_protected(torrent)], current_time)
+            tracker_status = self.trackers.status
+        else:
+            tracker_status = lambda torrent_hash: None
+        with span("filter"):
+            filtered_torrents = [torrent for torrent in torrents
+                                 if self.is_ready_for_delete(torrent, current_time, tracker_status(torrent.get("hash")),
+                                                         self.history)]
+        TORRENTS_EVALUATED.inc(len(torrents))
         logger.info(f"[qBit] Found {len(filtered_torrents)} torrent(s) ready for deletion.")
 
+        if not interactive:
+            with span("log details"):
+                log_torrent_table(filtered_torrents, logger)
+
         delete_all = False
+        deleted = []
         for torrent in filtered_torrents:
-            print_torrent_details(torrent)
+            if interactive:
+                with span("log details"):
+                    print_torrent_details(torrent)
             name = torrent.get('name', 'N/A')
             torrent_hash = torrent.get('hash')
 
             if delete_all or not interactive:
                 logger.info(f"[qBit] Auto-deleting: {name}")
-                self.api.delete_torrent(name, torrent_hash, delete_files=True)
+                with span("delete"):
+                    if self.api.delete_torrent(name, torrent_hash, delete_files=True):
+                        deleted.append(torrent_hash)
                 continue
 
-            # Interactive prompt
+            # Interactive prompt, once the torrent's details are on screen.
+            drain_logging()
             answer = input(f"Delete torrent {name}? (yes/no/deleteall/exit): ").strip().lower()
             if answer == "deleteall":
                 delete_all = True
                 logger.info(f"[qBit] Deleting {name} and all following automatically.")
-                self.api.delete_torrent(name, torrent_hash, delete_files=True)
+                if self.api.delete_torrent(name, torrent_hash, delete_files=True):
+                    deleted.append(torrent_hash)
             elif answer in ("yes", "y"):
                 logger.info(f"[qBit] Deleting {name}.")
-                self.api.delete_torrent(name, torrent_hash, delete_files=True)
+                if self.api.delete_torrent(name, torrent_hash, delete_files=True):
+                    deleted.append(torrent_hash)
             elif answer in ("no", "n"):
                 logger.info(f"[qBit] Skipping {name}.")
             elif answer == "exit":
                 logger.info("[qBit] Exiting cleanup loop.")
                 break
 
-    @staticmethod
-    def qbit_scheduled_cleanup():
+        TORRENTS_DELETED.inc(len(deleted))
+        if self.snapshot and deleted:
+            self.snapshot.remove_torrents(deleted)
+        if warm:
+            self.reconcile_snapshot()
+        history_path = os.getenv("QBIT_HISTORY_PATH")
+        if self.history is not None and history_path:
+            self.history.save(history_path)
+        if deleted and RESCAN_AFTER_DELETE:
+            with span("rescan"):
+                self.rescan_deleted(deleted)
+
+    def can_start_warm(self, current_time: float) -> bool:
+        """
+        Return True if the deletion candidates can be taken from the snapshot instead of the full
+        torrent list. That holds for the age rule alone, while every torrent missing from the snapshot
+        is too young to qualify, i.e. the snapshot was reconciled within QBIT_TORRENT_AGE_THRESHOLD_DAYS.
+        Tracker checks, the activity history and recordings need the full list.
         """
-        Schedule the qBittorrent cleanup process to run based on environment variables.
+        if not self.snapshot or self.trackers or self.history is not None or self.recorder:
+            return False
+        reconciled_at = self.snapshot.reconciled_at("torrents")
+        return reconciled_at is not None and current_time - reconciled_at < AGE_THRESHOLD_DAYS * SECONDS_PER_DAY
+
+    def reconcile_snapshot(self) -> None:
+        """
+        Bring the torrent snapshot up to date with the full torrent list after a warm start.
+        """
+        with span("snapshot reconcile"):
+            torrents = self.api.list_torrents()
+            # An empty list means the request failed; the snapshot is kept and goes cold once too old.
+            if torrents:
+                changed = self.snapshot.upsert_torrents(torrents)
+                logger.info(f"[qBit] Reconciled the snapshot with {len(torrents)} torrent(s); {len(changed)} changed.")
+
+    def rescan_deleted(self, hashes: list) -> None:
+        """
+        Ask Sonarr and Radarr, where configured, to rescan only the series and movies whose
+        downloads were just deleted, so they notice the missing files without a full library scan.
+        An unreachable service is logged and skipped; the deletions already happened.
+
+        :param hashes: Hashes of the deleted torrents.
+        """
+        for name in enabled_services():
+            if name not in RESCAN_TARGETS:
+                continue
+            id_field, command = RESCAN_TARGETS[name]
+            try:
+                api = self.context.client(name)
+                index = self.download_indexes.get(name)
+                if index is None:
+                    index = self.download_indexes[name] = DownloadIndex(api, id_field)
+                index.refresh()
+                item_ids = index.lookup(hashes)
+                for item_id in item_ids:
+                    getattr(api, command)(item_id)
+            except Exception as e:
+                logger.error(f"[qBit] Failed to request {name} rescans: {e}")
+                continue
+            logger.info(f"[qBit] Requested {name} rescans for {len(item_ids)} item(s) of {len(hashes)} deleted torrent(s).")
+
+    def qbit_scheduled_cleanup(self):
+        """
+        Schedule this service's qBittorrent cleanup process to run based on environment variables.
         """
         qbit_interval = os.getenv("QBIT_INTERVAL_MINUTES")
         qbit_run_time = os.getenv("QBIT_RUN_TIME")
         if qbit_interval and qbit_run_time:
             logger.error("Both QBIT_INTERVAL_MINUTES and QBIT_RUN_TIME are defined. Please set only one.")
             exit(1)
-        qbit_service = QbitService()
+        options = schedule_options("QBIT")
         if qbit_interval:
             try:
                 interval = int(qbit_interval)
             except ValueError:
                 logger.error("QBIT_INTERVAL_MINUTES must be an integer.")
                 exit(1)
-            qbit_service.register_schedule(interval_minutes=interval)
+            self.register_schedule(interval_minutes=interval, **options)
             next_run_time = time.strftime("%H:%M", time.localtime(time.time() + (interval * 60)))
             logger.info("Registered qBit cleanup to run every %d minutes, starting at %s", interval, next_run_time)
 
         elif qbit_run_time:
-            qbit_service.register_schedule(run_time=qbit_run_time)
+            self.register_schedule(run_time=qbit_run_time, **options)
             logger.info("Registered qBit cleanup at %s", qbit_run_time)
         else:
             # Default schedule if nothing is provided
-            qbit_service.register_schedule(run_time="02:00")
+            self.register_schedule(run_time="02:00", **options)
             logger.info("No QBIT schedule config found. Defaulting to daily at 02:00")
+        self.register_free_space_trigger()
+
+    def register_free_space_trigger(self) -> None:
+        """
+        If free-space watermarks are configured, check the free space every QBIT_FREE_SPACE_CHECK_MINUTES:
+        run the cleanup right away below the low watermark, and stretch the cleanup interval by
+        QBIT_INTERVAL_STRETCH while there is more free space than the high watermark.
+        """
+        if not self.free_space or not self.schedule_job:
+            return
+        check_minutes = float(os.getenv("QBIT_FREE_SPACE_CHECK_MINUTES", DEFAULT_CHECK_MINUTES))
+        job = ScheduledJob(
+            f"{self.__class__.__name__}.free_space",
+            self.run_threaded,
+            self.check_free_space,
+            interval_minutes=check_minutes,
+            misfire_policy=MISFIRE_SKIP,
+        )
+        self.free_space_job = self.scheduler.add_job(job)
+        logger.info("Checking free space every %g minutes (low watermark %s).",
+                    check_minutes, readable_size(self.free_space.low_bytes))
+
+    def check_free_space(self) -> None:
+        """
+        Trigger the cleanup early on low free space, and adapt the cleanup interval to the headroom.
+        """
+        state = self.free_space.check()
+        job = self.schedule_job
+        if state is None or job is None:
+            return
+
+        if state == SPACE_LOW:
+            cooldown = float(os.getenv("QBIT_FREE_SPACE_COOLDOWN_MINUTES", DEFAULT_COOLDOWN_MINUTES)) * 60
+            now = time.monotonic()
+            # Trigger once when crossing the watermark, then at most once per cooldown while it stays low.
+            if self._last_space_trigger is None or now - self._last_space_trigger >= cooldown:
+                self._last_space_trigger = now
+                logger.warning("[qBit] Free space is below the low watermark; running cleanup now.")
+                self.scheduler.trigger(job.name)
+        else:
+            self._last_space_trigger = None
+
+        if job.interval:
+            if self._base_interval_minutes is None:
+                self._base_interval_minutes = job.interval.total_seconds() / 60
+            stretch = float(os.getenv("QBIT_INTERVAL_STRETCH", DEFAULT_STRETCH)) if state == SPACE_HIGH else 1
+            interval = self._base_interval_minutes * stretch
+            if job.interval.total_seconds() / 60 != interval:
+                logger.info("[qBit] Free space is %s; cleanup now runs every %g minutes.", state, interval)
+                self.scheduler.set_interval(job, interval)
+
+    def shutdown(self, wait: bool = True) -> None:
+        if self.free_space_job:
+            self.scheduler.cancel_job(self.free_space_job)
+            self.free_space_job = None
+        super().shutdown(wait=wait)
 
 
     def run_job(self, *args, **kwargs):
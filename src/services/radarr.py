@@ -1,30 +1,52 @@
-from src.api import RadarrAPI
 from src.services.base_service import BaseService
+from src.services.runtime import RuntimeContext
+from src.storage import SnapshotStore
 from src.utils import logger
 from dotenv import load_dotenv
+import os
 import time
 
+LARGE_MOVIE_GB = float(os.environ.get("RADARR_LARGE_MOVIE_GB", 2.0))
+
 
 class RadarrService(BaseService):
     """
     A service class that encapsulates the Radarr cleanup logic.
     """
+    env_prefix = "RADARR"
+
 
-    def __init__(self, sleep_interval: int = 40):
-        super().__init__()
-        self.sonarr = RadarrAPI()
+    def __init__(self, sleep_interval: int = 40, context: RuntimeContext = None):
+        super().__init__(context=context)
+        self.radarr = self.context.client("radarr")
         self.sleep_interval = sleep_interval
+        self.snapshot = SnapshotStore.from_env()
 
 
     def start(self) -> None:
         """
         Main method to run the Radarr cleanup process.
-        Iterates over the series and seasons, then issues rename commands when appropriate.
+        Reports the movies larger than RADARR_LARGE_MOVIE_GB. With a snapshot, the movies of the last
+        run are reported right away, then the snapshot is reconciled with Radarr's movie list.
         """
-        pass
+        min_bytes = LARGE_MOVIE_GB * (1024 ** 3)
+        if self.snapshot:
+            stored = self.snapshot.movies_larger_than(min_bytes)
+            logger.info("Snapshot lists %d movies larger than %.2f GB.", len(stored), LARGE_MOVIE_GB)
+        movies = self.radarr.get_all_movies()
+        if not movies:
+            logger.info("No Radarr movies found.")
+            return
+        if self.snapshot:
+            changed = self.snapshot.upsert_movies(movies)
+            logger.info("Reconciled the snapshot with %d movies; %d changed.", len(movies), len(changed))
+            large_movies = self.snapshot.movies_larger_than(min_bytes)
+        else:
+            large_movies = [movie for movie in movies if movie.get("sizeOnDisk", 0) > min_bytes]
+        logger.info("Found %d movies larger than %.2f GB", len(large_movies), LARGE_MOVIE_GB)
 
     def run_job(self, *args, **kwargs):
-        pass
+        self.start()
 
     # Example usage:
 if __name__ == "__main__":
@@ -0,0 +1,25 @@
+# src/services/rules.py
+from typing import Tuple
+
+SECONDS_PER_DAY = 86400
+# Categories the qBit cleanup never deletes.
+PROTECTED_CATEGORIES = ("audiobooks", "ebooks")
+
+
+def is_protected(torrent: dict) -> bool:
+    """
+    Return True if the torrent is in a category that is never deleted.
+    """
+    return torrent.get("category") in PROTECTED_CATEGORIES
+
+
+def torrent_ages(torrent: dict, current_time: float) -> Tuple[float, float]:
+    """
+    Return the days since a torrent was added and since its last activity, the values the
+    age/last-activity rule compares with QBIT_TORRENT_AGE_THRESHOLD_DAYS and
+    QBIT_TORRENT_LAST_ACTIVITY_THRESHOLD_DAYS. A torrent is past a threshold when it is above it.
+    """
+    return (
+        (current_time - (torrent.get("added_on") or 0)) / SECONDS_PER_DAY,
+        (current_time - (torrent.get("last_activity") or 0)) / SECONDS_PER_DAY,
+    )
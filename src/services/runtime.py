@@ -0,0 +1,138 @@
+# src/services/runtime.py
+import importlib
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List
+
+from src.utils.metrics import EXECUTOR_QUEUE_DEPTH
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_WORKERS = 8
+
+# name -> (module, class) for the API clients and services, imported on first use.
+CLIENTS = {
+    "qbit": ("src.api.qbit_api", "QbitAPI"),
+    "sonarr": ("src.api.sonarr_api", "SonarrAPI"),
+    "radarr": ("src.api.radarr_api", "RadarrAPI"),
+}
+SERVICES = {
+    "qbit": ("src.services.qbit", "QbitService"),
+    "sonarr": ("src.services.sonarr", "SonarrService"),
+    "radarr": ("src.services.radarr", "RadarrService"),
+}
+
+# name -> environment variables that must all be set for the service to be enabled.
+REQUIRED_ENV = {
+    "qbit": ("QBIT_BASE_URL", "QBIT_USERNAME", "QBIT_PASSWORD"),
+    "sonarr": ("SONARR_BASE_URL", "SONARR_API_KEY"),
+    "radarr": ("RADARR_BASE_URL", "RADARR_API_KEY"),
+}
+
+
+def enabled_services() -> List[str]:
+    """
+    Return the names of the services whose settings are present in the environment,
+    without importing any of them.
+    """
+    return [name for name, variables in REQUIRED_ENV.items() if all(os.getenv(variable) for variable in variables)]
+
+
+def _load(target: tuple):
+    module_name, class_name = target
+    return getattr(importlib.import_module(module_name), class_name)
+
+
+class RuntimeContext:
+    """
+    Process-wide resources shared by all services: one sized worker pool, one API client
+    (with its own connection pool) per configured instance, and one instance of each service.
+    """
+
+    def __init__(self, max_workers: int = None):
+        """
+        :param max_workers: Size of the shared worker pool; defaults to REFINEARR_MAX_WORKERS or 8.
+        """
+        self.max_workers = max_workers or int(os.getenv("REFINEARR_MAX_WORKERS", DEFAULT_MAX_WORKERS))
+        self._executor = None
+        self._clients: Dict[str, object] = {}
+        self._services: Dict[str, object] = {}
+        self._lock = threading.RLock()
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="refinearr")
+                executor = self._executor
+                EXECUTOR_QUEUE_DEPTH.set_function(lambda: executor._work_queue.qsize())
+            return self._executor
+
+    def client(self, name: str):
+        """
+        Return the shared API client for a service, creating it on first use.
+
+        :param name: One of "qbit", "sonarr" or "radarr".
+        """
+        with self._lock:
+            if name not in self._clients:
+                self._clients[name] = _load(CLIENTS[name])()
+            return self._clients[name]
+
+    def service(self, name: str):
+        """
+        Return the shared service instance, creating it on first use.
+
+        :param name: One of "qbit", "sonarr" or "radarr".
+        """
+        with self._lock:
+            if name not in self._services:
+                self._services[name] = _load(SERVICES[name])(context=self)
+            return self._services[name]
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Shut down the worker pool and close every client's connection pool.
+
+        :param wait: Whether to wait for currently running jobs to finish.
+        """
+        with self._lock:
+            services = list(self._services.values())
+            self._services.clear()
+        for service in services:
+            service.shutdown(wait=wait)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait)
+                self._executor = None
+            for client in self._clients.values():
+                client.session.close()
+            self._clients.clear()
+
+
+_runtime = None
+_runtime_lock = threading.Lock()
+
+
+def get_runtime() -> RuntimeContext:
+    """
+    Return the process-wide RuntimeContext.
+    """
+    global _runtime
+    with _runtime_lock:
+        if _runtime is None:
+            _runtime = RuntimeContext()
+        return _runtime
+
+
+def reset_runtime() -> None:
+    """
+    Shut down and forget the process-wide RuntimeContext, e.g. after the environment changed.
+    """
+    global _runtime
+    with _runtime_lock:
+        runtime, _runtime = _runtime, None
+    if runtime is not None:
+        runtime.shutdown(wait=True)
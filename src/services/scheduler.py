@@ -0,0 +1,262 @@
+# src/services/scheduler.py
+import logging
+import os
+import random
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MISFIRE_SKIP = "skip"
+MISFIRE_RUN_ONCE = "run_once"
+MISFIRE_CATCH_UP = "catch_up"
+MISFIRE_POLICIES = (MISFIRE_SKIP, MISFIRE_RUN_ONCE, MISFIRE_CATCH_UP)
+
+DEFAULT_DEADLINE_SECONDS = 300
+DEFAULT_MISFIRE_POLICY = MISFIRE_RUN_ONCE
+
+
+class ScheduledJob:
+    """
+    A job that runs either every `interval_minutes` or daily at `run_time`.
+
+    `due` is the nominal time of the next occurrence; `next_run` is when it actually starts,
+    which is `due` plus a random start jitter of up to `jitter_seconds`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        job_func: Callable[..., Any],
+        *args: Any,
+        interval_minutes: int = None,
+        run_time: str = None,
+        jitter_seconds: float = 0,
+        deadline_seconds: float = DEFAULT_DEADLINE_SECONDS,
+        misfire_policy: str = DEFAULT_MISFIRE_POLICY,
+        **kwargs: Any,
+    ):
+        """
+        :param name: Name used in logs and for `Scheduler.trigger`.
+        :param job_func: The callable to run when the job is due.
+        :param interval_minutes: Interval in minutes between runs.
+        :param run_time: Time string in HH:MM (24-hour) format for daily runs.
+        :param jitter_seconds: Maximum random delay added to every start.
+        :param deadline_seconds: How late a run may start before it counts as misfired; None never misfires.
+        :param misfire_policy: What to do with misfired runs: skip, run_once or catch_up.
+        :raises ValueError: If the schedule or misfire policy is invalid.
+        """
+        if bool(interval_minutes) == bool(run_time):
+            raise ValueError("Exactly one of 'run_time' or 'interval_minutes' must be provided.")
+        if misfire_policy not in MISFIRE_POLICIES:
+            raise ValueError(f"Unknown misfire policy '{misfire_policy}'. Use one of {MISFIRE_POLICIES}.")
+        self.name = name
+        self.job_func = job_func
+        self.args = args
+        self.kwargs = kwargs
+        self.interval = timedelta(minutes=interval_minutes) if interval_minutes else None
+        self.at = datetime.strptime(run_time, "%H:%M").time() if run_time else None
+        self.jitter_seconds = jitter_seconds
+        self.deadline_seconds = deadline_seconds
+        self.misfire_policy = misfire_policy
+        self.due: Optional[datetime] = None
+        self.next_run: Optional[datetime] = None
+        self.last_run: Optional[datetime] = None
+
+    def __repr__(self) -> str:
+        every = f"every {self.interval}" if self.interval else f"daily at {self.at.strftime('%H:%M')}"
+        return f"<ScheduledJob {self.name} {every}, next run {self.next_run}>"
+
+    def following(self, moment: datetime) -> datetime:
+        """
+        Return the first nominal occurrence strictly after `moment`.
+        """
+        if self.interval:
+            if self.due is None:
+                return moment + self.interval
+            missed = (moment - self.due) // self.interval + 1
+            return self.due + max(missed, 1) * self.interval
+        candidate = datetime.combine(moment.date(), self.at)
+        if candidate <= moment:
+            candidate += timedelta(days=1)
+        return candidate
+
+    def plan(self, due: datetime) -> None:
+        """
+        Set the next nominal occurrence and draw a start jitter for it.
+        """
+        self.due = due
+        jitter = random.uniform(0, self.jitter_seconds) if self.jitter_seconds else 0
+        self.next_run = due + timedelta(seconds=jitter)
+
+
+class Scheduler:
+    """
+    Runs scheduled jobs in the calling thread, sleeping exactly until the next job is due.
+
+    The sleep is interrupted immediately by `stop`, `trigger` or any change to the job list,
+    so shutdown signals and external triggers don't wait for a polling interval.
+    """
+
+    def __init__(self):
+        # An RLock keeps `stop`/`trigger` safe to call from signal handlers on the waiting thread.
+        self._condition = threading.Condition(threading.RLock())
+        self._jobs: List[ScheduledJob] = []
+        self._stopped = False
+
+    @property
+    def jobs(self) -> List[ScheduledJob]:
+        with self._condition:
+            return list(self._jobs)
+
+    def add_job(self, job: ScheduledJob) -> ScheduledJob:
+        """
+        Add a job and plan its first run.
+        """
+        with self._condition:
+            job.plan(job.following(datetime.now()))
+            self._jobs.append(job)
+            self._condition.notify_all()
+        return job
+
+    def cancel_job(self, job: ScheduledJob) -> None:
+        with self._condition:
+            if job in self._jobs:
+                self._jobs.remove(job)
+            self._condition.notify_all()
+
+    def trigger(self, name: str = None) -> int:
+        """
+        Make a job (or every job, if `name` is None) due right now and wake the loop.
+
+        :return: The number of jobs triggered.
+        """
+        now = datetime.now()
+        with self._condition:
+            triggered = [job for job in self._jobs if name is None or job.name == name]
+            for job in triggered:
+                job.next_run = now
+            self._condition.notify_all()
+        return len(triggered)
+
+    def set_interval(self, job: ScheduledJob, interval_minutes: float) -> None:
+        """
+        Change an interval job's interval. The next run moves to one new interval after the
+        previous occurrence, or to now if that already passed.
+
+        :raises ValueError: If the job runs at a fixed time of day.
+        """
+        with self._condition:
+            if not job.interval:
+                raise ValueError(f"Job '{job.name}' runs at a fixed time; it has no interval to change.")
+            interval = timedelta(minutes=interval_minutes)
+            if interval == job.interval:
+                return
+            previous = job.due - job.interval
+            job.interval = interval
+            job.plan(max(previous + interval, datetime.now()))
+            self._condition.notify_all()
+
+    def stop(self) -> None:
+        """
+        Stop `run_forever` as soon as possible.
+        """
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+
+    def seconds_until_next(self, now: datetime = None) -> Optional[float]:
+        """
+        Seconds until the earliest job is due (0 if one is overdue), or None without jobs.
+        """
+        now = now or datetime.now()
+        with self._condition:
+            if not self._jobs:
+                return None
+            next_run = min(job.next_run for job in self._jobs)
+        return max((next_run - now).total_seconds(), 0.0)
+
+    def run_pending(self, now: datetime = None) -> int:
+        """
+        Run every job that is due, applying each job's misfire policy to late runs.
+
+        :param now: The current time; defaults to datetime.now().
+        :return: The number of job runs started.
+        """
+        now = now or datetime.now()
+        with self._condition:
+            due_jobs = [job for job in self._jobs if job.next_run <= now]
+            runs = []
+            for job in due_jobs:
+                lateness = (now - job.next_run).total_seconds()
+                misfired = job.deadline_seconds is not None and lateness > job.deadline_seconds
+                if not misfired:
+                    # A run triggered ahead of time keeps the nominal occurrence it jumped ahead of.
+                    job.plan(job.due if job.due > now else job.following(now))
+                    runs.append(job)
+                elif job.misfire_policy == MISFIRE_SKIP:
+                    logger.warning("Skipping misfired run of '%s' due at %s (%.0f seconds late).",
+                                   job.name, job.due, lateness)
+                    job.plan(job.following(now))
+                elif job.misfire_policy == MISFIRE_RUN_ONCE:
+                    logger.warning("Running misfired job '%s' once (%.0f seconds late).", job.name, lateness)
+                    job.plan(job.following(now))
+                    runs.append(job)
+                else:
+                    # Advance one occurrence at a time; the following occurrences stay overdue
+                    # and are caught up by the next passes of the loop.
+                    logger.warning("Catching up misfired run of '%s' due at %s.", job.name, job.due)
+                    job.plan(job.due + job.interval if job.interval else job.due + timedelta(days=1))
+                    runs.append(job)
+
+        for job in runs:
+            job.last_run = now
+            try:
+                job.job_func(*job.args, **job.kwargs)
+            except Exception as e:
+                logger.exception("Exception occurred while starting job '%s': %s", job.name, e)
+        return len(runs)
+
+    def run_forever(self) -> None:
+        """
+        Run jobs until `stop` is called.
+        """
+        with self._condition:
+            self._stopped = False
+        while True:
+            with self._condition:
+                if self._stopped:
+                    break
+                timeout = self.seconds_until_next()
+                if timeout is None or timeout > 0:
+                    self._condition.wait(timeout)
+                if self._stopped:
+                    break
+            self.run_pending()
+        logger.info("Scheduler stopped.")
+
+
+def schedule_options(prefix: str) -> dict:
+    """
+    Read the jitter, deadline and misfire settings for a service from the environment.
+
+    `<PREFIX>_JITTER_SECONDS`, `<PREFIX>_DEADLINE_SECONDS` and `<PREFIX>_MISFIRE_POLICY` override the
+    global `SCHEDULER_JITTER_SECONDS`, `SCHEDULER_DEADLINE_SECONDS` and `SCHEDULER_MISFIRE_POLICY`.
+
+    :param prefix: The service's environment prefix, e.g. "QBIT".
+    :return: Keyword arguments for `BaseService.register_schedule`.
+    """
+    def setting(name: str, default):
+        return os.getenv(f"{prefix}_{name}") or os.getenv(f"SCHEDULER_{name}") or default
+
+    deadline = setting("DEADLINE_SECONDS", DEFAULT_DEADLINE_SECONDS)
+    return {
+        "jitter_seconds": float(setting("JITTER_SECONDS", 0)),
+        "deadline_seconds": None if str(deadline).lower() == "none" else float(deadline),
+        "misfire_policy": setting("MISFIRE_POLICY", DEFAULT_MISFIRE_POLICY).lower(),
+    }
+
+
+# The process-wide scheduler the services register with.
+default_scheduler = Scheduler()
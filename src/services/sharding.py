@@ -0,0 +1,125 @@
+# src/services/sharding.py
+import logging
+import os
+import threading
+import time
+from typing import Callable, Iterable, Any
+
+from src.storage import ShardLeaseStore
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHARD_COUNT = 16
+DEFAULT_SWEEP_WINDOW_MINUTES = 60
+# Shortest wait before claiming again while other replicas hold the remaining shards.
+MIN_POLL_SECONDS = 0.1
+
+
+def shard_of(item_id: int, shard_count: int) -> int:
+    """
+    Return the shard a series or movie id belongs to.
+    """
+    return item_id % shard_count
+
+
+def sweep_key(store: ShardLeaseStore, job: str, window_minutes: float = None) -> str:
+    """
+    Key of the sweep shared by all replicas that start within a window of the sweep's first replica.
+
+    :param store: The shared lease store, which keeps the sweep rows.
+    :param job: Name of the job, e.g. "sonarr".
+    :param window_minutes: Window length; defaults to SHARD_SWEEP_WINDOW_MINUTES or 60.
+    """
+    window_minutes = window_minutes or float(os.getenv("SHARD_SWEEP_WINDOW_MINUTES", DEFAULT_SWEEP_WINDOW_MINUTES))
+    return store.join_sweep(job, window_minutes * 60)
+
+
+class LeaseHeartbeat:
+    """
+    Renews a shard lease from a background thread while the shard is worked on, so a single
+    slow item (e.g. a series sleeping between rename commands) cannot outlast the lease.
+    """
+
+    def __init__(self, store: ShardLeaseStore, job: str, sweep: str, shard: int):
+        self.store = store
+        self.job = job
+        self.sweep = sweep
+        self.shard = shard
+        # Set once a renewal failed: another replica owns the shard now.
+        self.lost = threading.Event()
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"lease-{job}-{shard}", daemon=True)
+
+    def _run(self) -> None:
+        # A third of the lease leaves room for two missed renewals before it expires.
+        interval = self.store.lease_seconds / 3
+        while not self._stopped.wait(interval):
+            if not self.store.renew(self.job, self.sweep, self.shard):
+                logger.warning("Lost lease on %s shard %d; another replica took it over.", self.job, self.shard)
+                self.lost.set()
+                return
+
+    def __enter__(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stopped.set()
+        self._thread.join()
+
+
+def run_sharded(
+    store: ShardLeaseStore,
+    job: str,
+    item_ids: Iterable[int],
+    process: Callable[[int], Any],
+    shard_count: int = None,
+    sweep: str = None,
+) -> int:
+    """
+    Process this replica's share of a sweep: claim shards one at a time, process every id in
+    the claimed shard, and mark it done. Leases are renewed by a heartbeat while processing, and
+    work on a shard stops before the next id once its lease was lost to another replica.
+    While other replicas hold the remaining shards, this one waits for their leases to expire,
+    and only returns once every shard is done, so the shards of a dead replica are taken over.
+
+    :param store: The shared lease store.
+    :param job: Name of the job, e.g. "sonarr".
+    :param item_ids: All series or movie ids of the sweep.
+    :param process: Called with each id of a claimed shard.
+    :param shard_count: Number of shards; defaults to SHARD_COUNT or 16.
+    :param sweep: Sweep key; defaults to `sweep_key(store, job)`.
+    :return: The number of ids processed by this replica.
+    """
+    shard_count = shard_count or int(os.getenv("SHARD_COUNT", DEFAULT_SHARD_COUNT))
+    sweep = sweep or sweep_key(store, job)
+    shards = {}
+    for item_id in item_ids:
+        shards.setdefault(shard_of(item_id, shard_count), []).append(item_id)
+    store.prune(job, sweep)
+
+    processed = 0
+    while True:
+        shard = store.claim(job, sweep, shard_count)
+        if shard is None:
+            expires_at = store.next_expiry(job, sweep)
+            if expires_at is None:
+                break
+            logger.info("Replica %s is waiting for other replicas to finish %s sweep %s.", store.replica_id, job, sweep)
+            time.sleep(max(expires_at - time.time(), MIN_POLL_SECONDS))
+            continue
+        logger.info("Replica %s claimed %s shard %d/%d (%d items).",
+                    store.replica_id, job, shard, shard_count, len(shards.get(shard, [])))
+        try:
+            with LeaseHeartbeat(store, job, sweep, shard) as heartbeat:
+                for item_id in shards.get(shard, []):
+                    if heartbeat.lost.is_set():
+                        break
+                    process(item_id)
+                    processed += 1
+        except BaseException:
+            store.release(job, sweep, shard)
+            raise
+        if not heartbeat.lost.is_set():
+            store.complete(job, sweep, shard)
+    return processed
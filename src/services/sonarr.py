@@ -1,78 +1,244 @@
-from src.api import SonarrAPI
 from src.services.base_service import BaseService
+from src.services.runtime import RuntimeContext
+from src.services.scheduler import schedule_options
+from src.services.sharding import run_sharded
+from src.services.sweep import SweepPlanner
+from src.storage import ShardLeaseStore, SnapshotStore
+import heapq
 import time
 import os
 from src.utils import setup_logger
+from src.utils.metrics import CACHE_LOOKUPS
+from src.utils.tracing import span
 
 logger = setup_logger(__name__, service_name="sonarr", color="light_blue")
 class SonarrService(BaseService):
     """
     A service class that encapsulates the Sonarr cleanup logic.
     """
-    def __init__(self, sleep_interval: int = 40):
-        super().__init__()
-        self.sonarr = SonarrAPI()
+    env_prefix = "SONARR"
+
+    def __init__(self, sleep_interval: int = 40, context: RuntimeContext = None):
+        super().__init__(context=context)
+        self.sonarr = self.context.client("sonarr")
         self.sleep_interval = sleep_interval
+        self.shard_store = ShardLeaseStore.from_env()
+        self.snapshot = SnapshotStore.from_env()
+        self.planner = SweepPlanner.from_env()
+        self.clock = time.monotonic
+        if self.shard_store and self.planner:
+            logger.warning("SONARR_TIME_BUDGET_MINUTES is ignored while SHARD_DB_PATH is set: each replica "
+                           "processes every series of the shards it claims, without a time budget.")
 
     def get_rename(self, series_id: int, season_number: int) -> list[str]:
         """
         Retrieve a list of episodeFileId's for renaming for the specified series and season.
         """
-        url = f"{self.sonarr.BASE_URL}/api/v3/rename?apikey={self.sonarr.API_KEY}&seriesId={series_id}&seasonNumber={season_number}"
-        response = self.sonarr.session.get(url)
+        response = self.sonarr._get("rename", params={"seriesId": series_id, "seasonNumber": season_number})
         if response.ok:
-            data = response.json()
+            data = self.sonarr._json(response)
             return [item["episodeFileId"] for item in data]
         else:
             logger.error(
                 f"Failed to get rename info for series {series_id} season {season_number}: {response.text}")
             return []
 
+    def get_seasons(self, series_id: int) -> list[int]:
+        """
+        Retrieve the season numbers of a series, defaulting to season 1 if it lists none.
+        """
+        series_details = self.sonarr.get_series(series_id)
+        seasons_info = series_details.get("seasons", [])
+        if seasons_info:
+            return [season["seasonNumber"] for season in seasons_info if "seasonNumber" in season]
+        return [1]
+
     def get_dict_of_series(self) -> dict:
         """
         Retrieve series data and return a mapping of series IDs to a list of season numbers needing renaming.
         Now it retrieves the actual season numbers for each series.
         """
         series_list = self.sonarr.get_all_series()
+        if self.snapshot:
+            return self.reconcile_seasons(series_list)
         data = {}
         for series in series_list:
             series_id = series.get("id")
             if series_id is not None:
-                series_details = self.sonarr.get_series(series_id)
-                seasons_info = series_details.get("seasons", [])
-                if seasons_info:
-                    season_numbers = [season["seasonNumber"] for season in seasons_info if "seasonNumber" in season]
-                else:
-                    season_numbers = [1]
-                data[series_id] = season_numbers
+                data[series_id] = self.get_seasons(series_id)
+        return data
+
+    def reconcile_seasons(self, series_list: list) -> dict:
+        """
+        Like get_dict_of_series, but only fetches details for series that are new or changed since
+        the last snapshot; the seasons of every other series are loaded from disk.
+
+        :param series_list: The full series list from Sonarr.
+        :return: A mapping of series IDs to season numbers.
+        """
+        # An empty list means the request failed; the snapshot is kept for the next run.
+        if series_list:
+            self.snapshot.upsert_series(series_list)
+        cached = self.snapshot.load_seasons()
+        data, fetched = {}, {}
+        for series in series_list:
+            series_id = series.get("id")
+            if series_id is None:
+                continue
+            if series_id in cached:
+                data[series_id] = cached[series_id]
+            else:
+                data[series_id] = fetched[series_id] = self.get_seasons(series_id)
+        if fetched:
+            self.snapshot.set_seasons(fetched)
+        CACHE_LOOKUPS.inc(len(data) - len(fetched), cache="sonarr_seasons", result="hit")
+        CACHE_LOOKUPS.inc(len(fetched), cache="sonarr_seasons", result="miss")
+        logger.info(f"Loaded seasons of {len(data) - len(fetched)} series from the snapshot; fetched {len(fetched)}.")
         return data
 
+    def process_series(self, series_id: int, seasons: list, index: int, total_series: int) -> bool:
+        """
+        Issue rename commands for every season of a series that has episodes to rename.
+
+        :return: True if any season had episodes to rename.
+        """
+        renamed = False
+        for season in seasons:
+            rename_episodes = self.get_rename(series_id, season)
+            if rename_episodes:
+                renamed = True
+                success = self.sonarr.rename_series_command(series_id, rename_episodes)
+                series_name = self.sonarr.get_series_name(series_id)
+                if success:
+                    logger.info(
+                        f"Checked {index} of {total_series} series - Renaming series {series_id} ({series_name}), episodes = {rename_episodes}"
+                    )
+                else:
+                    logger.error(
+                        f"Checked {index} of {total_series} series - FAILED renaming series {series_id} ({series_name}), episodes = {rename_episodes}"
+                    )
+                with span("sleep"):
+                    time.sleep(self.sleep_interval)
+        return renamed
+
     def start(self):
         """
         Main method to run the Sonarr cleanup process.
         Iterates over the series and seasons, then issues rename commands when appropriate.
         """
-        data = self.get_dict_of_series()
+        if self.shard_store:
+            self.start_sharded()
+            return
+        if self.planner:
+            self.start_budgeted()
+            return
+        if self.snapshot:
+            self.start_warm()
+            return
+
+        with span("list series"):
+            data = self.get_dict_of_series()
         total_series = len(data)
         logger.info(f"Found {total_series} series to process in Sonarr.")
 
         for index, (series_id, seasons) in enumerate(data.items(), start=1):
-            for season in seasons:
-                rename_episodes = self.get_rename(series_id, season)
-                if rename_episodes:
-                    success = self.sonarr.rename_series_command(series_id, rename_episodes)
-                    series_name = self.sonarr.get_series_name(series_id)
-                    if success:
-                        logger.info(
-                            f"Checked {index} of {total_series} series - Renaming series {series_id} ({series_name}), episodes = {rename_episodes}"
-                        )
-                    else:
-                        logger.error(
-                            f"Checked {index} of {total_series} series - FAILED renaming series {series_id} ({series_name}), episodes = {rename_episodes}"
-                        )
-                    time.sleep(self.sleep_interval)
+            self.process_series(series_id, seasons, index, total_series)
         logger.info("Finished Sonarr cleanup service.")
 
+    def start_warm(self):
+        """
+        Process the series of the last snapshot right away, then reconcile with Sonarr's series list
+        and process the series that are new or whose seasons changed since. A series deleted in
+        Sonarr since the last run is still checked once in the first pass.
+        """
+        cached = self.snapshot.load_seasons()
+        stored = [series["id"] for series in self.snapshot.load_series() if series.get("id") in cached]
+        logger.info(f"Loaded {len(stored)} series from the snapshot; processing them before fetching the series list.")
+        for index, series_id in enumerate(stored, start=1):
+            self.process_series(series_id, cached[series_id], index, len(stored))
+
+        with span("list series"):
+            data = self.get_dict_of_series()
+        remaining = {series_id: seasons for series_id, seasons in data.items() if cached.get(series_id) != seasons}
+        logger.info(f"Found {len(data)} series in Sonarr; {len(remaining)} are new or changed since the snapshot.")
+        for index, (series_id, seasons) in enumerate(remaining.items(), start=1):
+            self.process_series(series_id, seasons, index, len(remaining))
+        logger.info("Finished Sonarr cleanup service.")
+
+    def start_sharded(self):
+        """
+        Process only the shards of the sweep this replica claims from the shared lease store.
+        Other replicas pointed at the same SHARD_DB_PATH take the remaining shards.
+        """
+        series_list = self.sonarr.get_all_series()
+        series_ids = [series["id"] for series in series_list if series.get("id") is not None]
+        total_series = len(series_ids)
+        logger.info(f"Found {total_series} series in Sonarr; processing shards as replica {self.shard_store.replica_id}.")
+        counter = iter(range(1, total_series + 1))
+        cached = {}
+        if self.snapshot:
+            self.snapshot.upsert_series(series_list)
+            cached = self.snapshot.load_seasons()
+
+        def process(series_id: int) -> None:
+            seasons = cached.get(series_id)
+            if seasons is None:
+                seasons = self.get_seasons(series_id)
+                if self.snapshot:
+                    self.snapshot.set_seasons({series_id: seasons})
+            self.process_series(series_id, seasons, next(counter), total_series)
+
+        processed = run_sharded(self.shard_store, "sonarr", series_ids, process)
+        logger.info(f"Finished Sonarr cleanup service; this replica processed {processed} of {total_series} series.")
+
+    def start_budgeted(self):
+        """
+        Process series in priority order until SONARR_TIME_BUDGET_MINUTES is spent. Series left over
+        roll over to the next run; series that would otherwise go unvisited for
+        SONARR_FULL_COVERAGE_RUNS runs are processed even past the budget. The visits are kept in
+        SONARR_SWEEP_STATE_PATH, if set, so the rollover also works across one-shot runs.
+        """
+        budget = float(os.getenv("SONARR_TIME_BUDGET_MINUTES")) * 60
+        deadline = self.clock() + budget
+        with span("list series"):
+            series_list = self.sonarr.get_all_series()
+        cached = {}
+        if self.snapshot:
+            self.snapshot.upsert_series(series_list)
+            cached = self.snapshot.load_seasons()
+        if not self.planner.state_path and not self.schedule_job:
+            logger.warning("SONARR_SWEEP_STATE_PATH is not set: this run cannot tell which series earlier runs "
+                           "covered, so series beyond the time budget may never be reached.")
+        heap = self.planner.plan(series_list)
+        total_series = len(heap)
+        logger.info(f"Found {total_series} series in Sonarr; processing by priority for up to {budget / 60:g} minutes.")
+
+        processed = overdue = 0
+        try:
+            while heap:
+                series_id = heap[0][-1]
+                if self.clock() >= deadline and not self.planner.overdue(series_id):
+                    break
+                heapq.heappop(heap)
+                overdue += self.clock() >= deadline
+                seasons = cached.get(series_id)
+                if seasons is None:
+                    seasons = self.get_seasons(series_id)
+                    if self.snapshot:
+                        self.snapshot.set_seasons({series_id: seasons})
+                processed += 1
+                renamed = self.process_series(series_id, seasons, processed, total_series)
+                self.planner.mark_visited(series_id, renamed)
+        finally:
+            # Keep the progress of an interrupted run as well.
+            if self.planner.state_path:
+                self.planner.save()
+        if overdue:
+            logger.warning(f"Processed {overdue} series past the time budget to visit every series within "
+                           f"{self.planner.coverage_runs} runs; consider a larger budget.")
+        logger.info(f"Finished Sonarr cleanup service; processed {processed} of {total_series} series, "
+                    f"{len(heap)} roll over to the next run.")
+
     def run_job(self, *args, **kwargs):
         """
         This method is called by the scheduler to run the job.
@@ -85,27 +251,26 @@ class SonarrService(BaseService):
             logger.info("[Sonarr] Next run time is not available.")
 
 
-    @staticmethod
-    def sonarr_scheduled_cleanup():
+    def sonarr_scheduled_cleanup(self):
         sonarr_interval = os.getenv("SONARR_INTERVAL_MINUTES")
         sonarr_run_time = os.getenv("SONARR_RUN_TIME")
         if sonarr_interval and sonarr_run_time:
             logger.error("Both SONARR_INTERVAL_MINUTES and SONARR_RUN_TIME are defined. Please set only one.")
             exit(1)
-        sonarr_service = SonarrService()
+        options = schedule_options("SONARR")
         if sonarr_interval:
             try:
                 interval = int(sonarr_interval)
             except ValueError:
                 logger.error("SONARR_INTERVAL_MINUTES must be an integer.")
                 exit(1)
-            sonarr_service.register_schedule(interval_minutes=interval)
+            self.register_schedule(interval_minutes=interval, **options)
             logger.info("Registered Sonarr cleanup to run every %d minutes", interval)
         elif sonarr_run_time:
-            sonarr_service.register_schedule(run_time=sonarr_run_time)
+            self.register_schedule(run_time=sonarr_run_time, **options)
             logger.info("Registered Sonarr cleanup at %s", sonarr_run_time)
         else:
-            sonarr_service.register_schedule(run_time="03:00")
+            self.register_schedule(run_time="03:00", **options)
             logger.info("No SONARR schedule config found. Defaulting to daily at 03:00")
 
     # Example usage:
@@ -0,0 +1,163 @@
+# src/services/sweep.py
+import heapq
+import json
+import os
+import time
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from src.storage.snapshot import record_version
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, service_name="sonarr", color="light_blue")
+
+SECONDS_PER_DAY = 86400
+DEFAULT_COVERAGE_RUNS = 3
+DEFAULT_RECENT_DAYS = 14
+
+# Weights of the priority signals; a series that changed since its last visit goes first.
+WEIGHT_CHANGED = 4
+WEIGHT_RENAMED = 2
+WEIGHT_RECENT = 1
+
+
+def _added_timestamp(series: dict) -> Optional[float]:
+    added = series.get("added")
+    if not added:
+        return None
+    try:
+        return datetime.fromisoformat(added.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class SweepPlanner:
+    """
+    Orders series for time-budgeted sweeps and carries unfinished work over to the next run.
+
+    Series are taken from a heap. Series that would otherwise miss the coverage guarantee
+    (not visited for `coverage_runs - 1` runs) come first, then series that changed since their
+    last visit, series that needed renames when last visited, and recently added series; ties
+    go to the series visited longest ago.
+    """
+
+    def __init__(self, coverage_runs: int = DEFAULT_COVERAGE_RUNS, recent_days: float = DEFAULT_RECENT_DAYS,
+                 state_path: str = None):
+        """
+        :param coverage_runs: Every series is visited at least once within this many runs.
+        :param recent_days: Series added within this many days get a higher priority.
+        :param state_path: File to keep the visits in across processes, e.g. for one-shot runs from cron.
+        """
+        self.coverage_runs = max(coverage_runs, 1)
+        self.state_path = state_path
+        self.recent_seconds = recent_days * SECONDS_PER_DAY
+        self.run = 0
+        # Per series: the run it was last visited in (or the run before it was first seen),
+        # its version at that visit, and whether it needed renames then.
+        self.visited: Dict[int, int] = {}
+        self.versions: Dict[int, str] = {}
+        self.renamed: Dict[int, bool] = {}
+        self._current: Dict[int, str] = {}
+        if state_path and os.path.exists(state_path):
+            self.load(state_path)
+
+    @classmethod
+    def from_env(cls) -> Optional["SweepPlanner"]:
+        """
+        Create a planner from SONARR_FULL_COVERAGE_RUNS, SONARR_RECENT_DAYS and SONARR_SWEEP_STATE_PATH.
+
+        :return: The planner, or None if SONARR_TIME_BUDGET_MINUTES is not set.
+        """
+        if not os.getenv("SONARR_TIME_BUDGET_MINUTES"):
+            return None
+        return cls(
+            coverage_runs=int(os.getenv("SONARR_FULL_COVERAGE_RUNS", DEFAULT_COVERAGE_RUNS)),
+            recent_days=float(os.getenv("SONARR_RECENT_DAYS", DEFAULT_RECENT_DAYS)),
+            state_path=os.getenv("SONARR_SWEEP_STATE_PATH"),
+        )
+
+    def overdue(self, series_id: int) -> bool:
+        """
+        Return True if the series must be visited in this run to keep the coverage guarantee.
+        """
+        return self.run - self.visited.get(series_id, self.run - 1) >= self.coverage_runs
+
+    def plan(self, series_list: Iterable[dict], now: float = None) -> List[tuple]:
+        """
+        Start a new run and return its work as a heap; pop series ids with `heapq.heappop(heap)[-1]`.
+
+        :param series_list: The full series list from Sonarr.
+        :param now: Current time, for how recently a series was added.
+        """
+        now = now or time.time()
+        self.run += 1
+        heap, current = [], {}
+        for series in series_list:
+            series_id = series.get("id")
+            if series_id is None:
+                continue
+            current[series_id] = version = record_version(series)
+            # A new series counts as visited in the previous run, so it is due within coverage_runs.
+            last_visit = self.visited.setdefault(series_id, self.run - 1)
+            added = _added_timestamp(series)
+            weight = (
+                WEIGHT_CHANGED * (self.versions.get(series_id) != version)
+                + WEIGHT_RENAMED * self.renamed.get(series_id, False)
+                + WEIGHT_RECENT * (added is not None and now - added < self.recent_seconds)
+            )
+            heap.append((not self.overdue(series_id), -weight, last_visit, series_id))
+        for state in (self.visited, self.versions, self.renamed):
+            for series_id in [series_id for series_id in state if series_id not in current]:
+                del state[series_id]
+        self._current = current
+        heapq.heapify(heap)
+        return heap
+
+    def mark_visited(self, series_id: int, renamed: bool) -> None:
+        """
+        Record that a series was processed in the current run.
+
+        :param renamed: Whether it had episodes to rename.
+        """
+        self.visited[series_id] = self.run
+        self.renamed[series_id] = renamed
+        if series_id in self._current:
+            self.versions[series_id] = self._current[series_id]
+
+    def save(self, path: str = None) -> None:
+        """
+        Write the run counter and the per-series visits to a JSON file.
+
+        :param path: The file; defaults to `state_path`.
+        """
+        path = path or self.state_path
+        state = {
+            "run": self.run,
+            "visited": self.visited,
+            "versions": self.versions,
+            "renamed": self.renamed,
+        }
+        temporary = f"{path}.tmp"
+        with open(temporary, "w") as file:
+            json.dump(state, file)
+        os.replace(temporary, path)
+
+    def load(self, path: str) -> bool:
+        """
+        Restore the state written by `save`.
+
+        :return: True if the file was loaded.
+        """
+        try:
+            with open(path) as file:
+                state = json.load(file)
+            run = int(state["run"])
+            # JSON object keys are strings; series ids are ints.
+            visited = {int(key): int(value) for key, value in state["visited"].items()}
+            versions = {int(key): value for key, value in state["versions"].items()}
+            renamed = {int(key): bool(value) for key, value in state["renamed"].items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            logger.warning("Cannot load Sonarr sweep state %s: %s", path, e)
+            return False
+        self.run, self.visited, self.versions, self.renamed = run, visited, versions, renamed
+        return True
@@ -0,0 +1,144 @@
+# src/services/trackers.py
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src.utils.metrics import CACHE_LOOKUPS
+from src.utils.tracing import span
+
+logger = logging.getLogger(__name__)
+
+TRACKER_WORKING = "working"
+TRACKER_UNREGISTERED = "unregistered"
+TRACKER_DEAD = "dead"
+TRACKER_UNKNOWN = "unknown"
+
+# qBittorrent tracker status codes.
+STATUS_DISABLED = 0
+STATUS_NOT_CONTACTED = 1
+STATUS_WORKING = 2
+STATUS_UPDATING = 3
+STATUS_NOT_WORKING = 4
+
+# Phrases of tracker messages meaning the tracker no longer knows the torrent. Only full phrases:
+# a bare "deleted" would also match messages like "torrent not deleted".
+UNREGISTERED_MESSAGES = ("unregistered", "not registered", "torrent not found", "torrent has been deleted")
+
+DEFAULT_TTL_MINUTES = 360
+DEFAULT_CONCURRENCY = 8
+
+
+def classify_trackers(trackers: List[dict]) -> str:
+    """
+    Derive a torrent's tracker health from its `torrents/trackers` list.
+
+    :return: "unregistered" if a tracker reports the torrent as unknown, "dead" if no real tracker
+        works (DHT/PeX/LSD don't count), "unknown" if the trackers were not contacted yet, else "working".
+    """
+    real = [tracker for tracker in trackers if not tracker.get("url", "").startswith("** [")]
+    for tracker in real:
+        message = (tracker.get("msg") or "").lower()
+        if tracker.get("status") == STATUS_NOT_WORKING and any(text in message for text in UNREGISTERED_MESSAGES):
+            return TRACKER_UNREGISTERED
+    statuses = {tracker.get("status") for tracker in real}
+    if statuses & {STATUS_WORKING, STATUS_UPDATING}:
+        return TRACKER_WORKING
+    if STATUS_NOT_CONTACTED in statuses:
+        return TRACKER_UNKNOWN
+    return TRACKER_DEAD
+
+
+@dataclass
+class TrackerEntry:
+    """
+    Cached tracker health of one torrent.
+    """
+    status: str
+    fingerprint: Tuple
+    fetched_at: float
+
+
+class TrackerIndex:
+    """
+    Tracker health per torrent hash, fetched from `torrents/trackers` with bounded parallelism.
+
+    Entries are kept until they expire or the torrent's `tracker` or `state` field changes,
+    so a refresh over a large, mostly unchanged library only fetches a handful of torrents.
+    """
+
+    def __init__(self, api, ttl_seconds: float = None, concurrency: int = None):
+        """
+        :param api: The QbitAPI to fetch trackers with; it must be logged in.
+        :param ttl_seconds: How long an entry stays valid; defaults to QBIT_TRACKER_TTL_MINUTES or 360 minutes.
+        :param concurrency: Maximum parallel requests; defaults to QBIT_TRACKER_CONCURRENCY or 8.
+        """
+        self.api = api
+        self.ttl_seconds = ttl_seconds or float(os.getenv("QBIT_TRACKER_TTL_MINUTES", DEFAULT_TTL_MINUTES)) * 60
+        self.concurrency = concurrency or int(os.getenv("QBIT_TRACKER_CONCURRENCY", DEFAULT_CONCURRENCY))
+        self.entries: Dict[str, TrackerEntry] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def fingerprint(torrent: dict) -> Tuple:
+        return torrent.get("tracker"), torrent.get("state")
+
+    def stale(self, torrents: Iterable[dict], now: float = None) -> List[dict]:
+        """
+        Return the torrents whose entry is missing, expired, or whose tracker or state changed.
+        """
+        now = now or time.time()
+        with self._lock:
+            return [
+                torrent for torrent in torrents
+                if (entry := self.entries.get(torrent.get("hash"))) is None
+                or entry.fingerprint != self.fingerprint(torrent)
+                or now - entry.fetched_at > self.ttl_seconds
+            ]
+
+    def refresh(self, torrents: List[dict], now: float = None) -> int:
+        """
+        Bring the index up to date with a torrent list: fetch stale torrents concurrently and
+        forget torrents that are gone.
+
+        :param torrents: Torrents to track (e.g. the full `torrents/info` list).
+        :param now: Current time, for the TTL.
+        :return: The number of torrents fetched.
+        """
+        now = now or time.time()
+        present = {torrent.get("hash") for torrent in torrents}
+        with self._lock:
+            for torrent_hash in [torrent_hash for torrent_hash in self.entries if torrent_hash not in present]:
+                del self.entries[torrent_hash]
+        stale = self.stale(torrents, now)
+        CACHE_LOOKUPS.inc(len(torrents) - len(stale), cache="qbit_trackers", result="hit")
+        CACHE_LOOKUPS.inc(len(stale), cache="qbit_trackers", result="miss")
+        if not stale:
+            return 0
+
+        def fetch(torrent: dict) -> None:
+            trackers = self.api.get_trackers(torrent["hash"])
+            if trackers is None:
+                return
+            entry = TrackerEntry(classify_trackers(trackers), self.fingerprint(torrent), now)
+            with self._lock:
+                self.entries[torrent["hash"]] = entry
+
+        # A private pool: the caller usually is a job on the shared pool, and waiting there on
+        # sub-tasks queued behind other jobs could deadlock it.
+        with span("tracker refresh"), ThreadPoolExecutor(
+                max_workers=min(self.concurrency, len(stale)), thread_name_prefix="trackers") as pool:
+            list(pool.map(fetch, stale))
+        logger.info("Refreshed trackers of %d torrent(s); %d cached.", len(stale), len(torrents) - len(stale))
+        return len(stale)
+
+    def status(self, torrent_hash: str) -> Optional[str]:
+        """
+        Return the cached tracker health of a torrent, or None if it is not known.
+        """
+        with self._lock:
+            entry = self.entries.get(torrent_hash)
+        return entry.status if entry else None
@@ -0,0 +1,142 @@
+"""
+Replay recorded qBittorrent snapshots against a grid of deletion thresholds.
+
+    python src/simulate.py RECORD_DIR --age-days 7,14,16,30 --activity-days 3,7,10
+"""
+import argparse
+import json
+import os
+import sys
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+from src.services.rules import PROTECTED_CATEGORIES, SECONDS_PER_DAY, torrent_ages
+from src.storage.recordings import load_recordings
+from src.utils.utils import readable_size
+
+DEFAULT_AGE_DAYS = (7, 14, 16, 21, 30, 60)
+DEFAULT_ACTIVITY_DAYS = (1, 3, 7, 10, 14, 30)
+
+
+def _frontier(points: Iterable[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    # The points not dominated by another one, by descending first and ascending second coordinate.
+    frontier = []
+    for i, j in sorted(set(points), reverse=True):
+        if not frontier or j > frontier[-1][1]:
+            frontier.append((i, j))
+    return frontier
+
+
+def simulate(snapshots: Iterable[Tuple[float, List[dict]]], age_days: Sequence[float],
+             activity_days: Sequence[float], protected: Sequence[str] = PROTECTED_CATEGORIES) -> List[dict]:
+    """
+    Count the torrents, and their bytes, the age/last-activity rule would have deleted over a
+    series of snapshots, for every combination of thresholds at once. Ages and protected categories
+    come from the rule the qBit cleanup applies (src.services.rules).
+
+    A torrent counts for a combination if it met both thresholds in any snapshot. Each torrent
+    is binned once per snapshot; a 2D histogram over the threshold grid with suffix sums then gives
+    all combinations in one pass, instead of replaying every snapshot per combination.
+
+    :param snapshots: (time, torrents) pairs, e.g. from load_recordings.
+    :param age_days: Values of QBIT_TORRENT_AGE_THRESHOLD_DAYS to try.
+    :param activity_days: Values of QBIT_TORRENT_LAST_ACTIVITY_THRESHOLD_DAYS to try.
+    :param protected: Categories that are never deleted.
+    :return: One row per combination with the torrent count and bytes freed.
+    """
+    ages = sorted(set(age_days))
+    activities = sorted(set(activity_days))
+    # For every torrent, the grid cells (i, j) reached: its age is above the first i age
+    # thresholds and its inactivity above the first j activity thresholds.
+    reached: Dict[str, set] = {}
+    sizes: Dict[str, int] = {}
+    for now, torrents in snapshots:
+        for torrent in torrents:
+            if torrent.get("category") in protected:
+                continue
+            age, idle = torrent_ages(torrent, now)
+            i = bisect_left(ages, age)
+            j = bisect_left(activities, idle)
+            if i and j:
+                reached.setdefault(torrent["hash"], set()).add((i, j))
+                sizes[torrent["hash"]] = torrent.get("size") or 0
+
+    # A cell (i, j) in the histogram counts for all combinations below it. A torrent deleted under
+    # several snapshots covers a staircase of such rectangles; adding each step and subtracting the
+    # overlap with the previous one counts it exactly once. The spare row and column stay zero.
+    counts = [[0] * (len(activities) + 2) for _ in range(len(ages) + 2)]
+    freed = [[0] * (len(activities) + 2) for _ in range(len(ages) + 2)]
+    for torrent_hash, points in reached.items():
+        size = sizes[torrent_hash]
+        frontier = _frontier(points)
+        for step, (i, j) in enumerate(frontier):
+            counts[i][j] += 1
+            freed[i][j] += size
+            if step:
+                overlap_j = frontier[step - 1][1]
+                counts[i][overlap_j] -= 1
+                freed[i][overlap_j] -= size
+
+    for grid in (counts, freed):
+        for i in range(len(ages), -1, -1):
+            for j in range(len(activities), -1, -1):
+                grid[i][j] += grid[i + 1][j] + grid[i][j + 1] - grid[i + 1][j + 1]
+
+    # Combination (a, b) takes the cells above it: sum over i > a, j > b.
+    return [
+        {"age_days": age, "activity_days": activity, "torrents": counts[a + 1][b + 1], "bytes": freed[a + 1][b + 1]}
+        for a, age in enumerate(ages)
+        for b, activity in enumerate(activities)
+    ]
+
+
+def _days(value: str) -> List[float]:
+    return [float(day) for day in value.split(",") if day.strip()]
+
+
+def parse_args(argv=None):
+    """
+    Parse command-line arguments and return the resulting namespace.
+    :return: Namespace with parsed arguments.
+    """
+    parser = argparse.ArgumentParser(description="Replay recorded qBit snapshots against deletion thresholds.")
+    parser.add_argument("record_dir", nargs="?", default=os.getenv("QBIT_RECORD_DIR"),
+                        help="Directory of recorded snapshots (default: QBIT_RECORD_DIR).")
+    parser.add_argument("--age-days", type=_days, default=list(DEFAULT_AGE_DAYS),
+                        help="Comma separated QBIT_TORRENT_AGE_THRESHOLD_DAYS values to try.")
+    parser.add_argument("--activity-days", type=_days, default=list(DEFAULT_ACTIVITY_DAYS),
+                        help="Comma separated QBIT_TORRENT_LAST_ACTIVITY_THRESHOLD_DAYS values to try.")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per combination.")
+    args = parser.parse_args(argv)
+    if not args.record_dir:
+        parser.error("record_dir is required unless QBIT_RECORD_DIR is set.")
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    replayed = []
+
+    def snapshots():
+        # Streamed, so only one snapshot is held in memory at a time.
+        for snapshot in load_recordings(args.record_dir):
+            replayed.append(snapshot[0])
+            yield snapshot
+
+    rows = simulate(snapshots(), args.age_days, args.activity_days)
+    if not replayed:
+        print(f"No snapshots found in {args.record_dir}.", file=sys.stderr)
+        return 1
+    if args.json:
+        for row in rows:
+            print(json.dumps(row))
+        return 0
+    print(f"{len(replayed)} snapshot(s) replayed.")
+    print(f"{'Age days':>9} {'Activity days':>14} {'Torrents':>9} {'Freed':>12}")
+    for row in rows:
+        print(f"{row['age_days']:>9g} {row['activity_days']:>14g} {row['torrents']:>9} {readable_size(row['bytes']):>12}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
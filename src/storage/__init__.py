@@ -0,0 +1,6 @@
+# storage/__init__.py
+from .leases import ShardLeaseStore
+from .recordings import SnapshotRecorder, load_recordings
+from .snapshot import SnapshotStore
+
+__all__ = ['ShardLeaseStore', 'SnapshotRecorder', 'SnapshotStore', 'load_recordings']
@@ -0,0 +1,201 @@
+# src/storage/leases.py
+import logging
+import os
+import socket
+import sqlite3
+import time
+from contextlib import closing
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LEASE_SECONDS = 300
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS shard_leases (
+    job TEXT NOT NULL,
+    sweep TEXT NOT NULL,
+    shard INTEGER NOT NULL,
+    owner TEXT,
+    expires_at REAL NOT NULL DEFAULT 0,
+    done INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (job, sweep, shard)
+)
+"""
+
+SWEEPS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS shard_sweeps (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    job TEXT NOT NULL,
+    started_at REAL NOT NULL
+)
+"""
+
+
+class ShardLeaseStore:
+    """
+    Shard leases kept in a SQLite file on a volume shared by all replicas.
+
+    A replica claims a shard of a sweep by writing itself as the owner with an expiry time.
+    Leases must be renewed while the shard is worked on; a lease that expires (e.g. because
+    its replica died) can be stolen by any other replica.
+    """
+
+    def __init__(self, path: str, replica_id: str = None, lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        """
+        :param path: Path of the SQLite file shared by the replicas.
+        :param replica_id: Unique name of this replica; defaults to <hostname>-<pid>.
+        :param lease_seconds: How long a claim is valid without renewal.
+        """
+        self.path = path
+        self.replica_id = replica_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = lease_seconds
+        with closing(self._connect()) as connection:
+            connection.execute(SCHEMA)
+            connection.execute(SWEEPS_SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional["ShardLeaseStore"]:
+        """
+        Create a store from SHARD_DB_PATH, REPLICA_ID and SHARD_LEASE_SECONDS.
+
+        :return: The store, or None if sharding is not configured.
+        """
+        path = os.getenv("SHARD_DB_PATH")
+        if not path:
+            return None
+        return cls(
+            path,
+            replica_id=os.getenv("REPLICA_ID"),
+            lease_seconds=float(os.getenv("SHARD_LEASE_SECONDS", DEFAULT_LEASE_SECONDS)),
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        # Autocommit mode; claims open their own IMMEDIATE transaction to take the write lock up front.
+        return sqlite3.connect(self.path, timeout=30, isolation_level=None)
+
+    def join_sweep(self, job: str, window_seconds: float) -> str:
+        """
+        Return the key of the job's latest sweep if it was started within `window_seconds`, else
+        start a new sweep. The first replica creates the sweep row and later ones join it, so
+        replicas agree on the sweep whatever their start times.
+
+        :param job: Name of the job, e.g. "sonarr".
+        :param window_seconds: How long after its start a sweep can still be joined.
+        :return: The sweep key.
+        """
+        now = time.time()
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                row = connection.execute(
+                    "SELECT id, started_at FROM shard_sweeps WHERE job = ? ORDER BY id DESC LIMIT 1", (job,)
+                ).fetchone()
+                if row is not None and now - row[1] < window_seconds:
+                    sweep_id = row[0]
+                else:
+                    sweep_id = connection.execute(
+                        "INSERT INTO shard_sweeps (job, started_at) VALUES (?, ?)", (job, now)
+                    ).lastrowid
+                    connection.execute("DELETE FROM shard_sweeps WHERE job = ? AND id < ?", (job, sweep_id))
+                    logger.info("Replica %s started %s sweep %d.", self.replica_id, job, sweep_id)
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        return str(sweep_id)
+
+    def claim(self, job: str, sweep: str, shard_count: int) -> Optional[int]:
+        """
+        Claim the next unfinished shard of a sweep that is free or whose lease has expired.
+
+        :param job: Name of the job, e.g. "sonarr".
+        :param sweep: Key identifying one sweep of the job, shared by all replicas.
+        :param shard_count: Number of shards the sweep is split into.
+        :return: The claimed shard number, or None if every shard is done or leased.
+        """
+        now = time.time()
+        with closing(self._connect()) as connection:
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(
+                    "INSERT OR IGNORE INTO shard_leases (job, sweep, shard) VALUES (?, ?, ?)",
+                    [(job, sweep, shard) for shard in range(shard_count)],
+                )
+                row = connection.execute(
+                    "SELECT shard, owner FROM shard_leases "
+                    "WHERE job = ? AND sweep = ? AND done = 0 AND shard < ? AND (owner IS NULL OR expires_at < ?) "
+                    "ORDER BY shard LIMIT 1",
+                    (job, sweep, shard_count, now),
+                ).fetchone()
+                if row is None:
+                    connection.execute("COMMIT")
+                    return None
+                shard, previous_owner = row
+                connection.execute(
+                    "UPDATE shard_leases SET owner = ?, expires_at = ? WHERE job = ? AND sweep = ? AND shard = ?",
+                    (self.replica_id, now + self.lease_seconds, job, sweep, shard),
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+        if previous_owner and previous_owner != self.replica_id:
+            logger.warning("Stole expired lease on %s shard %d (sweep %s) from %s.", job, shard, sweep, previous_owner)
+        return shard
+
+    def renew(self, job: str, sweep: str, shard: int) -> bool:
+        """
+        Extend this replica's lease on a shard.
+
+        :return: False if the lease was lost to another replica and the work should stop.
+        """
+        with closing(self._connect()) as connection:
+            cursor = connection.execute(
+                "UPDATE shard_leases SET expires_at = ? "
+                "WHERE job = ? AND sweep = ? AND shard = ? AND owner = ? AND done = 0",
+                (time.time() + self.lease_seconds, job, sweep, shard, self.replica_id),
+            )
+            return cursor.rowcount == 1
+
+    def next_expiry(self, job: str, sweep: str) -> Optional[float]:
+        """
+        Return when the first lease on an unfinished shard of a sweep expires.
+
+        :return: The expiry time, or None if every shard of the sweep is done.
+        """
+        with closing(self._connect()) as connection:
+            return connection.execute(
+                "SELECT MIN(expires_at) FROM shard_leases WHERE job = ? AND sweep = ? AND done = 0", (job, sweep)
+            ).fetchone()[0]
+
+    def complete(self, job: str, sweep: str, shard: int) -> None:
+        """
+        Mark a shard of a sweep as done so no replica picks it up again.
+        """
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "UPDATE shard_leases SET done = 1 WHERE job = ? AND sweep = ? AND shard = ? AND owner = ?",
+                (job, sweep, shard, self.replica_id),
+            )
+
+    def release(self, job: str, sweep: str, shard: int) -> None:
+        """
+        Give up a lease without finishing the shard, so another replica can take it immediately.
+        """
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "UPDATE shard_leases SET owner = NULL, expires_at = 0 "
+                "WHERE job = ? AND sweep = ? AND shard = ? AND owner = ? AND done = 0",
+                (job, sweep, shard, self.replica_id),
+            )
+
+    def prune(self, job: str, keep_sweep: str) -> None:
+        """
+        Delete the leases of every other sweep of a job, except shards still being worked on.
+        """
+        with closing(self._connect()) as connection:
+            connection.execute(
+                "DELETE FROM shard_leases WHERE job = ? AND sweep != ? AND (done = 1 OR expires_at < ?)",
+                (job, keep_sweep, time.time()),
+            )
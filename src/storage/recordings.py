@@ -0,0 +1,84 @@
+# src/storage/recordings.py
+import glob
+import gzip
+import json
+import logging
+import os
+import time
+from typing import Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_KEEP = 500
+# The fields the deletion rules look at; the rest of `torrents/info` is not recorded.
+RECORD_FIELDS = (
+    "hash", "name", "category", "size", "added_on", "last_activity",
+    "uploaded", "num_leechs", "num_seeds", "state", "tracker",
+)
+FILE_PATTERN = "torrents-*.json.gz"
+
+
+class SnapshotRecorder:
+    """
+    Writes gzip-compressed `torrents/info` snapshots to a directory, one file per cleanup run,
+    for replaying deletion policies offline.
+    """
+
+    def __init__(self, directory: str, keep: int = DEFAULT_KEEP):
+        """
+        :param directory: Where to write the snapshots; created if missing.
+        :param keep: How many snapshots to keep; older ones are removed. 0 keeps all of them.
+        """
+        self.directory = directory
+        self.keep = keep
+        os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["SnapshotRecorder"]:
+        """
+        Create a recorder from QBIT_RECORD_DIR and QBIT_RECORD_KEEP.
+
+        :return: The recorder, or None if recording is not configured.
+        """
+        directory = os.getenv("QBIT_RECORD_DIR")
+        if not directory:
+            return None
+        return cls(directory, keep=int(os.getenv("QBIT_RECORD_KEEP", DEFAULT_KEEP)))
+
+    def record(self, torrents: List[dict], now: float = None) -> str:
+        """
+        Write one snapshot and remove the oldest ones beyond `keep`.
+
+        :return: Path of the written file.
+        """
+        now = now or time.time()
+        name = time.strftime("torrents-%Y%m%dT%H%M%S", time.gmtime(now)) + f"-{int(now * 1000) % 1000:03d}.json.gz"
+        path = os.path.join(self.directory, name)
+        snapshot = {
+            "time": now,
+            "torrents": [{field: torrent.get(field) for field in RECORD_FIELDS} for torrent in torrents],
+        }
+        temporary = f"{path}.tmp"
+        with gzip.open(temporary, "wt", encoding="utf-8") as file:
+            json.dump(snapshot, file, separators=(",", ":"))
+        os.replace(temporary, path)
+        if self.keep > 0:
+            for old in sorted(glob.glob(os.path.join(self.directory, FILE_PATTERN)))[:-self.keep]:
+                os.remove(old)
+        return path
+
+
+def load_recordings(directory: str) -> Iterator[Tuple[float, List[dict]]]:
+    """
+    Yield the snapshots recorded in a directory, oldest first.
+
+    :return: Iterator of (time, torrents) pairs.
+    """
+    for path in sorted(glob.glob(os.path.join(directory, FILE_PATTERN))):
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except (OSError, ValueError) as e:
+            logger.warning("Skipping unreadable snapshot %s: %s", path, e)
+            continue
+        yield snapshot["time"], snapshot["torrents"]
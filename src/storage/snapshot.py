@@ -0,0 +1,289 @@
+# src/storage/snapshot.py
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import time
+from contextlib import closing
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+SECONDS_PER_DAY = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS series (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    version TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS seasons (
+    series_id INTEGER NOT NULL,
+    season_number INTEGER NOT NULL,
+    series_version TEXT NOT NULL,
+    PRIMARY KEY (series_id, season_number)
+);
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    size_on_disk INTEGER,
+    version TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS movies_size ON movies (size_on_disk);
+CREATE TABLE IF NOT EXISTS torrents (
+    hash TEXT PRIMARY KEY,
+    name TEXT,
+    category TEXT,
+    state TEXT,
+    tracker TEXT,
+    added_on INTEGER,
+    last_activity INTEGER,
+    size INTEGER,
+    version TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS torrents_category_added ON torrents (category, added_on);
+CREATE TABLE IF NOT EXISTS reconciled (
+    name TEXT PRIMARY KEY,
+    at REAL NOT NULL
+);
+"""
+
+TORRENT_FIELDS = ("name", "category", "state", "tracker", "added_on", "last_activity", "size")
+
+
+def record_version(record: dict) -> str:
+    """
+    Return a short digest of a record's content, used to detect changes between snapshots.
+    """
+    encoded = json.dumps(record, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.blake2b(encoded, digest_size=8).hexdigest()
+
+
+class SnapshotStore:
+    """
+    Local SQLite snapshot of series, seasons, movies and torrent summaries.
+
+    Every record carries a content `version`, so a restarted process can start from its last
+    known state on disk and, while reconciling with the API, only refetch what changed since.
+    """
+
+    def __init__(self, path: str):
+        """
+        :param path: Path of the SQLite file.
+        """
+        self.path = path
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+
+    @classmethod
+    def from_env(cls) -> Optional["SnapshotStore"]:
+        """
+        Create a store from SNAPSHOT_DB_PATH.
+
+        :return: The store, or None if snapshots are not configured.
+        """
+        path = os.getenv("SNAPSHOT_DB_PATH")
+        return cls(path) if path else None
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path, timeout=30)
+        connection.row_factory = sqlite3.Row
+        return connection
+
+    def _versions(self, connection: sqlite3.Connection, table: str, key: str) -> Dict:
+        return dict(connection.execute(f"SELECT {key}, version FROM {table}"))
+
+    def _mark_reconciled(self, connection: sqlite3.Connection, table: str, now: float) -> None:
+        connection.execute("INSERT OR REPLACE INTO reconciled (name, at) VALUES (?, ?)", (table, now))
+
+    def reconciled_at(self, table: str) -> Optional[float]:
+        """
+        Return when a table was last reconciled with a full list from the API, or None if never.
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute("SELECT at FROM reconciled WHERE name = ?", (table,)).fetchone()
+        return row["at"] if row else None
+
+    # Series and seasons
+
+    def upsert_series(self, series_list: List[dict]) -> List[int]:
+        """
+        Reconcile the stored series with a full series list from Sonarr.
+        Series missing from the list are removed together with their seasons.
+
+        :param series_list: Series dictionaries as returned by the Sonarr `series` endpoint.
+        :return: Ids of series that are new or whose content changed.
+        """
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            known = self._versions(connection, "series", "id")
+            rows, changed = [], []
+            for series in series_list:
+                series_id = series.get("id")
+                if series_id is None:
+                    continue
+                version = record_version(series)
+                if known.pop(series_id, None) != version:
+                    changed.append(series_id)
+                    rows.append((series_id, series.get("title"), version, json.dumps(series), now))
+            connection.executemany(
+                "INSERT INTO series (id, title, version, payload, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET title = excluded.title, version = excluded.version, "
+                "payload = excluded.payload, updated_at = excluded.updated_at",
+                rows,
+            )
+            removed = [(series_id,) for series_id in known]
+            connection.executemany("DELETE FROM series WHERE id = ?", removed)
+            connection.executemany("DELETE FROM seasons WHERE series_id = ?", removed)
+        return changed
+
+    def load_series(self) -> List[dict]:
+        """
+        Return the stored series payloads.
+        """
+        with closing(self._connect()) as connection:
+            return [json.loads(row["payload"]) for row in connection.execute("SELECT payload FROM series ORDER BY id")]
+
+    def set_seasons(self, seasons_by_series: Dict[int, List[int]]) -> None:
+        """
+        Store the season numbers of some series, tagged with the series version they belong to.
+
+        :param seasons_by_series: {series_id: [season numbers]}.
+        """
+        with closing(self._connect()) as connection, connection:
+            versions = self._versions(connection, "series", "id")
+            connection.executemany("DELETE FROM seasons WHERE series_id = ?",
+                                   [(series_id,) for series_id in seasons_by_series])
+            connection.executemany(
+                "INSERT INTO seasons (series_id, season_number, series_version) VALUES (?, ?, ?)",
+                [(series_id, number, versions.get(series_id, ""))
+                 for series_id, numbers in seasons_by_series.items() for number in numbers],
+            )
+
+    def load_seasons(self) -> Dict[int, List[int]]:
+        """
+        Return {series_id: [season numbers]} for every series whose seasons are current.
+        Seasons recorded for an older version of a series are left out, so they get refetched.
+        """
+        seasons: Dict[int, List[int]] = {}
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT seasons.series_id, seasons.season_number FROM seasons "
+                "JOIN series ON series.id = seasons.series_id AND series.version = seasons.series_version "
+                "ORDER BY seasons.series_id, seasons.season_number"
+            )
+            for series_id, season_number in rows:
+                seasons.setdefault(series_id, []).append(season_number)
+        return seasons
+
+    # Movies
+
+    def upsert_movies(self, movies: List[dict]) -> List[int]:
+        """
+        Reconcile the stored movies with a full movie list from Radarr.
+        Movies missing from the list are removed.
+
+        :param movies: Movie dictionaries as returned by the Radarr `movie` endpoint.
+        :return: Ids of movies that are new or whose content changed.
+        """
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            known = self._versions(connection, "movies", "id")
+            rows, changed = [], []
+            for movie in movies:
+                movie_id = movie.get("id")
+                if movie_id is None:
+                    continue
+                version = record_version(movie)
+                if known.pop(movie_id, None) != version:
+                    changed.append(movie_id)
+                    rows.append((movie_id, movie.get("title"), movie.get("sizeOnDisk", 0), version,
+                                 json.dumps(movie), now))
+            connection.executemany(
+                "INSERT INTO movies (id, title, size_on_disk, version, payload, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (id) DO UPDATE SET title = excluded.title, size_on_disk = excluded.size_on_disk, "
+                "version = excluded.version, payload = excluded.payload, updated_at = excluded.updated_at",
+                rows,
+            )
+            connection.executemany("DELETE FROM movies WHERE id = ?", [(movie_id,) for movie_id in known])
+        return changed
+
+    def movies_larger_than(self, min_bytes: float) -> List[dict]:
+        """
+        Return the stored movies whose size on disk exceeds `min_bytes`, largest first.
+        Answered from the size index without contacting Radarr.
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT payload FROM movies WHERE size_on_disk > ? ORDER BY size_on_disk DESC", (min_bytes,)
+            )
+            return [json.loads(row["payload"]) for row in rows]
+
+    # Torrents
+
+    def upsert_torrents(self, torrents: List[dict]) -> List[str]:
+        """
+        Reconcile the stored torrent summaries with a full `torrents/info` list.
+        Torrents missing from the list are removed.
+
+        :return: Hashes of torrents that are new or whose summary changed.
+        """
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            known = self._versions(connection, "torrents", "hash")
+            rows, changed = [], []
+            for torrent in torrents:
+                torrent_hash = torrent.get("hash")
+                if not torrent_hash:
+                    continue
+                summary = tuple(torrent.get(field) for field in TORRENT_FIELDS)
+                version = record_version(summary)
+                if known.pop(torrent_hash, None) != version:
+                    changed.append(torrent_hash)
+                    rows.append((torrent_hash, *summary, version, now))
+            connection.executemany(
+                "INSERT INTO torrents (hash, name, category, state, tracker, added_on, last_activity, size, "
+                "version, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (hash) DO UPDATE SET name = excluded.name, category = excluded.category, "
+                "state = excluded.state, tracker = excluded.tracker, added_on = excluded.added_on, "
+                "last_activity = excluded.last_activity, size = excluded.size, version = excluded.version, "
+                "updated_at = excluded.updated_at",
+                rows,
+            )
+            connection.executemany("DELETE FROM torrents WHERE hash = ?", [(torrent_hash,) for torrent_hash in known])
+            self._mark_reconciled(connection, "torrents", now)
+        return changed
+
+    def remove_torrents(self, hashes: Iterable[str]) -> None:
+        """
+        Remove deleted torrents from the snapshot.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.executemany("DELETE FROM torrents WHERE hash = ?", [(torrent_hash,) for torrent_hash in hashes])
+
+    def torrents_older_than(self, days: float, exclude_categories: Iterable[str] = (),
+                            now: float = None) -> List[dict]:
+        """
+        Return the stored torrents added more than `days` ago, oldest first, leaving out the given
+        categories. Answered with one range scan of the (category, added_on) index per category,
+        without contacting qBittorrent.
+        """
+        cutoff = (now or time.time()) - days * SECONDS_PER_DAY
+        excluded = set(exclude_categories)
+        rows = []
+        with closing(self._connect()) as connection:
+            categories = [row[0] for row in connection.execute("SELECT DISTINCT category FROM torrents")]
+            for category in categories:
+                if category in excluded:
+                    continue
+                rows.extend(dict(row) for row in connection.execute(
+                    "SELECT * FROM torrents WHERE category IS ? AND added_on < ?", (category, cutoff)
+                ))
+        return sorted(rows, key=lambda row: row["added_on"])
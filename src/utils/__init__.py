@@ -1,6 +1,24 @@
 # utils/__init__.py
-from .utils import readable_size, format_date, print_torrent_details
-from .color_formatter import ColorFormatter
-from .logger import setup_logger, logger
+# Helpers are imported on first access, so e.g. importing the logger doesn't load the metrics server.
+# The logger is imported eagerly: `logger` would otherwise resolve to the submodule of the same name.
+import importlib
 
-__all__ = ['readable_size', 'format_date', 'print_torrent_details', 'logger', 'ColorFormatter', 'setup_logger']
\ No newline at end of file
+from .logger import setup_logger, flush_logging, drain_logging, logger
+
+_EXPORTS = {
+    'readable_size': '.utils',
+    'format_date': '.utils',
+    'print_torrent_details': '.utils',
+    'log_torrent_table': '.utils',
+    'ColorFormatter': '.color_formatter',
+    'start_metrics_server': '.metrics',
+}
+
+__all__ = ['readable_size', 'format_date', 'print_torrent_details', 'log_torrent_table', 'logger', 'ColorFormatter',
+           'setup_logger', 'flush_logging', 'drain_logging', 'start_metrics_server']
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        return getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -1,4 +1,8 @@
 import logging
+import re
+
+# Matches ANSI color codes, e.g. those embedded in messages by print_torrent_details.
+ANSI_ESCAPE = re.compile(r"\033\[[0-9;]*m")
 
 class ColorFormatter(logging.Formatter):
     """
@@ -22,30 +26,47 @@ class ColorFormatter(logging.Formatter):
     }
     RESET = "\033[0m"
 
-    def __init__(self, fmt=None, datefmt=None, service_name="", color: str = None):
+    def __init__(self, fmt=None, datefmt=None, service_name="", color: str = None, use_color: bool = True):
         """
         Initialize the formatter.
         :param fmt: Format string for log messages.
         :param datefmt: Date format string.
         :param service_name: Optional service name to include.
         :param color: Optional color name (e.g. 'red', 'blue') for the whole message.
+        :param use_color: If False, no colors are added and ANSI codes inside messages are stripped,
+            e.g. when the output is not a terminal.
         """
-        if fmt is None:
-            # Include the service name in the message if provided.
-            if service_name:
-                fmt = '%(asctime)s - %(levelname)s - {} - %(message)s'.format(service_name)
-            else:
-                fmt = '%(asctime)s - %(levelname)s - %(message)s'
-        super().__init__(fmt, datefmt)
+        super().__init__(fmt or self._default_format(service_name), datefmt)
+        self.custom_fmt = fmt
         self.service_name = service_name
-        # Retrieve the color code if provided.
-        self.color_code = self.COLORS.get(color.lower(), "") if color else ""
-        self.reset_code = self.RESET if self.color_code else ""
+        self.color = color
+        self.use_color = use_color
+        self._formatters = {}
+
+    @staticmethod
+    def _default_format(service_name: str) -> str:
+        # Include the service name in the message if provided.
+        if service_name:
+            return '%(asctime)s - %(levelname)s - {} - %(message)s'.format(service_name)
+        return '%(asctime)s - %(levelname)s - %(message)s'
 
     def format(self, record):
-        original = super().format(record)
-        if self.color_code:
+        # Records coming through the logging queue carry the service name and color of their logger.
+        service_name = getattr(record, "service_name", self.service_name)
+        color = getattr(record, "color", self.color)
+        if service_name == self.service_name or self.custom_fmt:
+            original = super().format(record)
+        else:
+            formatter = self._formatters.get(service_name)
+            if formatter is None:
+                formatter = logging.Formatter(self._default_format(service_name), self.datefmt)
+                self._formatters[service_name] = formatter
+            original = formatter.format(record)
+        if not self.use_color:
+            return ANSI_ESCAPE.sub("", original)
+        color_code = self.COLORS.get(color.lower(), "") if color else ""
+        if color_code:
             # Wrap the entire formatted message in the selected color.
-            return f"{self.color_code}{original}{self.reset_code}"
+            return f"{color_code}{original}{self.RESET}"
         else:
             return original
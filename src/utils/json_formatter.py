@@ -0,0 +1,33 @@
+import json
+import logging
+
+from src.utils.color_formatter import ANSI_ESCAPE
+
+
+class JsonFormatter(logging.Formatter):
+    """
+    Formatter that renders every record as one JSON object per line, for log collectors.
+    A `torrent` attribute on the record (set via `extra`) is included as structured data.
+    """
+
+    def __init__(self, datefmt=None, service_name=""):
+        """
+        :param datefmt: Date format string for the `time` field; ISO 8601 if not given.
+        :param service_name: Service name used for records that don't carry their own.
+        """
+        super().__init__(datefmt=datefmt or "%Y-%m-%dT%H:%M:%S%z")
+        self.service_name = service_name
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record, self.datefmt),
+            "level": record.levelname,
+            "service": getattr(record, "service_name", self.service_name) or record.name,
+            "message": ANSI_ESCAPE.sub("", record.getMessage()),
+        }
+        torrent = getattr(record, "torrent", None)
+        if torrent is not None:
+            entry["torrent"] = torrent
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
@@ -1,12 +1,118 @@
 # utils/logger.py
+import atexit
 import logging
+import os
+import queue
 import sys
+import threading
+from logging.handlers import QueueHandler, QueueListener
+
 from src.utils.color_formatter import ColorFormatter
+from src.utils.json_formatter import JsonFormatter
+
+DATE_FORMAT = '%d.%m.%Y %H:%M'
+LOG_FORMATS = ("text", "json")
+
+# Every logger hands its records to this queue; one background thread formats and writes them,
+# so worker threads never block on a slow stdout or container log driver.
+_log_queue = queue.SimpleQueue()
+_listener = None
+_listener_lock = threading.Lock()
+
+
+def log_format() -> str:
+    """
+    Return the configured output format: "json" if LOG_FORMAT=json, otherwise "text".
+    """
+    value = os.getenv("LOG_FORMAT", "text").lower()
+    return value if value in LOG_FORMATS else "text"
+
+
+def _stream_formatter(stream) -> logging.Formatter:
+    if log_format() == "json":
+        return JsonFormatter()
+    # Colors only make sense on a terminal; elsewhere they are stripped.
+    isatty = getattr(stream, "isatty", None)
+    return ColorFormatter(datefmt=DATE_FORMAT, use_color=bool(isatty and isatty()))
+
+
+def _release_barrier(record) -> bool:
+    # Barrier records from drain_logging are not written; they only signal that the writer got to them.
+    barrier = getattr(record, "barrier", None)
+    if barrier is not None:
+        barrier.set()
+        return False
+    return True
+
+
+def _start_listener() -> None:
+    global _listener
+    with _listener_lock:
+        if _listener is None:
+            handler = logging.StreamHandler(sys.stdout)
+            handler.setFormatter(_stream_formatter(sys.stdout))
+            handler.addFilter(_release_barrier)
+            _listener = QueueListener(_log_queue, handler, respect_handler_level=True)
+            _listener.start()
+
+
+def flush_logging() -> None:
+    """
+    Stop the background log writer after it wrote every queued record.
+    The next logged record starts it again.
+    """
+    global _listener
+    with _listener_lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+
+
+atexit.register(flush_logging)
+
+
+def drain_logging(timeout: float = 5.0) -> None:
+    """
+    Wait until the background writer has written every record queued so far, e.g. before
+    prompting the user so the prompt doesn't overtake the records it refers to.
+
+    :param timeout: Maximum seconds to wait.
+    """
+    if _listener is None:
+        return
+    barrier = threading.Event()
+    _log_queue.put(logging.makeLogRecord({"msg": "", "levelno": logging.CRITICAL, "barrier": barrier}))
+    barrier.wait(timeout)
+    sys.stdout.flush()
+
+
+class ServiceQueueHandler(QueueHandler):
+    """
+    Queue handler that tags records with their logger's service name and color, so the
+    background writer can format them like the logger's own ColorFormatter would.
+    """
+
+    def __init__(self, log_queue, service_name: str = "", color: str = None):
+        super().__init__(log_queue)
+        self.service_name = service_name
+        self.color = color
+
+    def prepare(self, record):
+        record = super().prepare(record)
+        record.service_name = self.service_name
+        record.color = self.color
+        return record
+
+    def enqueue(self, record):
+        if _listener is None:
+            _start_listener()
+        super().enqueue(record)
 
 
 def setup_logger(name, level=logging.INFO, service_name="", color: str = None):
     """
-    Configures and returns a logger with a stream handler that uses the ColorFormatter.
+    Configures and returns a logger whose records are written by a shared background thread,
+    formatted by the ColorFormatter on a terminal, plain text elsewhere, or JSON lines if LOG_FORMAT=json.
 
     :param name: The logger name.
     :param level: The logging level.
@@ -19,18 +125,13 @@ def setup_logger(name, level=logging.INFO, service_name="", color: str = None):
 
     # Add handler only once.
     if not inner_logger.handlers:
-        handler = logging.StreamHandler(sys.stdout)
+        handler = ServiceQueueHandler(_log_queue, service_name=service_name, color=color)
         handler.setLevel(level)
-        formatter = ColorFormatter(
-            datefmt='%d.%m.%Y %H:%M',
-            service_name=service_name,
-            color=color
-        )
-        handler.setFormatter(formatter)
         inner_logger.addHandler(handler)
 
     return inner_logger
 
 
 # Create a default logger for the module (without service name/color).
+# Cheap: the background writer thread only starts with the first record.
 logger = setup_logger(__name__)
@@ -0,0 +1,95 @@
+# utils/memory.py
+import gc
+import logging
+import os
+import sys
+import threading
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Set once the process went over REFINEARR_MAX_RSS_MB and should be recycled.
+recycle_requested = threading.Event()
+
+_libc = None
+
+
+def _malloc_trim() -> None:
+    # glibc keeps freed memory in its arenas; malloc_trim hands it back to the OS.
+    global _libc
+    if _libc is None:
+        import ctypes
+        try:
+            # The symbols already loaded into the process, which include the C library's.
+            _libc = ctypes.CDLL(None)
+        except (OSError, TypeError):
+            _libc = False
+    if _libc and hasattr(_libc, "malloc_trim"):
+        _libc.malloc_trim(0)
+
+
+def current_rss_bytes() -> Optional[int]:
+    """
+    Return the resident set size of this process, or its peak where the current one is not available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in KiB elsewhere.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def release_memory() -> None:
+    """
+    Release memory left over by a finished cycle: collect reference cycles (e.g. from exceptions
+    and their tracebacks) and return freed heap memory to the OS.
+    """
+    gc.collect()
+    _malloc_trim()
+
+
+def rss_limit_bytes() -> Optional[int]:
+    """
+    Return the RSS ceiling from REFINEARR_MAX_RSS_MB, or None if there is none.
+    """
+    limit = os.getenv("REFINEARR_MAX_RSS_MB")
+    return int(float(limit) * 1024 * 1024) if limit else None
+
+
+def check_rss_ceiling() -> bool:
+    """
+    Request a recycle of the process if its RSS is above REFINEARR_MAX_RSS_MB.
+
+    :return: True if a recycle is requested.
+    """
+    limit = rss_limit_bytes()
+    if limit is None or recycle_requested.is_set():
+        return recycle_requested.is_set()
+    rss = current_rss_bytes()
+    if rss is not None and rss > limit:
+        logger.warning("RSS of %.0f MiB is above the %.0f MiB ceiling; recycling the process after running jobs.",
+                       rss / 1024 ** 2, limit / 1024 ** 2)
+        recycle_requested.set()
+    return recycle_requested.is_set()
+
+
+def recycle_process() -> None:
+    """
+    Replace this process with a fresh copy of itself, started with the same arguments.
+    Callers must have finished their jobs and released their resources first.
+    """
+    from src.utils.logger import flush_logging
+
+    argv = list(getattr(sys, "orig_argv", None) or [sys.executable] + sys.argv)
+    logger.info("Recycling process: %s", " ".join(argv))
+    flush_logging()
+    sys.stdout.flush()
+    sys.stderr.flush()
+    os.execv(sys.executable, argv)
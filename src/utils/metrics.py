@@ -0,0 +1,282 @@
+# utils/metrics.py
+import json
+import logging
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """
+    Base class of a labelled metric in the Prometheus text format.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple, object] = {}
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.label_names)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """
+        The sample lines of this metric, one per label combination.
+        Subclasses must implement this.
+        """
+        pass
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labels)
+        self._callbacks: Dict[Tuple, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function: Callable[[], float], **labels) -> None:
+        """
+        Read the gauge's value from `function` at scrape time.
+        """
+        with self._lock:
+            self._callbacks[self._key(labels)] = function
+
+    def value(self, **labels) -> Optional[float]:
+        key = self._key(labels)
+        with self._lock:
+            callback = self._callbacks.get(key)
+            value = self._values.get(key)
+        return callback() if callback else value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+            callbacks = dict(self._callbacks)
+        for key, callback in callbacks.items():
+            try:
+                values[key] = callback()
+            except Exception:
+                logger.debug("Gauge callback for %s failed.", self.name, exc_info=True)
+        return [f"{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+            return sum(counts)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total)) for key, (counts, total) in self._values.items())
+        lines = []
+        for key, (counts, total) in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.label_names, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """
+    A collection of metrics rendered together in the Prometheus text exposition format.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labels))
+
+    def gauge(self, name: str, documentation: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labels))
+
+    def histogram(self, name: str, documentation: str, labels: Tuple[str, ...] = (), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labels, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return "\n".join(metric.render() for metric in metrics) + "\n"
+
+
+REGISTRY = Registry()
+
+JOB_DURATION = REGISTRY.histogram(
+    "refinearr_job_duration_seconds", "Duration of service job runs.", ("service",), DURATION_BUCKETS)
+JOB_RUNS = REGISTRY.counter("refinearr_job_runs_total", "Finished service job runs by result.", ("service", "result"))
+JOB_LAST_SUCCESS = REGISTRY.gauge(
+    "refinearr_job_last_success_timestamp_seconds", "Unix time of the last successful run.", ("service",))
+REQUEST_LATENCY = REGISTRY.histogram(
+    "refinearr_api_request_duration_seconds", "Latency of API requests.", ("service", "method", "endpoint"))
+REQUESTS = REGISTRY.counter(
+    "refinearr_api_requests_total", "API requests by response status.", ("service", "method", "endpoint", "status"))
+TORRENTS_EVALUATED = REGISTRY.counter("refinearr_torrents_evaluated_total", "Torrents checked for deletion.")
+TORRENTS_DELETED = REGISTRY.counter("refinearr_torrents_deleted_total", "Torrents deleted.")
+RENAME_COMMANDS = REGISTRY.counter(
+    "refinearr_rename_commands_total", "Rename commands queued in Sonarr.", ("result",))
+RESCAN_COMMANDS = REGISTRY.counter(
+    "refinearr_rescan_commands_total", "Rescan commands queued in Sonarr and Radarr after deletions.",
+    ("service", "result"))
+EXECUTOR_QUEUE_DEPTH = REGISTRY.gauge(
+    "refinearr_executor_queue_depth", "Jobs waiting for a worker in the shared pool.")
+FREE_SPACE = REGISTRY.gauge("refinearr_free_space_bytes", "Free space on the monitored download disk.")
+CACHE_LOOKUPS = REGISTRY.counter("refinearr_cache_lookups_total", "Cache lookups by result.", ("cache", "result"))
+
+# Last run per service, for the readiness route: {service: {"last_result": ..., "last_success": ...}}
+_health: Dict[str, dict] = {}
+_health_lock = threading.Lock()
+
+
+def record_job(service: str, duration: float, result: str) -> None:
+    """
+    Record a finished job run in the metrics and in the health state.
+
+    :param service: Name of the service.
+    :param duration: Duration of the run in seconds.
+    :param result: "success" or "error".
+    """
+    JOB_DURATION.observe(duration, service=service)
+    JOB_RUNS.inc(service=service, result=result)
+    now = time.time()
+    with _health_lock:
+        state = _health.setdefault(service, {"last_success": None})
+        state["last_result"] = result
+        state["last_run"] = now
+        if result == "success":
+            state["last_success"] = now
+    if result == "success":
+        JOB_LAST_SUCCESS.set(now, service=service)
+
+
+def health() -> Tuple[bool, dict]:
+    """
+    Return whether every service's last run succeeded, and the per-service health state.
+    """
+    with _health_lock:
+        services = {service: dict(state) for service, state in _health.items()}
+    ready = all(state.get("last_result") != "error" for state in services.values())
+    return ready, services
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status: int, body: str, content_type: str) -> None:
+        encoded = body.encode()
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(encoded)))
+        self.end_headers()
+        self.wfile.write(encoded)
+
+    def do_GET(self):
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            self._send(200, REGISTRY.render(), "text/plain; version=0.0.4; charset=utf-8")
+        elif path == "/healthz":
+            self._send(200, "ok\n", "text/plain")
+        elif path == "/readyz":
+            ready, services = health()
+            self._send(200 if ready else 503, json.dumps({"ready": ready, "services": services}), "application/json")
+        else:
+            self._send(404, "Not Found\n", "text/plain")
+
+
+def start_metrics_server(port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """
+    Serve /metrics (Prometheus text format), /healthz and /readyz from a daemon thread.
+
+    :param port: Port to listen on; 0 picks a free one.
+    :param host: Interface to bind to.
+    :return: The running server; call shutdown() to stop it.
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info("Serving metrics on %s:%d", host, server.server_address[1])
+    return server
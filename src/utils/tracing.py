@@ -0,0 +1,227 @@
+# utils/tracing.py
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Callable, Any, Dict, Optional
+
+from src.utils.logger import setup_logger
+
+logger = setup_logger(__name__, service_name="trace")
+
+PROFILE_MODES = ("cprofile", "sample")
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+_enabled = False
+_profile_mode: Optional[str] = None
+_local = threading.local()
+
+
+class _NullSpan:
+    """
+    Shared do-nothing span returned while tracing is disabled.
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("collector", "name", "start")
+
+    def __init__(self, collector: "StageTimings", name: str):
+        self.collector = collector
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.collector.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class StageTimings:
+    """
+    Accumulated call counts and seconds per stage of one traced run.
+    """
+
+    def __init__(self):
+        self.stages: Dict[str, list] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, seconds: float) -> None:
+        with self._lock:
+            stage = self.stages.setdefault(name, [0, 0.0])
+            stage[0] += 1
+            stage[1] += seconds
+
+    def summary(self, total: float = None) -> str:
+        """
+        Render the stages as a table, slowest first.
+        """
+        with self._lock:
+            stages = sorted(self.stages.items(), key=lambda item: item[1][1], reverse=True)
+        lines = [f"{'stage':<40} {'calls':>8} {'seconds':>10} {'share':>7}"]
+        for name, (calls, seconds) in stages:
+            share = f"{seconds / total:.1%}" if total else ""
+            lines.append(f"{name:<40} {calls:>8} {seconds:>10.3f} {share:>7}")
+        if total is not None:
+            lines.append(f"{'total':<40} {'':>8} {total:>10.3f}")
+        return "\n".join(lines)
+
+
+def enable(profile_mode: str = None) -> None:
+    """
+    Turn on tracing spans, and optionally profile the next traced run.
+
+    :param profile_mode: "cprofile" or "sample" to profile the next run, or None.
+    :raises ValueError: If the profile mode is unknown.
+    """
+    global _enabled, _profile_mode
+    if profile_mode and profile_mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{profile_mode}'. Use one of {PROFILE_MODES}.")
+    _enabled = True
+    _profile_mode = profile_mode or _profile_mode
+
+
+def enable_from_env() -> None:
+    """
+    Turn on tracing if REFINEARR_TRACE is set, and profiling of the next run if REFINEARR_PROFILE is.
+    """
+    profile_mode = os.getenv("REFINEARR_PROFILE", "").lower() or None
+    if profile_mode not in PROFILE_MODES + (None,):
+        logger.warning("Ignoring unknown REFINEARR_PROFILE '%s'. Use one of %s.", profile_mode, PROFILE_MODES)
+        profile_mode = None
+    if profile_mode or os.getenv("REFINEARR_TRACE", "").lower() in ("1", "true", "yes"):
+        enable(profile_mode)
+
+
+def disable() -> None:
+    global _enabled, _profile_mode
+    _enabled = False
+    _profile_mode = None
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def span(*name_parts: str):
+    """
+    Time a block of code as a stage of the current traced run.
+
+    The name is only joined when tracing is on; while it is off this returns a shared
+    no-op context manager, so instrumented hot paths cost one call and one flag check.
+
+    Usage: `with span("http", method, endpoint): ...`
+    """
+    if not _enabled:
+        return _NULL_SPAN
+    collector = getattr(_local, "collector", None)
+    if collector is None:
+        return _NULL_SPAN
+    return _Span(collector, " ".join(str(part) for part in name_parts))
+
+
+class SamplingProfiler:
+    """
+    Samples one thread's Python stack at a fixed interval and counts collapsed stacks,
+    in the `frame;frame;frame count` format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, thread_id: int = None, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.thread_id = thread_id or threading.get_ident()
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def start(self) -> "SamplingProfiler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w") as output:
+            for stack, count in self.stacks.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+def _profile(name: str, mode: str, job_func: Callable[..., Any], *args, **kwargs) -> Any:
+    output_dir = os.getenv("REFINEARR_PROFILE_DIR", "profiles")
+    os.makedirs(output_dir, exist_ok=True)
+    base = os.path.join(output_dir, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}")
+    if mode == "cprofile":
+        import cProfile
+        import io
+        import pstats
+        profiler = cProfile.Profile()
+        try:
+            return profiler.runcall(job_func, *args, **kwargs)
+        finally:
+            profiler.dump_stats(f"{base}.prof")
+            report = io.StringIO()
+            pstats.Stats(profiler, stream=report).sort_stats("cumulative").print_stats(15)
+            logger.info("Wrote cProfile stats to %s.prof\n%s", base, report.getvalue())
+    sampler = SamplingProfiler().start()
+    try:
+        return job_func(*args, **kwargs)
+    finally:
+        sampler.stop()
+        sampler.write_collapsed(f"{base}.collapsed")
+        logger.info("Wrote %d collapsed stack samples to %s.collapsed", sum(sampler.stacks.values()), base)
+
+
+def traced_run(name: str, job_func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Run a job, collecting its stage timings when tracing is on and profiling it if a
+    profile was requested. The profile request is consumed by this run.
+
+    :param name: Name of the run, used in the summary and profile file names.
+    :param job_func: The job to run.
+    :return: Whatever the job returns.
+    """
+    global _profile_mode
+    if not _enabled and not _profile_mode:
+        return job_func(*args, **kwargs)
+
+    mode, _profile_mode = _profile_mode, None
+    collector = StageTimings()
+    previous = getattr(_local, "collector", None)
+    _local.collector = collector
+    start = time.perf_counter()
+    try:
+        if mode:
+            return _profile(name, mode, job_func, *args, **kwargs)
+        return job_func(*args, **kwargs)
+    finally:
+        _local.collector = previous
+        if _enabled:
+            logger.info("Stage timings for %s:\n%s", name, collector.summary(time.perf_counter() - start))
+
+
+enable_from_env()
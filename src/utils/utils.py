@@ -1,5 +1,5 @@
 import time
-from src.utils.logger import logger
+from src.utils.logger import logger, log_format
 
 def readable_size(num_bytes):
     """Converts a size in bytes into a human-readable format (GiB, MiB, etc.)."""
@@ -34,16 +34,57 @@ def print_torrent_details(torrent):
     # Build each line with padding to ensure alignment.
     line_format = f"║ {{:<18}}: {{:<{width - 23}}}║"
 
-    logger.info(f"{color_purple}╔{border}╗{color_reset}")
     title = "Torrent Details"
-    # Center the title within the box width minus two border characters
-    logger.info(f"{color_purple}║{title:^{width-2}}║{color_reset}")
-    logger.info(f"{color_purple}╠{border}╣{color_reset}")
-    
-    logger.info(line_format.format("Name", name))
-    logger.info(line_format.format("Hash", torrent_hash))
-    logger.info(line_format.format("Added on", added_on))
-    logger.info(line_format.format("Last activity", last_activity))
-    logger.info(line_format.format("Size", size))
-    
-    logger.info(f"{color_purple}╚{border}╝{color_reset}")
\ No newline at end of file
+    # Log the whole box as one record, so its lines stay together.
+    lines = [
+        f"{color_purple}╔{border}╗{color_reset}",
+        # Center the title within the box width minus two border characters
+        f"{color_purple}║{title:^{width-2}}║{color_reset}",
+        f"{color_purple}╠{border}╣{color_reset}",
+        line_format.format("Name", name),
+        line_format.format("Hash", torrent_hash),
+        line_format.format("Added on", added_on),
+        line_format.format("Last activity", last_activity),
+        line_format.format("Size", size),
+        f"{color_purple}╚{border}╝{color_reset}",
+    ]
+    logger.info("\n".join(lines))
+
+TORRENT_TABLE_HEADER = f"{'HASH':<10} {'SIZE':>11} {'ADDED':<18} {'LAST ACTIVITY':<18} NAME"
+
+
+def torrent_summary(torrent):
+    """Returns the fields shown for a deletion candidate, as plain values for structured logs."""
+    return {
+        "hash": torrent.get('hash', 'N/A'),
+        "name": torrent.get('name', 'Unknown Name'),
+        "category": torrent.get('category'),
+        "size": torrent.get('size', 0),
+        "added_on": torrent.get('added_on'),
+        "last_activity": torrent.get('last_activity'),
+    }
+
+
+def log_torrent_table(torrents, log=None):
+    """
+    Logs deletion candidates compactly, one line per torrent, for non-interactive runs.
+    Each record also carries the torrent as structured data, which LOG_FORMAT=json renders in full.
+
+    :param torrents: Torrent dictionaries to log.
+    :param log: The logger to use; defaults to the utils logger.
+    """
+    log = log or logger
+    if not torrents:
+        return
+    if log_format() != "json":
+        log.info(TORRENT_TABLE_HEADER)
+    for torrent in torrents:
+        log.info(
+            "%-10s %11s %-18s %-18s %s",
+            torrent.get('hash', 'N/A')[:10],
+            readable_size(torrent.get('size', 0)),
+            format_date(torrent.get('added_on', 0)),
+            format_date(torrent.get('last_activity', 0)),
+            torrent.get('name', 'Unknown Name'),
+            extra={"torrent": torrent_summary(torrent)},
+        )
@@ -0,0 +1,284 @@
+# tests/benchmarks.py
+"""
+End-to-end performance benchmarks for the services, run against the fake server in a child process.
+
+Every (scenario, size) case records wall time, request count, CPU time and peak RSS. Results
+are written as JSON and can be compared against a stored baseline; the run fails when any
+metric regresses past its threshold.
+
+Usage:
+    python -m tests.benchmarks --sizes small,medium --output bench.json
+    python -m tests.benchmarks --baseline bench-baseline.json --threshold wall_seconds=1.5
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+
+from tests.fake_server import FakeLibrary, FakeServer
+
+SIZES = {
+    "small": {"torrents": 1_000, "series": 100, "movies": 1_000},
+    "medium": {"torrents": 10_000, "series": 1_000, "movies": 10_000},
+    "large": {"torrents": 100_000, "series": 10_000, "movies": 50_000},
+}
+
+SCENARIOS = ["qbit_cleanup", "sonarr_sweep", "radarr_analytics"]
+
+METRICS = ["wall_seconds", "cpu_seconds", "requests", "peak_rss_kib"]
+
+# Allowed ratio of current / baseline before a metric counts as a regression.
+DEFAULT_THRESHOLDS = {
+    "wall_seconds": 1.25,
+    "cpu_seconds": 1.25,
+    "requests": 1.0,
+    "peak_rss_kib": 1.25,
+}
+
+# Absolute slack per metric, so tiny baselines don't flap on timer noise.
+MIN_DELTA = {
+    "wall_seconds": 0.05,
+    "cpu_seconds": 0.05,
+    "requests": 0,
+    "peak_rss_kib": 4096,
+}
+
+
+@contextmanager
+def patched_env(values: dict):
+    """
+    Temporarily set environment variables, restoring the previous values afterwards.
+    """
+    previous = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def _drive(scenario: str) -> None:
+    # Imported lazily so the services read the environment pointing at the fake server.
+    from src.services.runtime import RuntimeContext
+    context = RuntimeContext()
+    try:
+        if scenario == "qbit_cleanup":
+            context.service("qbit").start(interactive=False)
+        elif scenario == "sonarr_sweep":
+            from src.services import SonarrService
+            SonarrService(sleep_interval=0, context=context).start()
+        elif scenario == "radarr_analytics":
+            context.client("radarr").get_large_movies(min_size_gb=2.0)
+        else:
+            raise ValueError(f"Unknown scenario: {scenario}")
+    finally:
+        context.shutdown()
+
+
+def _serve(size: str, latency: float, connection) -> None:
+    # Runs in the server process: builds the library, serves it until the client is done,
+    # then reports how many requests it answered.
+    library = FakeLibrary(seed=42, **SIZES[size])
+    with FakeServer(library, latency=latency) as server:
+        connection.send(server.env())
+        connection.recv()
+        connection.send(server.request_count)
+    connection.close()
+
+
+def run_scenario(scenario: str, size: str, latency: float = 0.0) -> dict:
+    """
+    Run one benchmark case in this process and return its measurements.
+
+    The fake server and its library live in a separate process, so wall time, CPU time and
+    peak RSS only count the services. Peak RSS is still the peak of this whole process; run
+    cases in separate processes (the CLI default) to isolate it.
+
+    :param scenario: One of SCENARIOS.
+    :param size: One of SIZES.
+    :param latency: Seconds of injected latency per request.
+    :return: A result dictionary with the METRICS for this case.
+    """
+    # Spawned rather than forked: this process may already run logging and HTTP pool threads.
+    processes = multiprocessing.get_context("spawn")
+    connection, server_connection = processes.Pipe()
+    server = processes.Process(target=_serve, args=(size, latency, server_connection), daemon=True)
+    server.start()
+    finished = False
+    try:
+        with patched_env(connection.recv()):
+            cpu_start = time.process_time()
+            wall_start = time.perf_counter()
+            _drive(scenario)
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+        connection.send("done")
+        requests_made = connection.recv()
+        finished = True
+    finally:
+        # A failed scenario never tells the server to stop.
+        if not finished:
+            server.terminate()
+        server.join()
+        connection.close()
+    return {
+        "scenario": scenario,
+        "size": size,
+        "wall_seconds": round(wall, 4),
+        "cpu_seconds": round(cpu, 4),
+        "requests": requests_made,
+        "peak_rss_kib": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def run_isolated(scenario: str, size: str, latency: float = 0.0) -> dict:
+    """
+    Run one benchmark case in a fresh interpreter so peak RSS belongs to that case alone.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as handle:
+        result_path = handle.name
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "tests.benchmarks", "--run-one", scenario, size,
+             "--latency", str(latency), "--result-file", result_path],
+            check=True,
+            stdout=subprocess.DEVNULL,
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        with open(result_path) as result_file:
+            return json.load(result_file)
+    finally:
+        os.unlink(result_path)
+
+
+def import_time(module: str = "src.main", repeat: int = 5, env: dict = None) -> dict:
+    """
+    Measure how long a fresh interpreter takes to import a module, best of `repeat` runs,
+    and which modules that import pulled in.
+
+    :param module: The module to import.
+    :param repeat: Number of fresh interpreters to start.
+    :param env: Extra environment variables for the interpreters.
+    :return: {"seconds": best import time, "modules": sorted module names loaded by the import}.
+    """
+    script = (
+        "import json, sys, time\n"
+        "before = set(sys.modules)\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        "print(json.dumps({'seconds': elapsed, 'modules': sorted(set(sys.modules) - before)}))\n"
+    )
+    best = None
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-c", script],
+            check=True,
+            capture_output=True,
+            text=True,
+            env={**os.environ, **(env or {})},
+            cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        )
+        result = json.loads(completed.stdout.splitlines()[-1])
+        if best is None or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def compare(results: list, baseline: list, thresholds: dict = None) -> list:
+    """
+    Compare results with a baseline and return a description of every regression.
+
+    :param results: Result dictionaries from this run.
+    :param baseline: Result dictionaries from the stored baseline.
+    :param thresholds: Allowed current/baseline ratio per metric; defaults to DEFAULT_THRESHOLDS.
+    :return: A list of human-readable regression messages; empty if nothing regressed.
+    """
+    thresholds = {**DEFAULT_THRESHOLDS, **(thresholds or {})}
+    previous = {(entry["scenario"], entry["size"]): entry for entry in baseline}
+    regressions = []
+    for entry in results:
+        reference = previous.get((entry["scenario"], entry["size"]))
+        if not reference:
+            continue
+        for metric, ratio in thresholds.items():
+            if metric not in entry or metric not in reference:
+                continue
+            allowed = max(reference[metric] * ratio, reference[metric] + MIN_DELTA.get(metric, 0))
+            if entry[metric] > allowed:
+                regressions.append(
+                    f"{entry['scenario']}[{entry['size']}] {metric}: {entry[metric]} > {allowed:.4g} "
+                    f"(baseline {reference[metric]}, threshold x{ratio})"
+                )
+    return regressions
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Refinearr end-to-end benchmarks")
+    parser.add_argument("--sizes", default="small", help=f"Comma separated sizes: {', '.join(SIZES)}.")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="Comma separated scenarios.")
+    parser.add_argument("--latency", type=float, default=0.0, help="Injected latency per request, in seconds.")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    parser.add_argument("--baseline", help="Baseline JSON file to compare against.")
+    parser.add_argument("--threshold", action="append", default=[], metavar="METRIC=RATIO",
+                        help="Override a regression threshold, e.g. wall_seconds=1.5.")
+    parser.add_argument("--in-process", action="store_true", help="Run all cases in this process.")
+    parser.add_argument("--run-one", nargs=2, metavar=("SCENARIO", "SIZE"), help=argparse.SUPPRESS)
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.run_one:
+        result = run_scenario(*args.run_one, latency=args.latency)
+        with open(args.result_file, "w") as result_file:
+            json.dump(result, result_file)
+        return 0
+
+    runner = run_scenario if args.in_process else run_isolated
+    results = []
+    for size in args.sizes.split(","):
+        for scenario in args.scenarios.split(","):
+            result = runner(scenario, size, latency=args.latency)
+            results.append(result)
+            print(f"{scenario:<18} {size:<7} wall={result['wall_seconds']:.3f}s cpu={result['cpu_seconds']:.3f}s "
+                  f"requests={result['requests']} peak_rss={result['peak_rss_kib']} KiB")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        thresholds = {}
+        for item in args.threshold:
+            metric, _, ratio = item.partition("=")
+            thresholds[metric] = float(ratio)
+        regressions = compare(results, baseline, thresholds)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
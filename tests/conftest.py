@@ -0,0 +1,29 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# main.py and some tests import the packages inside src/ directly (e.g. `from utils import ...`),
+# the way the Docker image runs `python src/main.py`.
+SRC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src")
+if SRC_DIR not in sys.path:
+    sys.path.insert(1, SRC_DIR)
+
+from src.services.runtime import reset_runtime
+from tests.fake_server import FakeLibrary, FakeServer
+
+
+@pytest.fixture
+def fake_server(monkeypatch):
+    """
+    A small fake qBittorrent/Sonarr/Radarr server with the service environment pointed at it.
+    """
+    library = FakeLibrary(torrents=200, series=20, movies=20, seed=1)
+    with FakeServer(library) as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        # Shared clients are bound to the URL they were created with.
+        reset_runtime()
+        yield server
+        reset_runtime()
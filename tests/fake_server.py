@@ -0,0 +1,475 @@
+# tests/fake_server.py
+"""
+In-process stand-in for the qBittorrent, Sonarr and Radarr endpoints used by Refinearr.
+
+The server generates a synthetic library of configurable size and can inject latency,
+errors and rate limits, so the services can be exercised at production scale without
+any real instances or network access.
+"""
+import hashlib
+import json
+import random
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+SECONDS_PER_DAY = 86400
+GIB = 1024 ** 3
+
+QBIT_USERNAME = "admin"
+QBIT_PASSWORD = "adminadmin"
+API_KEY = "fake-api-key"
+
+CATEGORIES = ["tv-sonarr", "radarr", "tv-sonarr", "radarr", "audiobooks", "ebooks", ""]
+STATES = ["stalledUP", "uploading", "pausedUP", "stalledUP", "queuedUP"]
+TRACKERS = [
+    "http://tracker.example.org:6969/announce",
+    "udp://open.example.net:1337/announce",
+    "https://private.example.com/announce",
+]
+# Health of a torrent's tracker, as reported by `torrents/trackers`.
+TRACKER_WORKING = "working"
+TRACKER_UNREGISTERED = "unregistered"
+TRACKER_DEAD = "dead"
+
+
+class FakeLibrary:
+    """
+    A deterministic synthetic library of torrents, series and movies.
+    """
+
+    def __init__(
+        self,
+        torrents: int = 1000,
+        series: int = 100,
+        movies: int = 100,
+        seasons_per_series: int = 3,
+        rename_ratio: float = 0.1,
+        seed: int = 0,
+        now: float = None,
+        unregistered_ratio: float = 0.05,
+        dead_ratio: float = 0.05,
+    ):
+        """
+        Generate the library.
+
+        :param torrents: Number of torrents in qBittorrent.
+        :param series: Number of series in Sonarr.
+        :param movies: Number of movies in Radarr.
+        :param seasons_per_series: Number of seasons every series has.
+        :param rename_ratio: Fraction of seasons that have episodes waiting to be renamed.
+        :param seed: Seed for the random generator, so libraries are reproducible.
+        :param now: Reference time (Unix timestamp) the torrent ages are relative to.
+        :param unregistered_ratio: Fraction of torrents whose tracker reports them as unregistered.
+        :param dead_ratio: Fraction of torrents without any working tracker.
+        """
+        self.now = now if now is not None else time.time()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.torrents = {}
+        for index in range(torrents):
+            torrent = self._make_torrent(index)
+            self.torrents[torrent["hash"]] = torrent
+        self.series = [self._make_series(series_id, seasons_per_series) for series_id in range(1, series + 1)]
+        self.series_by_id = {series["id"]: series for series in self.series}
+        self.movies = [self._make_movie(movie_id) for movie_id in range(1, movies + 1)]
+        self.renames = {}
+        for series in self.series:
+            for season in series["seasons"]:
+                if self.rng.random() < rename_ratio:
+                    key = (series["id"], season["seasonNumber"])
+                    first_file = series["id"] * 1000 + season["seasonNumber"] * 100
+                    self.renames[key] = [first_file + episode for episode in range(1, self.rng.randint(2, 6))]
+        self.commands = []
+        # Sonarr/Radarr history and queue records; Sonarr's carry a seriesId, Radarr's a movieId.
+        self.history = []
+        self.queue = []
+        for torrent in self.torrents.values():
+            self._grab(torrent)
+        self.rid = 1
+        self.free_space = 500 * GIB
+        self._torrents_body = None
+        # Drawn from a separate generator, so the torrents above stay the same for a given seed.
+        health_rng = random.Random(seed + 1)
+        self.tracker_health = {}
+        for torrent_hash, torrent in self.torrents.items():
+            draw = health_rng.random()
+            if draw < unregistered_ratio:
+                self.tracker_health[torrent_hash] = TRACKER_UNREGISTERED
+            elif draw < unregistered_ratio + dead_ratio:
+                self.tracker_health[torrent_hash] = TRACKER_DEAD
+            else:
+                self.tracker_health[torrent_hash] = TRACKER_WORKING
+            if self.tracker_health[torrent_hash] != TRACKER_WORKING:
+                # Like qBittorrent, the `tracker` field is empty while no tracker is working.
+                torrent["tracker"] = ""
+
+    def _make_torrent(self, index: int) -> dict:
+        added_on = int(self.now - self.rng.uniform(0, 60) * SECONDS_PER_DAY)
+        last_activity = int(self.rng.uniform(added_on, self.now))
+        return {
+            "hash": hashlib.sha1(f"torrent-{index}".encode()).hexdigest(),
+            "name": f"Synthetic.Torrent.{index:06d}.1080p.WEB-DL",
+            "category": CATEGORIES[index % len(CATEGORIES)],
+            "state": self.rng.choice(STATES),
+            "tracker": TRACKERS[index % len(TRACKERS)],
+            "added_on": added_on,
+            "completion_on": added_on + 600,
+            "last_activity": last_activity,
+            "size": self.rng.randint(50 * 1024 ** 2, 40 * GIB),
+            "uploaded": self.rng.randint(0, 80 * GIB),
+            "num_leechs": self.rng.randint(0, 5),
+            "num_seeds": self.rng.randint(0, 50),
+            "ratio": round(self.rng.uniform(0, 5), 3),
+            "save_path": "/downloads/",
+        }
+
+    def _make_series(self, series_id: int, seasons: int) -> dict:
+        return {
+            "id": series_id,
+            "title": f"Synthetic Series {series_id}",
+            "added": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(self.now - series_id * 3600)),
+            "seasons": [{"seasonNumber": number, "monitored": True} for number in range(1, seasons + 1)],
+        }
+
+    def _make_movie(self, movie_id: int) -> dict:
+        return {
+            "id": movie_id,
+            "title": f"Synthetic Movie {movie_id}",
+            "sizeOnDisk": self.rng.randint(0, 60 * GIB),
+        }
+
+    def _grab(self, torrent: dict) -> None:
+        index = int(torrent["name"].split(".")[2])
+        if torrent["category"] == "tv-sonarr" and self.series:
+            self.add_history(torrent["hash"], torrent["added_on"], series_id=self.series[index % len(self.series)]["id"])
+        elif torrent["category"] == "radarr" and self.movies:
+            self.add_history(torrent["hash"], torrent["added_on"], movie_id=self.movies[index % len(self.movies)]["id"])
+
+    def add_history(self, torrent_hash: str, timestamp: float, series_id: int = None, movie_id: int = None,
+                    queued: bool = False) -> dict:
+        """
+        Record a grab of a torrent by Sonarr (series_id) or Radarr (movie_id), in the history or,
+        if `queued`, in the download queue.
+        """
+        record = {
+            "downloadId": torrent_hash.upper(),
+            "date": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp)),
+            "eventType": "grabbed",
+        }
+        record.update({"seriesId": series_id} if series_id is not None else {"movieId": movie_id})
+        with self.lock:
+            target = self.queue if queued else self.history
+            record["id"] = len(target) + 1
+            target.append(record)
+        return record
+
+    def torrents_body(self) -> bytes:
+        """
+        Return the encoded `torrents/info` payload, caching it until the library changes.
+        """
+        with self.lock:
+            if self._torrents_body is None:
+                self._torrents_body = json.dumps(list(self.torrents.values())).encode()
+            return self._torrents_body
+
+    def set_tracker_health(self, torrent_hash: str, health: str) -> None:
+        """
+        Change what a torrent's tracker reports, updating its `tracker` field to match.
+        """
+        with self.lock:
+            torrent = self.torrents[torrent_hash]
+            self.tracker_health[torrent_hash] = health
+            index = int(torrent["name"].split(".")[2])
+            torrent["tracker"] = TRACKERS[index % len(TRACKERS)] if health == TRACKER_WORKING else ""
+            self._torrents_body = None
+            self.rid += 1
+
+    def trackers(self, torrent_hash: str):
+        """
+        Return the `torrents/trackers` payload of a torrent, or None if it doesn't exist.
+        """
+        with self.lock:
+            torrent = self.torrents.get(torrent_hash)
+            if torrent is None:
+                return None
+            health = self.tracker_health.get(torrent_hash, TRACKER_WORKING)
+            index = int(torrent["name"].split(".")[2])
+        status, message = {
+            TRACKER_WORKING: (2, ""),
+            TRACKER_UNREGISTERED: (4, "Unregistered torrent"),
+            TRACKER_DEAD: (4, "Connection timed out"),
+        }[health]
+        pseudo = [{"url": f"** [{name}] **", "status": 0 if name != "DHT" else 2, "tier": -1, "num_peers": 0,
+                   "msg": ""} for name in ("DHT", "PeX", "LSD")]
+        return pseudo + [{"url": TRACKERS[index % len(TRACKERS)], "status": status, "tier": 0,
+                          "num_peers": 0 if status != 2 else 10, "msg": message}]
+
+    def delete_torrents(self, hashes: str) -> int:
+        """
+        Delete torrents by a `|` separated list of hashes (or `all`).
+
+        :return: The number of torrents removed.
+        """
+        with self.lock:
+            if hashes == "all":
+                removed = len(self.torrents)
+                self.torrents.clear()
+            else:
+                removed = sum(1 for torrent_hash in hashes.split("|") if self.torrents.pop(torrent_hash, None))
+            if removed:
+                self._torrents_body = None
+                self.rid += 1
+            return removed
+
+
+class FakeServer:
+    """
+    A threaded HTTP server serving a FakeLibrary on 127.0.0.1.
+
+    Usable as a context manager; `url` is the base URL to hand to the API clients.
+    """
+
+    def __init__(
+        self,
+        library: FakeLibrary = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: float = None,
+        seed: int = 0,
+    ):
+        """
+        :param library: The library to serve; a default-sized one is generated if omitted.
+        :param latency: Seconds to sleep before answering each request.
+        :param error_rate: Probability (0-1) that a request is answered with a 500 error.
+        :param rate_limit: Maximum requests per second before answering 429, or None for no limit.
+        :param seed: Seed for the error injection.
+        """
+        self.library = library or FakeLibrary()
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit = rate_limit
+        self.rng = random.Random(seed)
+        self.requests = Counter()
+        self.lock = threading.Lock()
+        self.sid = hashlib.sha1(str(seed).encode()).hexdigest()[:32]
+        self._tokens = rate_limit or 0.0
+        self._last_refill = time.monotonic()
+        self._httpd = ThreadingHTTPServer(("127.0.0.1", 0), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def request_count(self) -> int:
+        with self.lock:
+            return sum(self.requests.values())
+
+    def start(self) -> "FakeServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, kwargs={"poll_interval": 0.05},
+                                        name="fake-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self) -> "FakeServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def env(self) -> dict:
+        """
+        Environment variables pointing all three services at this server.
+        """
+        return {
+            "QBIT_BASE_URL": self.url,
+            "QBIT_USERNAME": QBIT_USERNAME,
+            "QBIT_PASSWORD": QBIT_PASSWORD,
+            "SONARR_BASE_URL": self.url,
+            "SONARR_API_KEY": API_KEY,
+            "RADARR_BASE_URL": self.url,
+            "RADARR_API_KEY": API_KEY,
+        }
+
+    def _admit(self, endpoint: str) -> int:
+        """
+        Account for a request and decide whether it should be failed.
+
+        :return: 0 to serve normally, otherwise the HTTP status to fail with.
+        """
+        with self.lock:
+            self.requests[endpoint] += 1
+            if self.rate_limit:
+                now = time.monotonic()
+                self._tokens = min(self.rate_limit, self._tokens + (now - self._last_refill) * self.rate_limit)
+                self._last_refill = now
+                if self._tokens < 1:
+                    return 429
+                self._tokens -= 1
+            if self.error_rate and self.rng.random() < self.error_rate:
+                return 500
+        return 0
+
+
+def _make_handler(server: FakeServer):
+    library = server.library
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def _send(self, status: int, body=b"", content_type: str = "application/json", headers: dict = None):
+            if not isinstance(body, bytes):
+                body = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _read_body(self) -> bytes:
+            length = int(self.headers.get("Content-Length") or 0)
+            return self.rfile.read(length) if length else b""
+
+        def _dispatch(self, method: str):
+            parsed = urlparse(self.path)
+            query = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+            body = self._read_body() if method == "POST" else b""
+            parts = parsed.path.strip("/").split("/")
+            if len(parts) < 3 or parts[0] != "api":
+                self._send(404, b"Not Found", "text/plain")
+                return
+            endpoint = "/".join(part if not part.isdigit() else "{id}" for part in parts[2:])
+            status = server._admit(endpoint)
+            if server.latency:
+                time.sleep(server.latency)
+            if status == 429:
+                self._send(429, b"Too Many Requests", "text/plain", {"Retry-After": "1"})
+                return
+            if status:
+                self._send(status, b"Injected failure", "text/plain")
+                return
+            if parts[1] == "v2":
+                self._qbit(method, "/".join(parts[2:]), query, body)
+            elif parts[1] == "v3":
+                if query.get("apikey") != API_KEY and self.headers.get("X-Api-Key") != API_KEY:
+                    self._send(401, {"error": "Unauthorized"})
+                    return
+                self._arr(method, parts[2:], query, body)
+            else:
+                self._send(404, b"Not Found", "text/plain")
+
+        def _form(self, body: bytes) -> dict:
+            return {key: values[-1] for key, values in parse_qs(body.decode()).items()}
+
+        def _qbit(self, method: str, endpoint: str, query: dict, body: bytes):
+            if endpoint == "auth/login" and method == "POST":
+                form = self._form(body)
+                if form.get("username") == QBIT_USERNAME and form.get("password") == QBIT_PASSWORD:
+                    self._send(200, b"Ok.", "text/plain", {"Set-Cookie": f"SID={server.sid}; path=/"})
+                else:
+                    self._send(200, b"Fails.", "text/plain")
+                return
+            if f"SID={server.sid}" not in (self.headers.get("Cookie") or ""):
+                self._send(403, b"Forbidden", "text/plain")
+                return
+            if endpoint == "torrents/info" and method == "GET":
+                if "hashes" in query:
+                    with library.lock:
+                        selected = [library.torrents[torrent_hash] for torrent_hash in query["hashes"].split("|")
+                                    if torrent_hash in library.torrents]
+                    self._send(200, selected)
+                else:
+                    self._send(200, library.torrents_body())
+            elif endpoint == "torrents/delete" and method == "POST":
+                library.delete_torrents(self._form(body).get("hashes", ""))
+                self._send(200, b"", "text/plain")
+            elif endpoint == "torrents/trackers" and method == "GET":
+                trackers = library.trackers(query.get("hash", ""))
+                if trackers is None:
+                    self._send(404, b"Torrent hash was not found", "text/plain")
+                else:
+                    self._send(200, trackers)
+            elif endpoint == "sync/maindata" and method == "GET":
+                self._send(200, self._maindata(int(query.get("rid", 0))))
+            else:
+                self._send(404, b"Not Found", "text/plain")
+
+        def _maindata(self, rid: int) -> dict:
+            with library.lock:
+                torrents = {} if rid == library.rid else dict(library.torrents)
+                current_rid = library.rid
+            return {
+                "rid": current_rid,
+                "full_update": rid == 0,
+                "torrents": torrents,
+                "server_state": {"free_space_on_disk": library.free_space},
+            }
+
+        def _page(self, records: list, query: dict) -> dict:
+            page, page_size = int(query.get("page", 1)), int(query.get("pageSize", 10))
+            return {"page": page, "pageSize": page_size, "totalRecords": len(records),
+                    "records": records[(page - 1) * page_size:page * page_size]}
+
+        def _arr(self, method: str, parts: list, query: dict, body: bytes):
+            resource = parts[0]
+            if resource == "series" and method == "GET":
+                if len(parts) == 1:
+                    self._send(200, library.series)
+                    return
+                series = library.series_by_id.get(int(parts[1]))
+                if series is None:
+                    self._send(404, {"message": "NotFound"})
+                else:
+                    self._send(200, series)
+            elif resource == "rename" and method == "GET":
+                key = (int(query.get("seriesId", 0)), int(query.get("seasonNumber", 0)))
+                files = library.renames.get(key, [])
+                self._send(200, [{"seriesId": key[0], "seasonNumber": key[1], "episodeFileId": file_id}
+                                 for file_id in files])
+            elif resource == "command" and method == "POST":
+                command = json.loads(body or b"{}")
+                with library.lock:
+                    command["id"] = len(library.commands) + 1
+                    library.commands.append(command)
+                self._send(201, command)
+            elif resource == "movie" and method == "GET":
+                self._send(200, library.movies)
+            elif resource == "history" and method == "GET":
+                with library.lock:
+                    records = sorted(library.history, key=lambda record: record["date"], reverse=True)
+                if len(parts) > 1 and parts[1] == "since":
+                    self._send(200, [record for record in records if record["date"] >= query.get("date", "")])
+                else:
+                    self._send(200, self._page(records, query))
+            elif resource == "queue" and method == "GET":
+                with library.lock:
+                    records = list(library.queue)
+                self._send(200, self._page(records, query))
+            else:
+                self._send(404, {"message": "NotFound"})
+
+    return Handler
@@ -0,0 +1,92 @@
+# tests/test_activity.py
+from src.services import qbit
+from src.services.activity import ActivityHistory
+from src.services.runtime import RuntimeContext
+
+DAY = 86400
+HOUR = 3600
+START = 1_700_000_000 - 1_700_000_000 % DAY
+
+
+def _torrent(torrent_hash, uploaded, peers=0, **fields):
+    return {"hash": torrent_hash, "uploaded": uploaded, "num_leechs": peers, "num_seeds": 0, **fields}
+
+
+def test_upload_rate_and_peers_over_window():
+    history = ActivityHistory(retention_days=3, bucket_minutes=60)
+    uploaded = {"busy": 0, "idle": 0}
+    for hour in range(3 * 24 + 1):
+        history.record([_torrent("busy", uploaded["busy"], peers=hour % 5),
+                        _torrent("idle", uploaded["idle"])], START + hour * HOUR)
+        uploaded["busy"] += 3600 * 1024
+        # A short peer connection that would reset last_activity.
+        uploaded["idle"] += 4096 if hour == 40 else 0
+    now = START + 3 * DAY
+    # 48 hourly buckets in the window, plus the one it starts in.
+    assert history.uploaded("busy", 2, now) == 49 * 3600 * 1024
+    assert history.upload_rate("busy", 2, now) >= 1024
+    assert history.uploaded("idle", 2, now) == 4096
+    assert history.max_peers("busy", 1, now) == 4
+    # Not watched for the whole window.
+    assert history.upload_rate("busy", 4, now) is None
+    assert history.upload_rate("unknown", 1, now) is None
+
+
+def test_ring_wraps_and_reuses_slots():
+    history = ActivityHistory(retention_days=1, bucket_minutes=360)
+    for step in range(20):
+        history.record([_torrent("a", step * 1024 * 1024)], START + step * 6 * HOUR)
+    # Only the last day counts: 4 buckets of 1 MiB, plus the partly overlapping oldest one.
+    assert history.uploaded("a", 1, START + 19 * 6 * HOUR) == 5 * 1024 * 1024
+
+    history.record([_torrent("b", 10)], START + 20 * 6 * HOUR)
+    assert len(history) == 1 and history.free == [0]
+    # A new torrent takes the freed slot, without the old torrent's samples.
+    history.record([_torrent("b", 10), _torrent("c", 10)], START + 21 * 6 * HOUR)
+    assert history.slots["c"] == 0 and not any(history.uploads[:history.capacity])
+
+
+def test_fifty_thousand_torrents_fit_in_a_few_megabytes():
+    history = ActivityHistory()
+    history.record([_torrent(f"{index:040x}", index) for index in range(50_000)], START)
+    assert history.nbytes < 10 * 1024 * 1024
+
+
+def test_save_and_load(tmp_path):
+    path = str(tmp_path / "history.bin")
+    history = ActivityHistory(retention_days=1, bucket_minutes=60)
+    for hour in range(30):
+        history.record([_torrent("a", hour * 2048), _torrent("b", 0)], START + hour * HOUR)
+    history.save(path)
+
+    restored = ActivityHistory(retention_days=1, bucket_minutes=60)
+    assert restored.load(path)
+    now = START + 29 * HOUR
+    assert restored.uploaded("a", 1, now) == history.uploaded("a", 1, now)
+    assert not ActivityHistory(retention_days=2, bucket_minutes=60).load(path)
+
+
+def test_idle_torrent_is_deleted_despite_recent_activity(monkeypatch):
+    monkeypatch.setattr(qbit, "IDLE_DAYS", 2)
+    monkeypatch.setattr(qbit, "IDLE_MAX_UPLOAD_KIBPS", 1)
+    history = ActivityHistory(retention_days=2, bucket_minutes=60)
+    for hour in range(2 * 24 + 1):
+        history.record([_torrent("idle", hour * 1024), _torrent("busy", hour * 10 * 1024 * 1024)], START + hour * HOUR)
+    now = START + 2 * DAY
+    old = {"added_on": now - 100 * DAY, "last_activity": now - 60, "category": "tv"}
+    assert qbit.QbitService.is_ready_for_delete(_torrent("idle", 0, **old), now, history=history)
+    assert not qbit.QbitService.is_ready_for_delete(_torrent("busy", 0, **old), now, history=history)
+    # Without history coverage, last_activity still decides.
+    assert not qbit.QbitService.is_ready_for_delete(_torrent("new", 0, **old), now, history=history)
+
+
+def test_service_records_history(fake_server, monkeypatch, tmp_path):
+    monkeypatch.setenv("QBIT_IDLE_DAYS", "1")
+    monkeypatch.setenv("QBIT_HISTORY_PATH", str(tmp_path / "history.bin"))
+    context = RuntimeContext()
+    service = context.service("qbit")
+    monkeypatch.setattr(service, "is_ready_for_delete", lambda *args: False)
+    service.start(interactive=False)
+    context.shutdown()
+    assert len(service.history) == len(fake_server.library.torrents)
+    assert ActivityHistory.from_env().slots == service.history.slots
@@ -1,37 +1,45 @@
 # tests/test_api.py
-import os
-import requests
-from src.api import login
-from unittest.mock import patch
-
-def fake_response(text, status_code):
-    """Utility for creating a fake response object."""
-    response = requests.Response()
-    response._content = text.encode("utf-8")
-    response.status_code = status_code
-    return response
-
-@patch('api.qbittorrent_api.session.post')
-def test_login_success(mock_post):
-    # Simulate a successful login returning "Ok." with status 200.
-    mock_post.return_value = fake_response("Ok.", 200)
-    
-    # Set up environment variables.
-    os.environ['QBIT_USERNAME'] = 'test'
-    os.environ['QBIT_PASSWORD'] = 'test'
-    os.environ['QBIT_BASE_URL'] = 'http://fake-url/api/v2'
-    
-    # Call login() and expect True.
-    assert login() is True
-
-@patch('api.qbittorrent_api.session.post')
-def test_login_failure(mock_post):
-    # Simulate a failed login returning error text like "Not Found" with a 404 error.
-    mock_post.return_value = fake_response("Not Found", 404)
-    
-    os.environ['USERNAME'] = 'test'
-    os.environ['PASSWORD'] = 'test'
-    os.environ['QBIT_BASE_URL'] = 'http://fake-url/api/v2'
-    
-    # Call login() and expect False.
-    assert login() is False
+from src.api import QbitAPI, SonarrAPI, RadarrAPI
+from tests.fake_server import QBIT_USERNAME, QBIT_PASSWORD
+
+
+def test_login_success(fake_server):
+    qbit = QbitAPI(base_url=fake_server.url, username=QBIT_USERNAME, password=QBIT_PASSWORD)
+    assert qbit.login() is True
+
+
+def test_login_failure(fake_server):
+    qbit = QbitAPI(base_url=fake_server.url, username=QBIT_USERNAME, password="wrong")
+    assert qbit.login() is False
+
+
+def test_list_and_delete_torrents(fake_server):
+    qbit = QbitAPI()
+    assert qbit.login()
+    torrents = qbit.list_torrents()
+    assert len(torrents) == 200
+
+    qbit.delete_torrent(torrents[0]["name"], torrents[0]["hash"])
+    remaining = qbit.list_torrents()
+    assert len(remaining) == 199
+    assert torrents[0]["hash"] not in {torrent["hash"] for torrent in remaining}
+
+
+def test_list_torrents_requires_login(fake_server):
+    qbit = QbitAPI()
+    assert qbit.list_torrents() == []
+
+
+def test_sonarr_series_and_rename_command(fake_server):
+    sonarr = SonarrAPI()
+    series = sonarr.get_all_series()
+    assert len(series) == 20
+    assert sonarr.get_series_name(series[0]["id"]) == series[0]["title"]
+    assert sonarr.rename_series_command(series[0]["id"], [1, 2]) is True
+    assert fake_server.library.commands[-1]["name"] == "RenameFiles"
+
+
+def test_radarr_large_movies(fake_server):
+    radarr = RadarrAPI()
+    large = radarr.get_large_movies(min_size_gb=30)
+    assert all(movie["sizeOnDisk"] > 30 * 1024 ** 3 for movie in large)
@@ -0,0 +1,81 @@
+# tests/test_base_service.py
+import threading
+import time
+
+import pytest
+
+from src.services.base_service import BaseService
+
+
+class BlockingService(BaseService):
+    """
+    A service whose job blocks until released, to observe overlapping triggers.
+    """
+    def __init__(self, overlap_policy: str = None):
+        super().__init__(overlap_policy=overlap_policy)
+        self.release = threading.Event()
+        self.started = threading.Semaphore(0)
+        self.calls = 0
+
+    def run_job(self, *args, **kwargs):
+        self.calls += 1
+        self.started.release()
+        self.release.wait(timeout=5)
+
+
+def _overlap(policy: str, triggers: int) -> BlockingService:
+    service = BlockingService(overlap_policy=policy)
+    service.run_threaded(service.run_job)
+    assert service.started.acquire(timeout=5)
+    for _ in range(triggers):
+        assert service.run_threaded(service.run_job) is None
+    service.release.set()
+    deadline = time.time() + 5
+    while service.get_job_state().running and time.time() < deadline:
+        time.sleep(0.01)
+    service.shutdown(wait=True)
+    return service
+
+
+@pytest.mark.parametrize("policy, expected_calls", [("skip", 1), ("coalesce", 2), ("queue", 4)])
+def test_overlapping_triggers_follow_policy(policy, expected_calls):
+    service = _overlap(policy, triggers=3)
+    assert service.calls == expected_calls
+    state = service.get_job_state()
+    assert state.runs == expected_calls
+    assert state.running is False
+    assert state.last_result == "success"
+    assert state.skipped == (3 if policy == "skip" else 0)
+
+
+def test_finished_futures_are_pruned():
+    service = BlockingService()
+    service.release.set()
+    for _ in range(20):
+        future = service.run_threaded(service.run_job)
+        if future:
+            future.result(timeout=5)
+    service.shutdown(wait=True)
+    assert service.active_futures == []
+
+
+def test_failed_job_records_error():
+    class FailingService(BaseService):
+        def run_job(self, *args, **kwargs):
+            raise RuntimeError("boom")
+
+    service = FailingService()
+    service.run_threaded(service.run_job).result(timeout=5)
+    service.shutdown(wait=True)
+    state = service.get_job_state()
+    assert state.last_result == "error"
+    assert state.last_error == "boom"
+    assert state.last_duration is not None
+
+
+def test_overlap_policy_from_environment(monkeypatch):
+    monkeypatch.setenv("OVERLAP_POLICY", "queue")
+    assert BlockingService().overlap_policy == "queue"
+    monkeypatch.setenv("OVERLAP_POLICY", "sometimes")
+    with pytest.raises(ValueError):
+        BlockingService()
@@ -0,0 +1,42 @@
+# tests/test_benchmarks.py
+import multiprocessing
+import time
+
+import pytest
+
+from tests.benchmarks import compare, run_scenario, METRICS
+
+
+def _result(**overrides):
+    result = {"scenario": "qbit_cleanup", "size": "small", "wall_seconds": 1.0, "cpu_seconds": 1.0,
+              "requests": 100, "peak_rss_kib": 50_000}
+    result.update(overrides)
+    return result
+
+
+def test_run_scenario_records_all_metrics():
+    result = run_scenario("radarr_analytics", "small")
+    assert all(metric in result for metric in METRICS)
+    assert result["requests"] == 1
+
+
+def test_compare_flags_regressions():
+    baseline = [_result()]
+    assert compare([_result(wall_seconds=1.1)], baseline) == []
+    regressions = compare([_result(wall_seconds=2.0, requests=101)], baseline)
+    assert len(regressions) == 2
+    assert any("requests" in regression for regression in regressions)
+
+
+def test_compare_custom_threshold_and_unknown_cases():
+    baseline = [_result()]
+    assert compare([_result(wall_seconds=2.0)], baseline, {"wall_seconds": 2.5}) == []
+    assert compare([_result(size="large", wall_seconds=100.0)], baseline) == []
+
+
+def test_failed_scenario_stops_the_server():
+    started = time.perf_counter()
+    with pytest.raises(ValueError):
+        run_scenario("unknown", "small")
+    assert time.perf_counter() - started < 5
+    assert not multiprocessing.active_children()
@@ -0,0 +1,75 @@
+# tests/test_downloads.py
+import hashlib
+import socket
+
+from src.services import downloads
+from src.services.downloads import DownloadIndex
+from src.services.runtime import RuntimeContext
+
+
+def _expected(library, id_field):
+    return {record["downloadId"].lower(): record[id_field] for record in library.history if id_field in record}
+
+
+def test_index_reads_history_once_then_incrementally(fake_server, monkeypatch):
+    library = fake_server.library
+    monkeypatch.setattr(downloads, "PAGE_SIZE", 25)
+    context = RuntimeContext()
+    index = DownloadIndex(context.client("sonarr"), "seriesId")
+
+    expected = _expected(library, "seriesId")
+    assert index.refresh() == len(expected)
+    assert index.ids == expected
+    assert fake_server.requests["history"] == -(-len(library.history) // 25)
+
+    new_hash = hashlib.sha1(b"new").hexdigest()
+    queued_hash = hashlib.sha1(b"queued").hexdigest()
+    library.add_history(new_hash, library.now + 60, series_id=3)
+    library.add_history(queued_hash, library.now + 120, series_id=4, queued=True)
+    assert index.refresh() == 2
+    assert fake_server.requests["history"] == -(-(len(library.history) - 1) // 25)
+    assert fake_server.requests["history/since"] == 1
+    assert index.lookup([new_hash, queued_hash.upper(), "unknown"]) == [3, 4]
+    assert new_hash not in index.ids
+    context.shutdown()
+
+
+def test_cleanup_rescans_only_affected_items(fake_server):
+    library = fake_server.library
+    series_by_hash = _expected(library, "seriesId")
+    movies_by_hash = _expected(library, "movieId")
+    before = set(library.torrents)
+
+    context = RuntimeContext()
+    context.service("qbit").start(interactive=False)
+    context.shutdown()
+
+    deleted = before - set(library.torrents)
+    rescanned_series = {command["seriesId"] for command in library.commands if command["name"] == "RescanSeries"}
+    rescanned_movies = {command["movieId"] for command in library.commands if command["name"] == "RescanMovie"}
+    assert rescanned_series == {series_by_hash[h] for h in deleted if h in series_by_hash}
+    assert rescanned_movies == {movies_by_hash[h] for h in deleted if h in movies_by_hash}
+    assert rescanned_series and rescanned_movies
+    # One command per affected item, no full-library scan.
+    assert len([command for command in library.commands if command["name"].startswith("Rescan")]) == \
+        len(rescanned_series) + len(rescanned_movies)
+
+
+def test_unreachable_service_does_not_abort_cleanup(fake_server, monkeypatch, tmp_path):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+    monkeypatch.setenv("SONARR_BASE_URL", f"http://127.0.0.1:{closed_port}")
+    monkeypatch.setenv("QBIT_IDLE_DAYS", "1")
+    monkeypatch.setenv("QBIT_HISTORY_PATH", str(tmp_path / "history.bin"))
+    library = fake_server.library
+    before = set(library.torrents)
+
+    context = RuntimeContext()
+    context.service("qbit").start(interactive=False)
+    context.shutdown()
+
+    assert before - set(library.torrents)
+    assert (tmp_path / "history.bin").exists()
+    # Radarr is still asked to rescan after Sonarr failed.
+    assert any(command["name"] == "RescanMovie" for command in library.commands)
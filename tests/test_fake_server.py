@@ -0,0 +1,49 @@
+# tests/test_fake_server.py
+import requests
+
+from tests.fake_server import FakeLibrary, FakeServer, API_KEY
+
+
+def test_library_is_reproducible():
+    first = FakeLibrary(torrents=50, series=5, movies=5, seed=3, now=1_700_000_000)
+    second = FakeLibrary(torrents=50, series=5, movies=5, seed=3, now=1_700_000_000)
+    assert first.torrents_body() == second.torrents_body()
+    assert first.renames == second.renames
+
+
+def test_large_library_generation():
+    library = FakeLibrary(torrents=100_000, series=10_000, movies=0)
+    assert len(library.torrents) == 100_000
+    assert len(library.series) == 10_000
+
+
+def test_request_counting_and_maindata():
+    with FakeServer(FakeLibrary(torrents=10, series=1, movies=1)) as server:
+        session = requests.Session()
+        session.post(f"{server.url}/api/v2/auth/login", data={"username": "admin", "password": "adminadmin"})
+        maindata = session.get(f"{server.url}/api/v2/sync/maindata", params={"rid": 0}).json()
+        assert len(maindata["torrents"]) == 10
+        unchanged = session.get(f"{server.url}/api/v2/sync/maindata", params={"rid": maindata["rid"]}).json()
+        assert unchanged["torrents"] == {}
+        assert server.requests["sync/maindata"] == 2
+        assert server.request_count == 3
+
+
+def test_error_injection():
+    with FakeServer(FakeLibrary(torrents=0, series=1, movies=0), error_rate=1.0) as server:
+        response = requests.get(f"{server.url}/api/v3/series", params={"apikey": API_KEY})
+        assert response.status_code == 500
+
+
+def test_rate_limit():
+    with FakeServer(FakeLibrary(torrents=0, series=1, movies=0), rate_limit=2) as server:
+        statuses = [requests.get(f"{server.url}/api/v3/series", params={"apikey": API_KEY}).status_code
+                    for _ in range(5)]
+        assert 429 in statuses
+        assert statuses[0] == 200
+
+
+def test_latency_injection():
+    with FakeServer(FakeLibrary(torrents=0, series=1, movies=0), latency=0.05) as server:
+        response = requests.get(f"{server.url}/api/v3/series", params={"apikey": API_KEY})
+        assert response.elapsed.total_seconds() >= 0.05
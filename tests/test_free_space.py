@@ -0,0 +1,62 @@
+# tests/test_free_space.py
+from datetime import datetime
+
+import pytest
+
+from src.services.free_space import FreeSpaceMonitor, GIB, statvfs_free_space
+from src.services.runtime import RuntimeContext
+from src.services.scheduler import Scheduler
+
+
+def test_statvfs_free_space(tmp_path):
+    assert statvfs_free_space([str(tmp_path)]) > 0
+    assert statvfs_free_space([str(tmp_path / "missing")]) is None
+
+
+def test_monitor_watermarks():
+    free = [50 * GIB]
+    monitor = FreeSpaceMonitor(lambda: free[0], low_bytes=100 * GIB, high_bytes=1000 * GIB)
+    assert monitor.check() == "low"
+    free[0] = 500 * GIB
+    assert monitor.check() == "normal"
+    free[0] = 2000 * GIB
+    assert monitor.check() == "high"
+    free[0] = None
+    assert monitor.check() is None
+    with pytest.raises(ValueError):
+        FreeSpaceMonitor(lambda: 0, low_bytes=10, high_bytes=5)
+
+
+def test_free_space_triggers_and_stretches_cleanup(fake_server, monkeypatch):
+    monkeypatch.setenv("QBIT_INTERVAL_MINUTES", "60")
+    monkeypatch.setenv("QBIT_FREE_SPACE_LOW_GB", "100")
+    monkeypatch.setenv("QBIT_FREE_SPACE_HIGH_GB", "1000")
+    monkeypatch.setenv("QBIT_INTERVAL_STRETCH", "4")
+    library = fake_server.library
+    context = RuntimeContext()
+    service = context.service("qbit")
+    service.scheduler = Scheduler()
+    service.qbit_scheduled_cleanup()
+    job = service.schedule_job
+    assert service.free_space_job in service.scheduler.jobs
+
+    library.free_space = 50 * GIB
+    service.check_free_space()
+    assert job.next_run <= datetime.now()
+    # Still low: the cooldown keeps it from triggering again.
+    job.plan(job.following(datetime.now()))
+    service.check_free_space()
+    assert job.next_run > datetime.now()
+
+    library.free_space = 2000 * GIB
+    service.check_free_space()
+    assert job.interval.total_seconds() == 240 * 60
+
+    library.free_space = 500 * GIB
+    service.check_free_space()
+    assert job.interval.total_seconds() == 60 * 60
+    # One request per check, plus the first one that was refused before logging in.
+    assert fake_server.requests["sync/maindata"] == 5
+    assert fake_server.requests["auth/login"] == 1
+    context.shutdown()
+    assert service.scheduler.jobs == []
@@ -0,0 +1,73 @@
+# tests/test_logger.py
+import io
+import json
+import logging
+import threading
+
+from src.utils import ColorFormatter, drain_logging, flush_logging, log_torrent_table, setup_logger
+from src.utils.json_formatter import JsonFormatter
+
+TORRENT = {"hash": "abcdef0123456789", "name": "Some.Show.S01", "category": "tv", "size": 3 * 1024 ** 3,
+           "added_on": 1609459200, "last_activity": 1609459200}
+
+
+def make_record(message, **attributes):
+    record = logging.LogRecord("test", logging.INFO, __file__, 1, message, None, None)
+    record.__dict__.update(attributes)
+    return record
+
+
+def test_color_formatter_strips_colors_off_a_terminal():
+    record = make_record("\033[92mdeleted\033[0m", service_name="qBit", color="cyan")
+    assert ColorFormatter(use_color=False).format(record).endswith(" - INFO - qBit - deleted")
+    colored = ColorFormatter().format(record)
+    assert colored.startswith("\033[36m") and colored.endswith("\033[0m")
+
+
+def test_json_formatter_includes_torrent():
+    entry = json.loads(JsonFormatter().format(make_record("candidate", service_name="qBit", torrent=TORRENT)))
+    assert entry["service"] == "qBit"
+    assert entry["level"] == "INFO"
+    assert entry["torrent"]["hash"] == TORRENT["hash"]
+
+
+def test_records_are_written_by_the_background_thread(monkeypatch):
+    flush_logging()
+    output = io.StringIO()
+    monkeypatch.setattr("sys.stdout", output)
+    test_logger = setup_logger("tests.queue", service_name="queue-test")
+    threads = [threading.Thread(target=test_logger.info, args=("line %d", index)) for index in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    flush_logging()
+    lines = output.getvalue().splitlines()
+    assert len(lines) == 20
+    assert all(" - queue-test - line " in line and "\033[" not in line for line in lines)
+
+
+def test_drain_waits_for_queued_records(monkeypatch):
+    flush_logging()
+    output = io.StringIO()
+    monkeypatch.setattr("sys.stdout", output)
+    test_logger = setup_logger("tests.drain", service_name="drain-test")
+    for index in range(200):
+        test_logger.info("line %d", index)
+    drain_logging()
+    # What a prompt printed now would follow.
+    lines = output.getvalue().splitlines()
+    flush_logging()
+    assert len(lines) == 200 and lines[-1].endswith("line 199")
+
+
+def test_torrent_table_is_one_line_per_torrent(caplog, monkeypatch):
+    monkeypatch.delenv("LOG_FORMAT", raising=False)
+    torrents = [dict(TORRENT, hash=f"{index:040x}") for index in range(3)]
+    with caplog.at_level(logging.INFO):
+        log_torrent_table(torrents, logging.getLogger("tests.table"))
+    messages = [record.getMessage() for record in caplog.records]
+    assert messages[0].split()[:2] == ["HASH", "SIZE"]
+    assert len(messages) == 4
+    assert all("3.00 GiB" in message and "Some.Show.S01" in message for message in messages[1:])
+    assert [record.torrent["hash"] for record in caplog.records[1:]] == [torrent["hash"] for torrent in torrents]
@@ -0,0 +1,96 @@
+# tests/test_memory.py
+import logging
+import sys
+import tracemalloc
+
+import pytest
+
+from src.services.runtime import RuntimeContext
+from src.services.scheduler import Scheduler
+from src.utils import memory
+from tests.fake_server import FakeLibrary, FakeServer
+
+WARMUP_CYCLES = 40
+CYCLES = 160
+# Allowed growth over all CYCLES. A leaked torrent list or response per cycle would be far above it;
+# the rest is bounded interpreter state (e.g. the attribute lookup cache) that is still filling up.
+GROWTH_BUDGET_BYTES = 48 * 1024
+# The fake server runs in this process; its side of the requests doesn't count.
+SERVER_SIDE = [tracemalloc.Filter(False, pattern) for pattern in (
+    "*/tests/fake_server.py", "*/http/server.py", "*/socketserver.py", "*/email/*", tracemalloc.__file__)]
+
+
+@pytest.fixture
+def recycle_flag():
+    memory.recycle_requested.clear()
+    yield memory.recycle_requested
+    memory.recycle_requested.clear()
+
+
+def _cycle(context: RuntimeContext, library: FakeLibrary) -> None:
+    for name in ("qbit", "sonarr"):
+        service = context.service(name)
+        service.run_threaded(service.run_job).result()
+    # The fake Sonarr keeps every command it receives.
+    library.commands.clear()
+
+
+def test_daemon_cycles_do_not_grow_memory(monkeypatch):
+    library = FakeLibrary(torrents=20, series=2, movies=0, seasons_per_series=1, seed=7)
+    with FakeServer(library) as server:
+        for key, value in server.env().items():
+            monkeypatch.setenv(key, value)
+        context = RuntimeContext(max_workers=2)
+        services = [context.service(name) for name in ("qbit", "sonarr")]
+        services[1].sleep_interval = 0
+        for service in services:
+            service.scheduler = Scheduler()
+        # Records kept by pytest's log capture would count as growth.
+        logging.disable(logging.CRITICAL)
+        tracemalloc.start()
+        try:
+            for _ in range(WARMUP_CYCLES):
+                _cycle(context, library)
+            memory.release_memory()
+            before = tracemalloc.take_snapshot().filter_traces(SERVER_SIDE)
+            for _ in range(CYCLES):
+                _cycle(context, library)
+            memory.release_memory()
+            after = tracemalloc.take_snapshot().filter_traces(SERVER_SIDE)
+        finally:
+            tracemalloc.stop()
+            logging.disable(logging.NOTSET)
+            context.shutdown()
+
+    growth = sum(stat.size_diff for stat in after.compare_to(before, "filename"))
+    assert growth < GROWTH_BUDGET_BYTES
+    assert all(not service.active_futures for service in services)
+
+
+def test_rss_ceiling_requests_recycle(monkeypatch, recycle_flag):
+    monkeypatch.delenv("REFINEARR_MAX_RSS_MB", raising=False)
+    assert not memory.check_rss_ceiling()
+    monkeypatch.setenv("REFINEARR_MAX_RSS_MB", "100000")
+    assert not memory.check_rss_ceiling()
+    monkeypatch.setenv("REFINEARR_MAX_RSS_MB", "1")
+    assert memory.check_rss_ceiling()
+    assert recycle_flag.is_set()
+
+
+def test_job_over_ceiling_stops_scheduler(fake_server, monkeypatch, recycle_flag):
+    monkeypatch.setenv("REFINEARR_MAX_RSS_MB", "1")
+    context = RuntimeContext()
+    service = context.service("qbit")
+    stops = []
+    monkeypatch.setattr(service.scheduler, "stop", lambda: stops.append(True))
+    service.run_threaded(service.run_job).result()
+    context.shutdown()
+    assert stops and recycle_flag.is_set()
+
+
+def test_recycle_process_reexecs_with_same_arguments(monkeypatch):
+    calls = []
+    monkeypatch.setattr(memory.os, "execv", lambda path, argv: calls.append((path, argv)))
+    monkeypatch.setattr(sys, "orig_argv", [sys.executable, "src/main.py", "--schedule"], raising=False)
+    memory.recycle_process()
+    assert calls == [(sys.executable, [sys.executable, "src/main.py", "--schedule"])]
@@ -0,0 +1,66 @@
+# tests/test_metrics.py
+import requests
+
+from src.services.runtime import RuntimeContext
+from src.utils.metrics import (
+    Registry, REGISTRY, REQUESTS, TORRENTS_DELETED, record_job, start_metrics_server,
+)
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    counter = registry.counter("test_total", "A counter.", ("kind",))
+    counter.inc(kind='a"b')
+    histogram = registry.histogram("test_seconds", "A histogram.", buckets=(0.1, 1))
+    histogram.observe(0.05)
+    histogram.observe(0.5)
+    histogram.observe(5)
+    gauge = registry.gauge("test_depth", "A gauge.")
+    gauge.set_function(lambda: 3)
+    text = registry.render()
+    assert '# TYPE test_total counter' in text
+    assert 'test_total{kind="a\\"b"} 1' in text
+    assert 'test_seconds_bucket{le="0.1"} 1' in text
+    assert 'test_seconds_bucket{le="1"} 2' in text
+    assert 'test_seconds_bucket{le="+Inf"} 3' in text
+    assert 'test_seconds_count 3' in text
+    assert 'test_depth 3' in text
+
+
+def test_qbit_cleanup_is_instrumented(fake_server):
+    deleted_before = TORRENTS_DELETED.value()
+    info_before = REQUESTS.value(service="qbit", method="GET", endpoint="torrents/info", status="200")
+    context = RuntimeContext()
+    context.service("qbit").start(interactive=False)
+    context.shutdown()
+    assert REQUESTS.value(service="qbit", method="GET", endpoint="torrents/info", status="200") == info_before + 1
+    assert TORRENTS_DELETED.value() - deleted_before == fake_server.requests["torrents/delete"]
+
+
+def test_sonarr_endpoints_are_labelled_per_endpoint(fake_server):
+    context = RuntimeContext()
+    context.client("sonarr").get_series(7)
+    context.shutdown()
+    assert REQUESTS.value(service="sonarr", method="GET", endpoint="series/{id}", status="200") >= 1
+
+
+def test_metrics_and_readiness_routes():
+    server = start_metrics_server(0, host="127.0.0.1")
+    url = f"http://127.0.0.1:{server.server_address[1]}"
+    try:
+        record_job("MetricsTestService", 1.5, "success")
+        metrics = requests.get(f"{url}/metrics")
+        assert metrics.status_code == 200
+        assert 'refinearr_job_duration_seconds_count{service="MetricsTestService"} 1' in metrics.text
+        assert requests.get(f"{url}/healthz").text == "ok\n"
+        ready = requests.get(f"{url}/readyz")
+        assert ready.json()["services"]["MetricsTestService"]["last_success"] is not None
+
+        record_job("MetricsTestService", 1.0, "error")
+        assert requests.get(f"{url}/readyz").status_code == 503
+        record_job("MetricsTestService", 1.0, "success")
+        assert requests.get(f"{url}/readyz").json()["services"]["MetricsTestService"]["last_result"] == "success"
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert REGISTRY.render().endswith("\n")
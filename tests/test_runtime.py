@@ -0,0 +1,31 @@
+# tests/test_runtime.py
+from src.services.runtime import RuntimeContext
+
+
+def test_clients_and_services_are_shared(fake_server):
+    context = RuntimeContext(max_workers=2)
+    qbit = context.service("qbit")
+    assert context.service("qbit") is qbit
+    assert qbit.api is context.client("qbit")
+    assert qbit.executor is context.service("sonarr").executor
+    assert context.service("sonarr").sonarr is context.client("sonarr")
+    context.shutdown()
+
+
+def test_services_share_one_worker_pool(fake_server):
+    context = RuntimeContext(max_workers=2)
+    qbit, sonarr = context.service("qbit"), context.service("sonarr")
+    futures = [qbit.context.executor.submit(lambda: None) for _ in range(10)]
+    assert all(future.result(timeout=5) is None for future in futures)
+    assert context.executor._max_workers == 2
+    context.shutdown()
+    assert qbit.run_threaded(qbit.run_job) is None
+    assert sonarr.run_threaded(sonarr.run_job) is None
+
+
+def test_qbit_cleanup_through_shared_context(fake_server):
+    context = RuntimeContext()
+    context.service("qbit").start(interactive=False)
+    context.shutdown()
+    assert fake_server.requests["auth/login"] == 1
+    assert fake_server.requests["torrents/delete"] > 0
@@ -0,0 +1,107 @@
+# tests/test_scheduler.py
+import threading
+import time
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.services.scheduler import Scheduler, ScheduledJob, schedule_options
+
+
+def _job(calls, **kwargs):
+    kwargs.setdefault("interval_minutes", 10)
+    return ScheduledJob("test", calls.append, "ran", **kwargs)
+
+
+def test_job_requires_exactly_one_schedule():
+    with pytest.raises(ValueError):
+        ScheduledJob("test", print)
+    with pytest.raises(ValueError):
+        ScheduledJob("test", print, interval_minutes=5, run_time="02:00")
+    with pytest.raises(ValueError):
+        ScheduledJob("test", print, interval_minutes=5, misfire_policy="sometimes")
+
+
+def test_daily_job_runs_at_next_occurrence():
+    job = ScheduledJob("test", print, run_time="02:00")
+    assert job.following(datetime(2024, 1, 1, 1, 0)) == datetime(2024, 1, 1, 2, 0)
+    assert job.following(datetime(2024, 1, 1, 2, 0)) == datetime(2024, 1, 2, 2, 0)
+
+
+def test_run_pending_runs_only_due_jobs():
+    calls = []
+    scheduler = Scheduler()
+    job = scheduler.add_job(_job(calls))
+    assert scheduler.run_pending() == 0
+    due = job.due
+    assert scheduler.run_pending(now=due) == 1
+    assert calls == ["ran"]
+    assert job.due == due + timedelta(minutes=10)
+
+
+def test_jitter_delays_start_within_bound():
+    scheduler = Scheduler()
+    job = scheduler.add_job(_job([], jitter_seconds=30))
+    assert job.due <= job.next_run <= job.due + timedelta(seconds=30)
+
+
+@pytest.mark.parametrize("policy, expected_runs", [("skip", 0), ("run_once", 1), ("catch_up", 6)])
+def test_misfire_policies(policy, expected_runs):
+    calls = []
+    scheduler = Scheduler()
+    job = scheduler.add_job(_job(calls, deadline_seconds=60, misfire_policy=policy))
+    # Wake up 55 minutes after the first run was due: six occurrences were missed.
+    now = job.due + timedelta(minutes=55)
+    while scheduler.run_pending(now=now):
+        pass
+    assert len(calls) == expected_runs
+    assert job.due > now
+
+
+def test_trigger_runs_early_and_keeps_nominal_occurrence():
+    calls = []
+    scheduler = Scheduler()
+    job = scheduler.add_job(_job(calls))
+    due = job.due
+    assert scheduler.trigger("test") == 1
+    assert scheduler.run_pending() == 1
+    assert job.due == due
+    assert scheduler.trigger("other") == 0
+
+
+def test_set_interval_moves_next_run():
+    scheduler = Scheduler()
+    job = scheduler.add_job(_job([]))
+    previous = job.due - timedelta(minutes=10)
+    scheduler.set_interval(job, 40)
+    assert job.due == previous + timedelta(minutes=40)
+    scheduler.set_interval(job, 10)
+    assert job.due == previous + timedelta(minutes=10)
+    with pytest.raises(ValueError):
+        scheduler.set_interval(scheduler.add_job(_job([], interval_minutes=None, run_time="02:00")), 5)
+
+
+def test_run_forever_wakes_on_trigger_and_stop():
+    calls = []
+    scheduler = Scheduler()
+    scheduler.add_job(_job(calls, interval_minutes=60))
+    thread = threading.Thread(target=scheduler.run_forever)
+    thread.start()
+    time.sleep(0.05)
+    scheduler.trigger()
+    deadline = time.time() + 2
+    while not calls and time.time() < deadline:
+        time.sleep(0.01)
+    scheduler.stop()
+    thread.join(timeout=2)
+    assert calls == ["ran"]
+    assert not thread.is_alive()
+
+
+def test_schedule_options_prefers_service_settings(monkeypatch):
+    monkeypatch.setenv("SCHEDULER_JITTER_SECONDS", "10")
+    monkeypatch.setenv("SCHEDULER_MISFIRE_POLICY", "skip")
+    monkeypatch.setenv("QBIT_MISFIRE_POLICY", "catch_up")
+    monkeypatch.setenv("QBIT_DEADLINE_SECONDS", "none")
+    options = schedule_options("QBIT")
+    assert options == {"jitter_seconds": 10.0, "deadline_seconds": None, "misfire_policy": "catch_up"}
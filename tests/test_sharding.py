@@ -0,0 +1,113 @@
+# tests/test_sharding.py
+import threading
+import time
+
+from src.services.runtime import RuntimeContext
+from src.services.sharding import run_sharded, shard_of, sweep_key
+from src.storage import ShardLeaseStore
+
+
+def test_claims_are_exclusive_until_expiry(tmp_path):
+    path = str(tmp_path / "leases.db")
+    first = ShardLeaseStore(path, replica_id="a", lease_seconds=60)
+    second = ShardLeaseStore(path, replica_id="b", lease_seconds=60)
+    assert first.claim("sonarr", "1", 2) == 0
+    assert second.claim("sonarr", "1", 2) == 1
+    assert first.claim("sonarr", "1", 2) is None
+    assert first.renew("sonarr", "1", 0) is True
+    assert second.renew("sonarr", "1", 0) is False
+
+
+def test_expired_lease_is_stolen(tmp_path):
+    path = str(tmp_path / "leases.db")
+    dead = ShardLeaseStore(path, replica_id="dead", lease_seconds=-1)
+    alive = ShardLeaseStore(path, replica_id="alive", lease_seconds=60)
+    assert dead.claim("sonarr", "1", 1) == 0
+    assert alive.claim("sonarr", "1", 1) == 0
+    assert dead.renew("sonarr", "1", 0) is False
+    alive.complete("sonarr", "1", 0)
+    assert alive.claim("sonarr", "1", 1) is None
+
+
+def test_replicas_split_a_sweep(tmp_path):
+    path = str(tmp_path / "leases.db")
+    ids = list(range(1, 101))
+    seen = {"a": [], "b": []}
+
+    def replica(name):
+        store = ShardLeaseStore(path, replica_id=name)
+        run_sharded(store, "sonarr", ids, seen[name].append, shard_count=8, sweep="1")
+
+    threads = [threading.Thread(target=replica, args=(name,)) for name in seen]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(seen["a"] + seen["b"]) == ids
+    # Every shard was processed whole by one replica.
+    for items in seen.values():
+        for shard in {shard_of(item, 8) for item in items}:
+            assert [item for item in ids if shard_of(item, 8) == shard] == \
+                   [item for item in items if shard_of(item, 8) == shard]
+
+
+def test_sharded_sonarr_sweep(fake_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("SHARD_DB_PATH", str(tmp_path / "leases.db"))
+    monkeypatch.setenv("REPLICA_ID", "replica-1")
+    context = RuntimeContext()
+    service = context.service("sonarr")
+    service.sleep_interval = 0
+    service.start()
+    context.shutdown()
+    renamed = {command["seriesId"] for command in fake_server.library.commands}
+    assert renamed == {series_id for series_id, _ in fake_server.library.renames}
+    # A second run in the same sweep window finds every shard done.
+    second = ShardLeaseStore(str(tmp_path / "leases.db"), replica_id="replica-2")
+    assert run_sharded(second, "sonarr", [series["id"] for series in fake_server.library.series], print) == 0
+
+
+def test_lease_is_held_through_an_item_longer_than_the_lease(tmp_path):
+    path = str(tmp_path / "leases.db")
+    slow = ShardLeaseStore(path, replica_id="slow", lease_seconds=0.3)
+    other = ShardLeaseStore(path, replica_id="other", lease_seconds=0.3)
+    started = threading.Event()
+    processed = []
+
+    def process(item_id):
+        started.set()
+        # Like a series sleeping between rename commands, past the lease.
+        time.sleep(1.0)
+        processed.append(item_id)
+
+    worker = threading.Thread(target=run_sharded, args=(slow, "sonarr", [1], process),
+                              kwargs={"shard_count": 1, "sweep": "1"})
+    worker.start()
+    started.wait(5)
+    time.sleep(0.6)
+    assert other.claim("sonarr", "1", 1) is None
+    worker.join()
+    assert processed == [1]
+    assert other.claim("sonarr", "1", 1) is None
+
+
+def test_running_replica_takes_over_a_dead_replicas_shard(tmp_path):
+    path = str(tmp_path / "leases.db")
+    dead = ShardLeaseStore(path, replica_id="dead", lease_seconds=0.5)
+    alive = ShardLeaseStore(path, replica_id="alive", lease_seconds=60)
+    # The dead replica claimed shard 0 and never renewed or finished it.
+    assert dead.claim("sonarr", "1", 2) == 0
+    processed = []
+    assert run_sharded(alive, "sonarr", [1, 2, 3, 4], processed.append, shard_count=2, sweep="1") == 4
+    assert sorted(processed) == [1, 2, 3, 4]
+    assert alive.next_expiry("sonarr", "1") is None
+
+
+def test_replicas_agree_on_the_sweep(tmp_path):
+    path = str(tmp_path / "leases.db")
+    first = ShardLeaseStore(path, replica_id="a")
+    second = ShardLeaseStore(path, replica_id="b")
+    sweep = first.join_sweep("sonarr", 3600)
+    assert second.join_sweep("sonarr", 3600) == sweep
+    assert sweep_key(second, "sonarr", window_minutes=60) == sweep
+    # Past the window of the latest sweep, the next replica starts a new one.
+    assert second.join_sweep("sonarr", 0) != sweep
@@ -0,0 +1,82 @@
+# tests/test_simulate.py
+import random
+
+from src.simulate import SECONDS_PER_DAY, main, simulate
+from src.services import qbit
+from src.services.qbit import QbitService
+from src.services.runtime import RuntimeContext
+from src.storage import SnapshotRecorder, load_recordings
+
+AGE_DAYS = [5, 10, 16, 30]
+ACTIVITY_DAYS = [2, 7, 10]
+
+
+def _snapshots(seed=3, count=6, torrents=300):
+    rng = random.Random(seed)
+    start = 1_700_000_000
+    library = [{
+        "hash": f"{index:040x}",
+        "category": rng.choice(["tv", "movies", "ebooks"]),
+        "size": rng.randint(1, 10 ** 9),
+        "added_on": start - rng.randint(0, 40) * SECONDS_PER_DAY,
+    } for index in range(torrents)]
+    for torrent in library:
+        torrent["last_activity"] = torrent["added_on"]
+    snapshots = []
+    for step in range(count):
+        now = start + step * SECONDS_PER_DAY
+        for torrent in library:
+            # Some torrents are active again now and then.
+            if rng.random() < 0.2:
+                torrent["last_activity"] = now - rng.randint(0, 3600)
+        snapshots.append((now, [dict(torrent) for torrent in rng.sample(library, len(library) - 10)]))
+    return snapshots
+
+
+def _replay(snapshots, age_days, activity_days, monkeypatch):
+    # The qBit cleanup's own rule, so the simulator cannot drift from it.
+    monkeypatch.setattr(qbit, "AGE_THRESHOLD_DAYS", age_days)
+    monkeypatch.setattr(qbit, "LAST_ACTIVITY_THRESHOLD_DAYS", activity_days)
+    deleted = {}
+    for now, torrents in snapshots:
+        for torrent in torrents:
+            if QbitService.is_ready_for_delete(torrent, now):
+                deleted[torrent["hash"]] = torrent["size"]
+    return len(deleted), sum(deleted.values())
+
+
+def test_grid_matches_replaying_each_combination(monkeypatch):
+    snapshots = _snapshots()
+    rows = simulate(snapshots, AGE_DAYS, ACTIVITY_DAYS)
+    assert len(rows) == len(AGE_DAYS) * len(ACTIVITY_DAYS)
+    for row in rows:
+        assert (row["torrents"], row["bytes"]) == \
+            _replay(snapshots, row["age_days"], row["activity_days"], monkeypatch)
+    assert any(row["torrents"] for row in rows)
+
+
+def test_recorder_keeps_latest_snapshots(tmp_path):
+    recorder = SnapshotRecorder(str(tmp_path), keep=3)
+    snapshots = _snapshots(count=5, torrents=20)
+    for now, torrents in snapshots:
+        recorder.record([{**torrent, "magnet_uri": "magnet:?"} for torrent in torrents], now)
+    loaded = list(load_recordings(str(tmp_path)))
+    assert [now for now, _ in loaded] == [now for now, _ in snapshots[-3:]]
+    assert "magnet_uri" not in loaded[0][1][0]
+    assert loaded[-1][1][0]["hash"] == snapshots[-1][1][0]["hash"]
+
+
+def test_service_records_and_cli_reports(fake_server, monkeypatch, tmp_path, capsys):
+    monkeypatch.setenv("QBIT_RECORD_DIR", str(tmp_path))
+    context = RuntimeContext()
+    service = context.service("qbit")
+    monkeypatch.setattr(service, "is_ready_for_delete", lambda *args: False)
+    service.start(interactive=False)
+    context.shutdown()
+
+    assert main([str(tmp_path), "--age-days", "0,10000", "--activity-days", "0", "--json"]) == 0
+    # Log lines share stdout.
+    lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+    assert len(lines) == 2
+    assert '"torrents": 0' in lines[1]
+    assert main([str(tmp_path / "missing")]) == 1
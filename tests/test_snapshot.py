@@ -0,0 +1,137 @@
+# tests/test_snapshot.py
+import time
+
+from src.api.qbit_api import HASHES_PER_REQUEST
+from src.services import qbit, radarr
+from src.services.qbit import QbitService
+from src.services.runtime import RuntimeContext
+from src.services.sonarr import SonarrService
+from src.storage import SnapshotStore
+
+DAY = 86400
+
+
+def _torrent(torrent_hash, category="tv", added_on=0, **extra):
+    return {"hash": torrent_hash, "name": torrent_hash, "category": category, "added_on": added_on,
+            "last_activity": added_on, "size": 1, "state": "stalledUP", "tracker": "", **extra}
+
+
+def test_series_versions_detect_changes(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshot.db"))
+    series = [{"id": 1, "title": "A"}, {"id": 2, "title": "B"}]
+    assert store.upsert_series(series) == [1, 2]
+    assert store.upsert_series(series) == []
+    assert store.upsert_series([{"id": 1, "title": "A2"}]) == [1]
+    assert store.load_series() == [{"id": 1, "title": "A2"}]
+
+
+def test_seasons_are_dropped_when_series_changes(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshot.db"))
+    store.upsert_series([{"id": 1, "title": "A"}, {"id": 2, "title": "B"}])
+    store.set_seasons({1: [1, 2], 2: [1]})
+    assert store.load_seasons() == {1: [1, 2], 2: [1]}
+    store.upsert_series([{"id": 1, "title": "A"}, {"id": 2, "title": "B, renamed"}])
+    assert store.load_seasons() == {1: [1, 2]}
+
+
+def test_torrent_queries_use_snapshot(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshot.db"))
+    now = 100 * DAY
+    assert store.reconciled_at("torrents") is None
+    torrents = [_torrent("a", "tv", now - 30 * DAY), _torrent("b", "tv", now - 2 * DAY),
+                _torrent("c", "movies", now - 40 * DAY), _torrent("d", "ebooks", now - 50 * DAY)]
+    assert len(store.upsert_torrents(torrents)) == 4
+    assert store.reconciled_at("torrents") is not None
+    assert [row["hash"] for row in store.torrents_older_than(10, now=now)] == ["d", "c", "a"]
+    assert [row["hash"] for row in store.torrents_older_than(10, ["ebooks"], now=now)] == ["c", "a"]
+    assert store.upsert_torrents(torrents[:2]) == []
+    assert {row["hash"] for row in store.torrents_older_than(0, now=now)} == {"a", "b"}
+    store.remove_torrents(["a"])
+    assert [row["hash"] for row in store.torrents_older_than(0, now=now)] == ["b"]
+
+
+def test_movies_round_trip(tmp_path):
+    store = SnapshotStore(str(tmp_path / "snapshot.db"))
+    movies = [{"id": 1, "title": "M", "sizeOnDisk": 5}, {"id": 2, "title": "N", "sizeOnDisk": 9}]
+    assert store.upsert_movies(movies) == [1, 2]
+    assert store.upsert_movies(movies) == []
+    assert store.movies_larger_than(4) == [movies[1], movies[0]]
+    assert store.upsert_movies(movies[:1]) == []
+    assert store.movies_larger_than(0) == movies[:1]
+
+
+def test_sonarr_warm_start_skips_unchanged_series(fake_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_DB_PATH", str(tmp_path / "snapshot.db"))
+    context = RuntimeContext()
+    service = context.service("sonarr")
+    cold = service.get_dict_of_series()
+    cold_requests = fake_server.requests["series/{id}"]
+    assert cold_requests == len(fake_server.library.series)
+
+    # A restarted process only fetches details for the series that changed.
+    context.shutdown()
+    context = RuntimeContext()
+    fake_server.library.series[0]["title"] = "Changed"
+    warm = context.service("sonarr").get_dict_of_series()
+    context.shutdown()
+    assert warm == cold
+    assert fake_server.requests["series/{id}"] == cold_requests + 1
+
+
+def test_qbit_cleanup_keeps_torrent_snapshot(fake_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_DB_PATH", str(tmp_path / "snapshot.db"))
+    context = RuntimeContext()
+    context.service("qbit").start(interactive=False)
+    context.shutdown()
+    stored = {row["hash"] for row in SnapshotStore(str(tmp_path / "snapshot.db")).torrents_older_than(0)}
+    assert stored == set(fake_server.library.torrents)
+
+
+def test_qbit_warm_start_checks_only_old_torrents(fake_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_DB_PATH", str(tmp_path / "snapshot.db"))
+    library = fake_server.library
+    store = SnapshotStore(str(tmp_path / "snapshot.db"))
+    store.upsert_torrents(list(library.torrents.values()))
+    now = time.time()
+    expected = {torrent["hash"] for torrent in library.torrents.values()
+                if QbitService.is_ready_for_delete(torrent, now)}
+    candidates = store.torrents_older_than(qbit.AGE_THRESHOLD_DAYS, qbit.PROTECTED_CATEGORIES)
+    assert expected and len(candidates) < len(library.torrents)
+    before = set(library.torrents)
+
+    context = RuntimeContext()
+    context.service("qbit").start(interactive=False)
+    context.shutdown()
+
+    assert before - set(library.torrents) == expected
+    # The candidates in batches, then one full list for the reconcile.
+    assert fake_server.requests["torrents/info"] == -(-len(candidates) // HASHES_PER_REQUEST) + 1
+    assert {row["hash"] for row in store.torrents_older_than(0)} == set(library.torrents)
+
+
+def test_sonarr_warm_start_processes_each_series_once(fake_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_DB_PATH", str(tmp_path / "snapshot.db"))
+    library = fake_server.library
+    context = RuntimeContext()
+    SonarrService(sleep_interval=0, context=context).start()
+    context.shutdown()
+    renames = fake_server.requests["rename"]
+    assert renames == sum(len(series["seasons"]) for series in library.series)
+
+    library.series[0]["title"] = "Changed"
+    context = RuntimeContext()
+    SonarrService(sleep_interval=0, context=context).start()
+    context.shutdown()
+    assert fake_server.requests["rename"] == 2 * renames
+    assert fake_server.requests["series"] == 2
+
+
+def test_radarr_reconciles_movie_snapshot(fake_server, tmp_path, monkeypatch):
+    monkeypatch.setenv("SNAPSHOT_DB_PATH", str(tmp_path / "snapshot.db"))
+    context = RuntimeContext()
+    context.service("radarr").start()
+    context.shutdown()
+    min_bytes = radarr.LARGE_MOVIE_GB * 1024 ** 3
+    stored = SnapshotStore(str(tmp_path / "snapshot.db")).movies_larger_than(min_bytes)
+    assert {movie["id"] for movie in stored} == \
+        {movie["id"] for movie in fake_server.library.movies if movie["sizeOnDisk"] > min_bytes}
@@ -0,0 +1,40 @@
+# tests/test_startup.py
+import json
+import os
+import subprocess
+import sys
+
+from tests.benchmarks import import_time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Generous, so slow CI machines don't flap; importing every service and requests used to take far longer.
+IMPORT_BUDGET_SECONDS = 0.5
+
+
+def test_importing_main_loads_no_service_or_http_client():
+    result = import_time("src.main", repeat=3)
+    loaded = set(result["modules"])
+    assert "requests" not in loaded
+    assert not {name for name in loaded if name.startswith(("src.api.", "src.storage"))}
+    assert not loaded & {"src.services.qbit", "src.services.sonarr", "src.services.radarr"}
+    assert result["seconds"] < IMPORT_BUDGET_SECONDS
+
+
+def test_only_enabled_services_are_imported():
+    script = (
+        "import json, sys\n"
+        "from src.main import check_services\n"
+        "from src.services.runtime import get_runtime\n"
+        "services = [get_runtime().service(name).__class__.__name__ for name in check_services()]\n"
+        "print(json.dumps({'services': services, 'modules': sorted(sys.modules)}))\n"
+    )
+    env = {key: value for key, value in os.environ.items() if not key.startswith(("QBIT_", "SONARR_", "RADARR_"))}
+    env.update({"SONARR_BASE_URL": "http://127.0.0.1:9", "SONARR_API_KEY": "key"})
+    completed = subprocess.run([sys.executable, "-c", script], check=True, capture_output=True, text=True,
+                               env=env, cwd=ROOT)
+    result = json.loads(completed.stdout.splitlines()[-1])
+    assert result["services"] == ["SonarrService"]
+    assert "src.services.sonarr" in result["modules"]
+    assert not set(result["modules"]) & {"src.services.qbit", "src.services.radarr", "src.api.qbit_api",
+                                         "src.api.radarr_api"}
@@ -0,0 +1,107 @@
+# tests/test_sweep.py
+import heapq
+import itertools
+import logging
+
+from src.services.runtime import RuntimeContext
+from src.services.sweep import SweepPlanner
+
+NOW = 1_700_000_000
+
+
+def _series(series_id, title="Series", added="2020-01-01T00:00:00Z"):
+    return {"id": series_id, "title": title, "added": added}
+
+
+def _order(heap):
+    return [heapq.heappop(heap)[-1] for _ in range(len(heap))]
+
+
+def test_priority_order():
+    planner = SweepPlanner(coverage_runs=10, recent_days=14)
+    library = [_series(series_id) for series_id in range(1, 6)]
+    library[2] = _series(3, added="2023-11-10T00:00:00Z")
+    for series_id in _order(planner.plan(library, NOW)):
+        planner.mark_visited(series_id, renamed=series_id == 4)
+
+    library[1] = _series(2, title="Changed")
+    library.append(_series(6))
+    # Changed (and new) series first, then ones that needed renames, then recently added ones.
+    assert _order(planner.plan(library, NOW)) == [2, 6, 4, 3, 1, 5]
+
+
+def test_unvisited_series_become_overdue():
+    planner = SweepPlanner(coverage_runs=2)
+    planner.plan([_series(1), _series(2)], NOW)
+    planner.mark_visited(2, renamed=True)
+    heap = planner.plan([_series(1), _series(2)], NOW)
+    assert planner.overdue(1) and not planner.overdue(2)
+    assert heap[0][-1] == 1
+
+
+def test_budgeted_sweep_covers_every_series(fake_server, monkeypatch):
+    library = fake_server.library
+    monkeypatch.setenv("SONARR_TIME_BUDGET_MINUTES", "0.1")
+    monkeypatch.setenv("SONARR_FULL_COVERAGE_RUNS", "3")
+    context = RuntimeContext()
+    service = context.service("sonarr")
+    service.sleep_interval = 0
+    # Every clock reading is one second later: the six-second budget fits a few series per run.
+    ticks = itertools.count()
+    service.clock = lambda: next(ticks)
+
+    visited = []
+    process_series = service.process_series
+    monkeypatch.setattr(service, "process_series",
+                        lambda series_id, *args: visited.append(series_id) or process_series(series_id, *args))
+    service.start()
+    first_run = list(visited)
+    assert 0 < len(first_run) < len(library.series)
+    service.start()
+    assert not set(first_run) & set(visited[len(first_run):])
+    service.start()
+    assert sorted(set(visited)) == sorted(series["id"] for series in library.series)
+    renamed = {command["seriesId"] for command in library.commands}
+    assert renamed == {series_id for series_id, _ in library.renames}
+
+    # In the next run, the series of the first run are due; a changed series comes right after them.
+    changed = library.series[-1]
+    changed["title"] = "Renamed Upstream"
+    del visited[:]
+    service.clock = lambda: 0
+    service.start()
+    context.shutdown()
+    assert sorted(visited[:len(first_run)]) == sorted(first_run)
+    assert visited[len(first_run)] == changed["id"]
+
+
+def test_one_shot_runs_roll_over_through_the_state_file(fake_server, monkeypatch, tmp_path):
+    library = fake_server.library
+    monkeypatch.setenv("SONARR_TIME_BUDGET_MINUTES", "0.1")
+    monkeypatch.setenv("SONARR_FULL_COVERAGE_RUNS", "3")
+    monkeypatch.setenv("SONARR_SWEEP_STATE_PATH", str(tmp_path / "sweep.json"))
+    for _ in range(3):
+        # A fresh process per run, as when started from cron.
+        context = RuntimeContext()
+        service = context.service("sonarr")
+        service.sleep_interval = 0
+        ticks = itertools.count()
+        service.clock = lambda: next(ticks)
+        service.start()
+        context.shutdown()
+
+    planner = SweepPlanner(state_path=str(tmp_path / "sweep.json"))
+    assert planner.run == 3
+    assert set(planner.visited) == {series["id"] for series in library.series}
+    # Every run got further; the last one took everything that was left.
+    assert set(planner.visited.values()) == {1, 2, 3}
+
+
+def test_budget_with_sharding_is_reported(fake_server, monkeypatch, tmp_path, caplog):
+    monkeypatch.setenv("SONARR_TIME_BUDGET_MINUTES", "5")
+    monkeypatch.setenv("SHARD_DB_PATH", str(tmp_path / "leases.db"))
+    with caplog.at_level(logging.WARNING):
+        context = RuntimeContext()
+        context.service("sonarr")
+        context.shutdown()
+    assert any("SONARR_TIME_BUDGET_MINUTES is ignored" in record.getMessage() for record in caplog.records)
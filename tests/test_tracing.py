@@ -0,0 +1,80 @@
+# tests/test_tracing.py
+import logging
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+from src.services.runtime import RuntimeContext
+from src.utils import tracing
+
+
+@pytest.fixture
+def tracing_on():
+    tracing.enable()
+    yield
+    tracing.disable()
+
+
+def test_span_is_a_shared_noop_when_disabled():
+    tracing.disable()
+    assert tracing.span("http", "GET", "torrents/info") is tracing.span("filter")
+
+
+def test_traced_run_collects_stages(fake_server, tracing_on, caplog):
+    context = RuntimeContext()
+    with caplog.at_level(logging.INFO, logger="src.utils.tracing"):
+        tracing.traced_run("QbitService", context.service("qbit").start, interactive=False)
+    context.shutdown()
+    summary = next(record.getMessage() for record in caplog.records if "Stage timings" in record.getMessage())
+    for stage in ("http GET torrents/info", "decode json", "filter", "delete", "http POST torrents/delete"):
+        assert stage in summary
+
+
+def test_summary_reaches_stdout_without_log_capture(tmp_path):
+    # Run in a fresh interpreter: pytest's capture would attach a handler to the root logger.
+    script = (
+        "from src.utils import tracing\n"
+        "tracing.enable(profile_mode='cprofile')\n"
+        "tracing.traced_run('Job', lambda: sum(range(1000)))\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = {**os.environ, "PYTHONPATH": root, "REFINEARR_PROFILE_DIR": str(tmp_path), "LOG_FORMAT": "text"}
+    output = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True, timeout=60).stdout
+    assert "Stage timings for Job" in output
+    assert "Wrote cProfile stats" in output
+
+
+def test_timings_summary_is_sorted_by_time():
+    timings = tracing.StageTimings()
+    timings.add("fast", 0.1)
+    timings.add("slow", 0.5)
+    timings.add("slow", 0.5)
+    lines = timings.summary(total=2.0).splitlines()
+    assert lines[1].split()[:3] == ["slow", "2", "1.000"]
+    assert lines[2].startswith("fast")
+    assert lines[-1].startswith("total")
+
+
+@pytest.mark.parametrize("mode, suffix", [("sample", ".collapsed"), ("cprofile", ".prof")])
+def test_profile_consumes_one_run(tmp_path, monkeypatch, mode, suffix):
+    monkeypatch.setenv("REFINEARR_PROFILE_DIR", str(tmp_path))
+    tracing.enable(profile_mode=mode)
+    try:
+        assert tracing.traced_run("busy", lambda: time.sleep(0.1) or 42) == 42
+        tracing.traced_run("busy", lambda: None)
+    finally:
+        tracing.disable()
+    files = os.listdir(tmp_path)
+    assert len(files) == 1 and files[0].endswith(suffix)
+    if mode == "sample":
+        stacks = (tmp_path / files[0]).read_text().splitlines()
+        assert stacks and all(line.rsplit(" ", 1)[1].isdigit() for line in stacks)
+        assert any("<lambda>" in line for line in stacks)
+
+
+def test_unknown_profile_mode_is_rejected():
+    with pytest.raises(ValueError):
+        tracing.enable(profile_mode="perf")
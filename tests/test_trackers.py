@@ -0,0 +1,64 @@
+# tests/test_trackers.py
+import time
+
+from src.services import qbit
+from src.services.runtime import RuntimeContext
+from src.services.trackers import TrackerIndex, classify_trackers
+from tests.fake_server import TRACKER_DEAD, TRACKER_UNREGISTERED, TRACKER_WORKING
+
+
+def _tracker(status, msg="", url="https://tracker.example.com/announce"):
+    return {"url": url, "status": status, "msg": msg}
+
+
+def test_classify_trackers():
+    dht = _tracker(2, url="** [DHT] **")
+    assert classify_trackers([dht, _tracker(2)]) == "working"
+    assert classify_trackers([dht, _tracker(4, "Torrent not registered with this tracker")]) == "unregistered"
+    assert classify_trackers([dht, _tracker(4, "Torrent has been deleted")]) == "unregistered"
+    assert classify_trackers([dht, _tracker(4, "Connection timed out")]) == "dead"
+    assert classify_trackers([dht, _tracker(4, "Torrent not deleted")]) == "dead"
+    assert classify_trackers([dht, _tracker(4, "Deleted from client cache")]) == "dead"
+    assert classify_trackers([dht]) == "dead"
+    assert classify_trackers([_tracker(1)]) == "unknown"
+    assert classify_trackers([_tracker(4, "timed out"), _tracker(3)]) == "working"
+
+
+def test_index_only_refetches_changed_torrents(fake_server):
+    library = fake_server.library
+    context = RuntimeContext()
+    api = context.client("qbit")
+    api.login()
+    index = TrackerIndex(api, ttl_seconds=3600, concurrency=4)
+
+    assert index.refresh(api.list_torrents()) == len(library.torrents)
+    assert fake_server.requests["torrents/trackers"] == len(library.torrents)
+    for torrent_hash, health in library.tracker_health.items():
+        assert index.status(torrent_hash) == health
+
+    assert index.refresh(api.list_torrents()) == 0
+
+    changed = next(h for h, health in library.tracker_health.items() if health == TRACKER_WORKING)
+    library.set_tracker_health(changed, TRACKER_UNREGISTERED)
+    assert index.refresh(api.list_torrents()) == 1
+    assert index.status(changed) == TRACKER_UNREGISTERED
+
+    assert index.refresh(api.list_torrents(), now=time.time() + 7200) == len(library.torrents)
+    context.shutdown()
+
+
+def test_cleanup_deletes_unregistered_torrents(fake_server, monkeypatch):
+    library = fake_server.library
+    monkeypatch.setattr(qbit, "DELETE_UNREGISTERED", True)
+    # Only tracker health decides: nothing is old enough for the age criteria.
+    monkeypatch.setattr(qbit, "AGE_THRESHOLD_DAYS", 10_000)
+    unregistered = {h for h, health in library.tracker_health.items()
+                    if health == TRACKER_UNREGISTERED and library.torrents[h]["category"] not in qbit.PROTECTED_CATEGORIES}
+    dead = {h for h, health in library.tracker_health.items() if health == TRACKER_DEAD}
+    assert unregistered
+
+    context = RuntimeContext()
+    context.service("qbit").start(interactive=False)
+    context.shutdown()
+    assert not unregistered & set(library.torrents)
+    assert dead <= set(library.torrents)